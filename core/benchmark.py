@@ -0,0 +1,318 @@
+"""
+Load benchmark for the API, driving the calls the frontend pages make.
+
+A run is a fixed sequence of (role, scenario) picks drawn from a weighted
+mix with a seeded random generator, so two runs over the same seeded
+dataset (see seed_portfolio) issue the same requests and their JSON
+results can be diffed between commits. Requests go through Django's test
+client in this process, where every SQL statement is counted, or over
+HTTP to a running server, where only latency and throughput are visible.
+"""
+import json
+import math
+import random
+import subprocess
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from finance.models import Invoice, Payment
+from maintenance.models import Complaint
+from properties.models import Property, Unit
+from tenants.models import Tenant
+from .seeding import FIRST_NAMES
+
+
+ROLES = ('landlord', 'tenant', 'caretaker', 'staff')
+RECORDING_ROLES = ('landlord', 'staff')
+
+# Page -> the API calls it makes on load, as in frontend/src/pages
+SCENARIOS = {
+    'dashboard': [
+        ('GET', '/api/users/profile/'),
+        ('GET', '/api/properties/statistics/'),
+        ('GET', '/api/invoices/statistics/'),
+        ('GET', '/api/complaints/statistics/'),
+    ],
+    'finance': [
+        ('GET', '/api/invoices/'),
+        ('GET', '/api/payments/'),
+    ],
+    'tenants': [
+        ('GET', '/api/tenants/'),
+    ],
+    # PaymentForm searches its tenant picker as the name is typed, then records a payment
+    'payment': [
+        ('GET', '/api/search/?kind=tenant&q={name}'),
+        ('POST', '/api/payments/'),
+    ],
+}
+TENANT_PICKER = SCENARIOS['payment'][0][1]
+DEFAULT_MIX = {'dashboard': 4, 'finance': 3, 'tenants': 2, 'payment': 1}
+
+
+def parse_mix(text):
+    """'dashboard=4,payment=1' -> {'dashboard': 4, 'payment': 1}"""
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    if not mix or not any(mix.values()):
+        raise ValueError('The mix needs at least one scenario with a positive weight')
+    return mix
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``; None when there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(samples, elapsed=None):
+    """Count, errors, latency percentiles and SQL per request of ``samples``"""
+    latencies = [sample['ms'] for sample in samples]
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    summary = {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    }
+    if elapsed is not None:
+        summary['elapsed_seconds'] = round(elapsed, 3)
+        summary['requests_per_second'] = round(len(samples) / elapsed, 2) if elapsed else None
+    return summary
+
+
+def access_token(user):
+    """A JWT access token for ``user``, as /api/auth/token/ would issue"""
+    return str(RefreshToken.for_user(user).access_token)
+
+
+class QueryCounter:
+    """Execute wrapper counting the statements run on one connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ClientTransport:
+    """Requests through Django's test client in this process, counting SQL"""
+
+    def __init__(self):
+        self.client = Client(SERVER_NAME='localhost')
+
+    def request(self, method, path, token, body=None):
+        counter = QueryCounter()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            if method == 'POST':
+                response = self.client.post(path, json.dumps(body), content_type='application/json', **headers)
+            else:
+                response = self.client.get(path, **headers)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return response.status_code, data, elapsed, counter.count
+
+
+class HTTPTransport:
+    """Requests over HTTP to a running server; SQL is not visible from here"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token, body=None):
+        request = urllib.request.Request(
+            self.base_url + path, method=method,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'},
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, content = error.code, error.read()
+        elapsed = (time.perf_counter() - started) * 1000
+        try:
+            data = json.loads(content)
+        except ValueError:
+            data = None
+        return status, data, elapsed, None
+
+
+class Benchmark:
+    """
+    Runs ``iterations`` page loads picked from ``mix`` for the users in
+    ``users`` (role -> User) and collects one sample per HTTP request.
+    """
+
+    def __init__(self, transport, users, mix=None, iterations=200, warmup=1, seed=0, concurrency=1):
+        self.transport = transport
+        self.tokens = {role: access_token(user) for role, user in users.items()}
+        self.usernames = {role: user.username for role, user in users.items()}
+        self.mix = mix or DEFAULT_MIX
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        self.concurrency = concurrency
+        self.rng = random.Random(seed)
+
+    def plan(self):
+        """The (role, scenario) sequence of the run, fixed by the seed"""
+        picks = []
+        for role in self.tokens:
+            for scenario in self.mix:
+                if scenario != 'payment' or role in RECORDING_ROLES:
+                    picks.append(((role, scenario), self.mix[scenario]))
+        choices, weights = zip(*picks)
+        return self.rng.choices(choices, weights=weights, k=self.iterations)
+
+    def run_scenario(self, role, scenario, rng):
+        token = self.tokens[role]
+        samples, picker = [], None
+        for method, path in SCENARIOS[scenario]:
+            body = None
+            if method == 'POST':
+                body = self.payment_body(picker, rng)
+                if body is None:
+                    continue
+            # The picker is typed into with the start of a first name the seeder uses
+            url = path.format(name=rng.choice(FIRST_NAMES)[:3].lower()) if path == TENANT_PICKER else path
+            status, data, ms, queries = self.transport.request(method, url, token, body)
+            if path == TENANT_PICKER:
+                picker = data
+            samples.append({
+                'role': role, 'scenario': scenario, 'endpoint': f'{method} {path}',
+                'status': status, 'ms': round(ms, 3), 'queries': queries,
+            })
+        return samples
+
+    def payment_body(self, picker, rng):
+        """A payment for one of the tenants the picker's search returned"""
+        tenants = picker.get('results') if isinstance(picker, dict) else None
+        if not tenants:
+            return None
+        return {
+            'tenant': rng.choice(tenants)['id'], 'amount': str(rng.randrange(500, 20000, 500)),
+            'payment_method': 'MOBILE_MONEY', 'payment_date': date.today().isoformat(),
+            'transaction_reference': f'BENCH-{uuid.uuid4().hex[:12].upper()}',
+        }
+
+    def run(self):
+        meta = self.meta()
+        plan = self.plan()
+        for role in self.tokens:
+            for scenario in {scenario for (r, scenario) in plan if r == role}:
+                for _ in range(self.warmup):
+                    self.run_scenario(role, scenario, random.Random(self.seed))
+
+        samples = []
+        started = time.perf_counter()
+        if self.concurrency > 1:
+            def worker(index):
+                role, scenario = plan[index]
+                return self.run_scenario(role, scenario, random.Random(self.seed + index))
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                for batch in pool.map(worker, range(len(plan))):
+                    samples += batch
+        else:
+            for index, (role, scenario) in enumerate(plan):
+                samples += self.run_scenario(role, scenario, random.Random(self.seed + index))
+        elapsed = time.perf_counter() - started
+        return self.report(meta, samples, elapsed)
+
+    def report(self, meta, samples, elapsed):
+        groups = defaultdict(list)
+        for sample in samples:
+            groups['endpoint', sample['role'], sample['endpoint']].append(sample)
+            groups['scenario', sample['role'], sample['scenario']].append(sample)
+        sections = {'endpoints': {}, 'scenarios': {}}
+        for (kind, role, name), group in sorted(groups.items()):
+            sections[f'{kind}s'][f'{role} {name}'] = summarize(group)
+        return {
+            'meta': meta,
+            'total': summarize(samples, elapsed),
+            **sections,
+        }
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            'commit': commit,
+            'transport': type(self.transport).__name__,
+            'users': self.usernames,
+            'mix': self.mix,
+            'iterations': self.iterations,
+            'seed': self.seed,
+            'concurrency': self.concurrency,
+            'dataset': dataset_fingerprint(),
+        }
+
+
+def dataset_fingerprint():
+    """Row counts of the main tables, to tell whether two runs share a dataset"""
+    models = [get_user_model(), Property, Unit, Tenant, Invoice, Payment, Complaint]
+    return {model._meta.label_lower: model.objects.count() for model in models}
+
+
+def run_in_process(users, commit=False, **options):
+    """
+    Benchmark through the test client. Writes are rolled back afterwards
+    unless ``commit`` is set, so the dataset is the same for the next run.
+    """
+    with transaction.atomic():
+        result = Benchmark(ClientTransport(), users, **options).run()
+        if not commit:
+            transaction.set_rollback(True)
+    return result
+
+
+def compare(current, baseline):
+    """(endpoint, {metric: (before, now)}) for the endpoints both runs measured"""
+    rows = []
+    for key, stats in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(key)
+        if before is None:
+            continue
+        changes = {
+            metric: (before[metric], stats[metric])
+            for metric in ('p50_ms', 'p95_ms', 'queries_mean')
+            if stats.get(metric) is not None and before.get(metric) is not None
+        }
+        rows.append((key, changes))
+    return rows
@@ -0,0 +1,82 @@
+"""
+Idempotency-Key handling for create endpoints
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from elms_backend.tasks import submit
+from .models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+PRUNE_BATCH_SIZE = 1000
+
+_last_prune = 0.0
+
+
+def request_hash(data):
+    """Fingerprint of a request body, so a reused key with a different payload can be refused"""
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(user, scope, key, fingerprint):
+    """
+    Reserve ``key`` for a new request.
+
+    Returns (record, True) when the caller should go ahead and process the
+    request, or (existing record, False) when the key is already taken. An
+    expired record, or one left in progress by a request that died, is
+    taken over.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, scope=scope, key=key, request_hash=fingerprint, expires_at=expires_at
+            ), True
+    except IntegrityError:
+        pass
+
+    stale_claim = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    taken_over = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).filter(
+        Q(expires_at__lte=now) | Q(status_code__isnull=True, created_at__lt=stale_claim)
+    ).update(
+        request_hash=fingerprint, status_code=None, response_body=None, created_at=now, expires_at=expires_at
+    )
+    record = IdempotencyKey.objects.get(user=user, scope=scope, key=key)
+    return record, bool(taken_over)
+
+
+def prune_expired(batch_size=PRUNE_BATCH_SIZE):
+    """Delete expired keys in small batches; returns how many were removed"""
+    deleted = 0
+    while True:
+        expired = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not expired:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=expired).delete()[0]
+
+
+def schedule_prune():
+    """Prune in the background at most once per IDEMPOTENCY_PRUNE_INTERVAL per process"""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < settings.IDEMPOTENCY_PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    submit(prune_expired)
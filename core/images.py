@@ -0,0 +1,195 @@
+"""
+Thumbnails and WebP variants of uploaded images.
+
+When an image field changes, a background task (elms_backend.tasks) renders
+every size in SIZES as JPEG and WebP under derivatives/ and records their
+storage names in the model's ``<field>_variants`` JSON field, together with
+the ``source`` file they were made from. Variants whose source is not the
+field's current file are stale, so any save that leaves them so, whether it
+changes the image or writes back an old copy of the variants, queues the
+work again.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from elms_backend.tasks import submit
+
+logger = logging.getLogger(__name__)
+
+# Model label -> image field; each has a ``<field>_variants`` JSONField beside it
+SOURCES = {
+    'properties.Property': 'image',
+    'properties.Unit': 'image',
+    'users.User': 'photo',
+    'maintenance.ComplaintImage': 'image',
+}
+# Size -> (width, height, crop). Cropped sizes fill the box, the others fit
+# inside it without being enlarged.
+SIZES = {
+    'thumb': (320, 320, True),
+    'medium': (1024, 1024, False),
+}
+# Variant suffix -> (Pillow format, extension, save options)
+FORMATS = {
+    '': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    '_webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+VARIANTS = [f'{size}{suffix}' for size in SIZES for suffix in FORMATS]
+DERIVATIVES_DIR = 'derivatives'
+
+
+def variants_field(field):
+    return f'{field}_variants'
+
+
+def is_current(instance, field):
+    """Whether the recorded variants were made from the field's current file"""
+    return (getattr(instance, variants_field(field)) or {}).get('source') == (getattr(instance, field).name or None)
+
+
+def variant_names(variants):
+    """Storage names of the files in a variants dict"""
+    return [name for key, name in (variants or {}).items() if key in VARIANTS]
+
+
+def _render(image, width, height, crop):
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def render(file):
+    """{variant: storage name} of freshly written variants of an image file"""
+    with file.open('rb'):
+        with Image.open(file) as original:
+            original = ImageOps.exif_transpose(original).convert('RGB')
+    stem, _ = os.path.splitext(file.name)
+    written = {}
+    try:
+        for size, (width, height, crop) in SIZES.items():
+            image = _render(original, width, height, crop)
+            for suffix, (image_format, extension, options) in FORMATS.items():
+                buffer = BytesIO()
+                image.save(buffer, image_format, **options)
+                name = f'{DERIVATIVES_DIR}/{stem}.{size}.{extension}'
+                written[f'{size}{suffix}'] = file.storage.save(name, ContentFile(buffer.getvalue()))
+    except Exception:
+        delete_files(file.storage, written.values())
+        raise
+    return written
+
+
+def delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete image variant %s', name)
+
+
+def generate(label, pk, force=False):
+    """
+    Render and record the variants of one object's image, replacing the
+    previous ones. Returns the recorded variants, or None when the object
+    is gone or its image changed while rendering.
+    """
+    model, field = apps.get_model(label), SOURCES[label]
+    field_name = variants_field(field)
+    instance = model._default_manager.filter(pk=pk).only(field, field_name).first()
+    if instance is None:
+        return None
+    previous = getattr(instance, field_name) or {}
+    if not force and is_current(instance, field):
+        return previous
+
+    file = getattr(instance, field)
+    variants = {}
+    if file:
+        variants['source'] = file.name
+        try:
+            variants.update(render(file))
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as error:
+            # Recorded so the file is not retried on every save; backfill --force retries it
+            logger.warning('Could not render variants of %s: %s', file.name, error)
+            variants['error'] = str(error)[:200]
+
+    unchanged = Q(**{field: file.name}) if file else Q(**{field: ''}) | Q(**{f'{field}__isnull': True})
+    if not model._default_manager.filter(unchanged, pk=pk).update(**{field_name: variants}):
+        # A newer upload queued its own run
+        delete_files(file.storage, variant_names(variants))
+        return None
+    delete_files(file.storage, set(variant_names(previous)) - set(variant_names(variants)))
+    return variants
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    if raw or is_current(instance, SOURCES[sender._meta.label]):
+        return
+    label, pk = sender._meta.label, instance.pk
+    transaction.on_commit(lambda: submit(generate, label, pk))
+
+
+def _deleted(sender, instance, **kwargs):
+    field = SOURCES[sender._meta.label]
+    names = variant_names(getattr(instance, variants_field(field)))
+    if names:
+        storage = getattr(instance, field).storage
+        transaction.on_commit(lambda: submit(delete_files, storage, names))
+
+
+def connect():
+    """Queue variant rendering after saves of every model in SOURCES"""
+    for label in SOURCES:
+        post_save.connect(_saved, sender=label, dispatch_uid=f'image-variants-save-{label}')
+        post_delete.connect(_deleted, sender=label, dispatch_uid=f'image-variants-delete-{label}')
+
+
+def _generate_in_worker(label, pk, force):
+    try:
+        return generate(label, pk, force=force)
+    finally:
+        connection.close()
+
+
+def backfill(labels=None, force=False, workers=4, log=None):
+    """
+    Render the variants of every stored image that lacks current ones (all
+    of them with ``force``), ``workers`` at a time.
+    """
+    started = time.perf_counter()
+    log = log or (lambda message: None)
+    counts = {'rendered': 0, 'failed': 0, 'skipped': 0}
+    for label in labels or SOURCES:
+        model, field = apps.get_model(label), SOURCES[label]
+        rows = model._default_manager.values_list('pk', field, variants_field(field)).order_by('pk').iterator()
+        pending = []
+        for pk, name, variants in rows:
+            if (force and name) or (variants or {}).get('source') != (name or None):
+                pending.append(pk)
+            else:
+                counts['skipped'] += 1
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='elms-images') as pool:
+                results = list(pool.map(lambda pk: _generate_in_worker(label, pk, force), pending))
+        else:
+            results = [generate(label, pk, force=force) for pk in pending]
+        for variants in results:
+            if variants is None:
+                counts['skipped'] += 1
+            else:
+                counts['failed' if 'error' in variants else 'rendered'] += 1
+        log(f'{label}: {len(pending)} images processed')
+    counts['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return counts
@@ -0,0 +1,134 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from core.benchmark import (
+    DEFAULT_MIX, ROLES, SCENARIOS, Benchmark, HTTPTransport, compare, parse_mix, run_in_process,
+)
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-benchmarks the API with a weighted mix of frontend page loads '
+        f"({', '.join(SCENARIOS)}) as each role, reporting throughput, p50/p95/p99 latency "
+        'and SQL queries per request'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('landlord', help='Landlord whose portfolio the run works on')
+        parser.add_argument('--tenant', help='Tenant username (default: an active tenant of the landlord)')
+        parser.add_argument('--caretaker', help="Caretaker username (default: the one with most complaints on the landlord's units)")
+        parser.add_argument('--staff', help='Staff username (default: the first staff user, if any)')
+        parser.add_argument('--roles', default=','.join(ROLES), help='Roles to include, comma separated')
+        parser.add_argument(
+            '--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+            help='Scenario weights, e.g. dashboard=4,finance=3,tenants=2,payment=1',
+        )
+        parser.add_argument('--iterations', type=int, default=200, help='Page loads to measure')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured loads of each page first')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--url', help='Benchmark a running server at this base URL instead of in-process')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel page loads (with --url)')
+        parser.add_argument('--commit', action='store_true', help='Keep the payments recorded in-process')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Earlier JSON results to compare against')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        if options['concurrency'] > 1 and not options['url']:
+            raise CommandError('--concurrency needs --url; the in-process client runs one request at a time')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read {options['compare']}: {error}")
+
+        users = self._users(options)
+        settings = {
+            'mix': mix, 'iterations': options['iterations'], 'warmup': options['warmup'],
+            'seed': options['seed'], 'concurrency': options['concurrency'],
+        }
+        self.stdout.write(
+            f"{options['iterations']} page loads as {', '.join(f'{role} {user.username}' for role, user in users.items())}"
+        )
+        if options['url']:
+            result = Benchmark(HTTPTransport(options['url']), users, **settings).run()
+        else:
+            result = run_in_process(users, commit=options['commit'], **settings)
+
+        self._print(result)
+        if baseline:
+            self._print_comparison(compare(result, baseline))
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(result, handle, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def _users(self, options):
+        User = get_user_model()
+        roles = [role.strip() for role in options['roles'].split(',') if role.strip()]
+        unknown = set(roles) - set(ROLES)
+        if unknown:
+            raise CommandError(f"Unknown roles: {', '.join(sorted(unknown))}")
+        try:
+            landlord = User.objects.get(username=options['landlord'], role='LANDLORD')
+        except User.DoesNotExist:
+            raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        defaults = {
+            'landlord': landlord,
+            'tenant': User.objects.filter(
+                pk__in=Tenant.objects.filter(unit__building__owner=landlord, status='ACTIVE').values('user')
+            ).order_by('pk').first(),
+            'caretaker': User.objects.filter(
+                role='CARETAKER', assigned_complaints__unit__building__owner=landlord
+            ).annotate(assigned=Count('assigned_complaints')).order_by('-assigned', 'pk').first(),
+            'staff': User.objects.filter(is_staff=True, is_active=True).order_by('pk').first(),
+        }
+        users = {}
+        for role in roles:
+            if role != 'landlord' and options[role]:
+                user = User.objects.filter(username=options[role]).first()
+                if user is None:
+                    raise CommandError(f"No user named {options[role]}")
+            else:
+                user = defaults[role]
+            if user is None:
+                self.stdout.write(self.style.WARNING(f'No {role} user found; skipping that role'))
+                continue
+            users[role] = user
+        return users
+
+    def _print(self, result):
+        def number(value, width, digits=1):
+            return f'{"-":>{width}}' if value is None else f'{value:>{width}.{digits}f}'
+
+        self.stdout.write(
+            f"{'endpoint':<44} {'n':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for name, stats in result['endpoints'].items():
+            self.stdout.write(
+                f"{name:<44} {stats['requests']:>5} {stats['errors']:>4} {number(stats['p50_ms'], 8)} "
+                f"{number(stats['p95_ms'], 8)} {number(stats['p99_ms'], 8)} {number(stats['queries_mean'], 8)}"
+            )
+        total = result['total']
+        queries = '' if total['queries_mean'] is None else f", {total['queries_mean']} queries/request"
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['requests']} requests in {total['elapsed_seconds']}s: {total['requests_per_second']} req/s, "
+            f"p50 {total['p50_ms']} ms, p95 {total['p95_ms']} ms, p99 {total['p99_ms']} ms{queries}, "
+            f"{total['errors']} errors"
+        ))
+
+    def _print_comparison(self, rows):
+        self.stdout.write('Against the baseline (before -> now):')
+        for endpoint, changes in rows:
+            changes = ', '.join(f'{metric} {before} -> {now}' for metric, (before, now) in changes.items())
+            self.stdout.write(f"  {endpoint:<44} {changes}")
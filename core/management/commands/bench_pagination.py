@@ -0,0 +1,81 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.pagination import KeysetPagination
+
+
+ENDPOINTS = {
+    'payments': '/api/payments/',
+    'invoices': '/api/invoices/',
+    'complaints': '/api/complaints/',
+    'tenants': '/api/tenants/',
+}
+
+
+class Command(BaseCommand):
+    help = 'Times a list endpoint at page 1 and a deep page, with page-number and cursor pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User to make the requests as')
+        parser.add_argument('--endpoint', choices=ENDPOINTS, default='payments')
+        parser.add_argument('--page', type=int, default=5000, help='Deep page to compare with page 1')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']}")
+        url = ENDPOINTS[options['endpoint']]
+        page_size = options['page_size']
+
+        client = APIClient()
+        client.force_authenticate(user)
+        # localhost is always in ALLOWED_HOSTS while DEBUG is off
+        client.defaults['SERVER_NAME'] = 'localhost'
+
+        deep_cursor = self._cursor_for(client, url, options['page'], page_size)
+        if deep_cursor is None:
+            raise CommandError(f"{url} has fewer than {options['page']} pages of {page_size} for this user")
+
+        runs = [
+            ('page', 1, {'page': 1}),
+            ('page', options['page'], {'page': options['page']}),
+            ('cursor', 1, {'pagination': 'cursor'}),
+            ('cursor', options['page'], {'pagination': 'cursor', 'cursor': deep_cursor}),
+        ]
+        self.stdout.write(f"{url} as {user.username}, {page_size} per page, median of {options['repeat']}")
+        for mode, page, params in runs:
+            timings, queries = [], 0
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url, {**params, 'page_size': page_size})
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{mode} page {page} returned {response.status_code}')
+                queries = len(captured)
+            self.stdout.write(
+                f'  {mode:<6} page {page:>6}: {statistics.median(timings):8.2f} ms  {queries} queries'
+            )
+
+    def _cursor_for(self, client, url, page, page_size):
+        """The cursor a client would hold after paging through page - 1 pages"""
+        response = client.get(url, {'pagination': 'cursor', 'page_size': page_size})
+        view = response.renderer_context['view']
+        offset = (page - 1) * page_size - 1
+        if offset < 0:
+            return ''
+        queryset = view.filter_queryset(view.get_queryset()).order_by(*view.cursor_ordering)
+        last_seen = queryset[offset:offset + 1].first()
+        if last_seen is None:
+            return None
+        paginator = KeysetPagination()
+        paginator.ordering = tuple(view.cursor_ordering)
+        return paginator.cursor_for(last_seen)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.images import SOURCES, backfill
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders the thumbnail and WebP variants of stored images that lack current ones '
+        f"({', '.join(SOURCES)})"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', choices=list(SOURCES),
+            help='Only process this model (repeatable)',
+        )
+        parser.add_argument('--force', action='store_true', help='Render every image again, including failed ones')
+        parser.add_argument(
+            '--workers', type=int, default=settings.BACKGROUND_TASK_WORKERS, help='Images rendered in parallel'
+        )
+
+    def handle(self, *args, **options):
+        counts = backfill(
+            labels=options['model'], force=options['force'], workers=options['workers'], log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {counts['rendered']} images, {counts['failed']} failed, {counts['skipped']} up to date "
+            f"in {counts['elapsed_seconds']}s"
+        ))
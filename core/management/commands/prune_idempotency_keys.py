@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core.idempotency import PRUNE_BATCH_SIZE, prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired Idempotency-Key records (they are also pruned in the background)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = prune_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
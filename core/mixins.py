@@ -0,0 +1,101 @@
+"""
+Reusable viewset behaviour shared by the ELMS apps
+"""
+import json
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import idempotency
+from .queryplans import apply_query_plan
+
+
+class QueryPlanMixin:
+    """
+    Joins and prefetches whatever the serializer is going to read.
+
+    The plan is derived from the serializer's field sources and nested
+    serializers (see core.queryplans) and added in ``filter_queryset``, so
+    list, retrieve and custom actions all run a fixed number of queries
+    instead of one or more per row.
+    """
+
+    def filter_queryset(self, queryset, serializer_class=None):
+        queryset = super().filter_queryset(queryset)
+        return apply_query_plan(queryset, serializer_class or self.get_serializer_class())
+
+
+class PaginatedActionMixin(QueryPlanMixin):
+    """
+    Serves custom list actions through the viewset's filters and paginator.
+
+    The queryset is planned for the serializer the action actually uses, so
+    each page costs the same fixed number of queries however many rows match.
+    """
+
+    def paginated_response(self, queryset, serializer_class=None):
+        """Filter, plan and paginate ``queryset`` and return the serialized page"""
+        serializer_class = serializer_class or self.get_serializer_class()
+        queryset = self.filter_queryset(queryset, serializer_class)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page, many=True, context=context).data)
+        return Response(serializer_class(queryset, many=True, context=context).data)
+
+
+class IdempotentCreateMixin:
+    """
+    Makes ``create`` safe to retry when the client sends an Idempotency-Key header.
+
+    The first request with a key is processed normally and its response is
+    stored; retries with the same key and body get the stored response back
+    (marked with an ``Idempotent-Replayed`` header) instead of creating a
+    second object. Requests without the header are unaffected.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(idempotency.HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > idempotency.MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{idempotency.HEADER} must be at most {idempotency.MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = idempotency.request_hash(request.data)
+        record, claimed = idempotency.claim(request.user, self.basename, key, fingerprint)
+        if not claimed:
+            if record.request_hash != fingerprint:
+                return Response(
+                    {'error': f'{idempotency.HEADER} was already used with a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                record.response_body,
+                status=record.status_code,
+                headers={'Idempotent-Replayed': 'true'}
+            )
+
+        try:
+            # The object and the stored response commit together
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                record.status_code = response.status_code
+                # Store exactly what the client is sent, so replays are identical
+                record.response_body = json.loads(JSONRenderer().render(response.data))
+                record.save(update_fields=['status_code', 'response_body'])
+        except Exception:
+            # Free the key so the client can retry
+            record.delete()
+            raise
+        idempotency.schedule_prune()
+        return response
@@ -0,0 +1,31 @@
+from django.db import models
+from django.conf import settings
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a create request sent with an Idempotency-Key header
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    scope = models.CharField(max_length=50, help_text="Endpoint the key was used on, e.g. 'payment'")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    
+    # Empty while the original request is still being processed
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='unique_idempotency_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status_code or 'pending'})"
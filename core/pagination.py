@@ -0,0 +1,196 @@
+"""
+Keyset (cursor) pagination for high-volume list endpoints
+"""
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _parse_ordering(ordering):
+    """('-payment_date', 'id') -> [('payment_date', True), ('id', False)]"""
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """
+    Q selecting the rows that come after ``values`` in ``ordering``.
+
+    A row comes after the cursor when it is past it on the first field, or
+    equal on the first field and past it on the second, and so on; with an
+    index on the ordering fields the database seeks straight to it.
+    """
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(_parse_ordering(ordering), values):
+        lookup = 'lt' if descending != reverse else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but keeping the microseconds it cuts from datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique, multi-column ordering.
+
+    DRF's CursorPagination positions on the first ordering field only and
+    falls back to an OFFSET for rows that tie on it, so deep pages over a
+    date column still get slower. Here the cursor holds the full key of the
+    last row seen, and every page is a single indexed range scan of
+    ``page_size + 1`` rows no matter how far in it is. The viewset supplies
+    the key as ``cursor_ordering``, which must end in a unique field.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def cursor_for(self, obj, reverse=False):
+        """Opaque cursor positioned just after (or, reversed, before) ``obj``"""
+        values = [getattr(obj, field) for field, _ in _parse_ordering(self.ordering)]
+        payload = json.dumps({'k': values, 'r': int(reverse)}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def encode_cursor(self, obj, reverse=False):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.cursor_for(obj, reverse))
+
+    def decode_cursor(self, request):
+        """Return (values, reverse), or None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = payload['k'], bool(payload['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def cursor_values(self, model, values):
+        """Decoded cursor values as the ordering fields' Python types"""
+        return [
+            model._meta.get_field(field).to_python(value)
+            for (field, _), value in zip(_parse_ordering(self.ordering), values)
+        ]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = tuple(view.cursor_ordering)
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        values, reverse = cursor or (None, False)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            try:
+                values = self.cursor_values(queryset.model, values)
+                queryset = queryset.filter(keyset_filter(self.ordering, values, reverse))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination, with keyset pagination on request.
+
+    Viewsets that set ``cursor_ordering`` switch to ``KeysetPagination``
+    when the client asks for ``?pagination=cursor`` (the links it returns
+    carry that along); everything else, including actions that page through
+    some other model, keeps the usual count/next/previous page-number
+    responses.
+    """
+    mode_query_param = 'pagination'
+    page_size_query_param = KeysetPagination.page_size_query_param
+    max_page_size = KeysetPagination.max_page_size
+
+    def use_cursor(self, queryset, request, view):
+        return (
+            getattr(view, 'cursor_ordering', None) is not None
+            and request.query_params.get(self.mode_query_param) == 'cursor'
+            # Other sequences, such as a tenant statement, only page by number
+            and getattr(queryset, 'model', None) is view.get_queryset().model
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = KeysetPagination() if self.use_cursor(queryset, request, view) else None
+        if self.keyset:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
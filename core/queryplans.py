@@ -0,0 +1,102 @@
+"""
+select_related / prefetch_related derived from what a serializer reads
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+
+
+def _relations(model):
+    """Relation fields of ``model`` keyed by the attribute name serializers use"""
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        name = field.name if field.concrete else field.get_accessor_name()
+        relations[name] = field
+    return relations
+
+
+def _is_back_reference(field, previous):
+    """True when ``field`` leads straight back along the relation just followed"""
+    return previous is not None and previous.remote_field is field
+
+
+def _follow(model, attrs, path, plan):
+    """
+    Walk ``attrs`` from ``model`` and record the joins they need in ``plan``.
+
+    ``path`` is the list of (lookup, many, field) steps already taken. Steps
+    through single-valued relations are joined with select_related until the
+    first many-valued one; everything from there on is prefetched. A step
+    straight back to the object just left (``receipt.payment`` on a payment)
+    is already cached by Django, so it pops the path instead of adding a join.
+    Returns the model and path reached, or None where the walk leaves the
+    relations (a plain field, a method or a property).
+    """
+    for attr in attrs:
+        field = _relations(model).get(attr)
+        if field is None:
+            return None
+        if path and _is_back_reference(field, path[-1][2]):
+            path = path[:-1]
+        else:
+            many = field.one_to_many or field.many_to_many
+            path = path + [(attr, many or any(step[1] for step in path), field)]
+            lookup = '__'.join(step[0] for step in path)
+            plan['prefetch_related' if path[-1][1] else 'select_related'].add(lookup)
+        model = field.related_model
+    return model, path
+
+
+def _walk(serializer, model, path, plan):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        attrs = field.source.split('.')
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        elif isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        elif isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization():
+            # A primary key comes from the <name>_id column of the object holding it
+            attrs = attrs[:-1]
+
+        if isinstance(field, serializers.BaseSerializer):
+            reached = _follow(model, attrs, path, plan)
+            if reached:
+                _walk(field, *reached, plan)
+        else:
+            _follow(model, attrs, path, plan)
+
+    meta = getattr(serializer, 'Meta', None)
+    # Serializers can name what their SerializerMethodFields read
+    for kind in ('select_related', 'prefetch_related'):
+        for lookup in getattr(meta, kind, ()):
+            _follow(model, lookup.split('__'), path, plan)
+
+
+@lru_cache(maxsize=None)
+def query_plan(serializer_class):
+    """(select_related, prefetch_related) lookups that ``serializer_class`` needs"""
+    plan = {'select_related': set(), 'prefetch_related': set()}
+    _walk(serializer_class(), serializer_class.Meta.model, [], plan)
+    # A join already implied by a longer one adds nothing
+    select = {
+        lookup for lookup in plan['select_related']
+        if not any(other.startswith(lookup + '__') for other in plan['select_related'])
+    }
+    return tuple(sorted(select)), tuple(sorted(plan['prefetch_related']))
+
+
+def apply_query_plan(queryset, serializer_class):
+    """Add the joins and prefetches ``serializer_class`` needs to a queryset of its model"""
+    meta = getattr(serializer_class, 'Meta', None)
+    if getattr(meta, 'model', None) is not queryset.model:
+        return queryset
+    select_related, prefetch_related = query_plan(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
@@ -0,0 +1,363 @@
+"""
+Synthetic portfolio generator for load and scale testing.
+
+Rows are written with bulk_create, so the per-row save() overrides
+(Tenant.save setting the unit status and active tenant, Unit.save keeping
+the property's unit counters, Invoice.save totals, Payment.save balance maintenance and
+the rollup hooks) never run, and neither do the search index signals.
+The generator computes those fields itself and rebuilds the monthly
+rollups and the search index at the end.
+"""
+import random
+import string
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from finance import rollups
+from finance.billing import DEFAULT_DUE_DAY
+from finance.models import Invoice, Payment, Receipt
+from finance.sequences import INVOICE_PREFIX, RECEIPT_PREFIX, allocate
+from maintenance.models import Complaint
+from properties.models import Property, Unit
+from search import index as search_index
+from tenants.models import Tenant
+
+
+LANDLORDS_PER_SCALE = 5
+LANDLORDS_PER_BATCH = 10
+DEFAULT_MONTHS = 12
+DEFAULT_SEED = 20240101
+
+PROPERTIES_PER_LANDLORD = (1, 6)
+# Units per property are log-normal: mostly small blocks, a few large estates
+UNITS_MEDIAN_LOG, UNITS_SIGMA = 3.0, 0.6
+UNITS_RANGE = (2, 200)
+RENT_RANGE = (8000, 60000)
+OCCUPANCY = 0.9
+PREVIOUS_TENANCY = 0.25
+
+# How an invoice ends up: (weight, share of the total paid, number of payments)
+PAYMENT_OUTCOMES = [
+    (70, 1, 1),
+    (12, 1, 2),
+    (10, 0.5, 1),
+    (8, 0, 0),
+]
+METHOD_WEIGHTS = {'MOBILE_MONEY': 60, 'BANK_TRANSFER': 20, 'CASH': 12, 'CHEQUE': 5, 'CARD': 3}
+COMPLAINTS_PER_TENANCY_MONTH = 0.06
+CATEGORY_WEIGHTS = {
+    'PLUMBING': 30, 'ELECTRICAL': 20, 'APPLIANCE': 15, 'STRUCTURAL': 8,
+    'CLEANING': 10, 'SECURITY': 7, 'OTHER': 10,
+}
+PRIORITY_WEIGHTS = {'LOW': 30, 'MEDIUM': 45, 'HIGH': 18, 'URGENT': 7}
+
+FIRST_NAMES = [
+    'Achieng', 'Amani', 'Baraka', 'Chebet', 'Faith', 'Grace', 'Hassan', 'Imani', 'Jabari', 'Juma',
+    'Kamau', 'Kendi', 'Makena', 'Mwangi', 'Njeri', 'Otieno', 'Wanjiru', 'Wekesa', 'Zawadi', 'Zuri',
+]
+LAST_NAMES = [
+    'Atieno', 'Chege', 'Kariuki', 'Kiprop', 'Maina', 'Mutua', 'Njoroge', 'Ochieng', 'Odhiambo', 'Omondi',
+    'Onyango', 'Wafula', 'Waweru', 'Kilonzo', 'Mbugua', 'Nyambura', 'Rotich', 'Koech', 'Muthoni', 'Barasa',
+]
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika']
+STREETS = ['Ngong Road', 'Moi Avenue', 'Kenyatta Avenue', 'Oginga Odinga Street', 'Waiyaki Way', 'Mombasa Road']
+COMPLAINT_TITLES = {
+    'PLUMBING': 'Leaking pipe', 'ELECTRICAL': 'Power socket not working', 'APPLIANCE': 'Cooker broken',
+    'STRUCTURAL': 'Crack in wall', 'CLEANING': 'Stairwell needs cleaning', 'SECURITY': 'Gate lock faulty',
+    'OTHER': 'General repair',
+}
+
+
+def _month_add(month, count):
+    year, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + year, index + 1, 1)
+
+
+def _aware(day, hour=9):
+    return timezone.make_aware(datetime.combine(day, dt_time(hour)))
+
+
+def _pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create keep the auto_now / auto_now_add values set on objects,
+    so seeded rows carry historic dates instead of the time of the run.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class PortfolioGenerator:
+    """
+    Generates landlords with their properties, units, tenancies, invoices,
+    payments, receipts and complaints.
+
+    Everything random comes from one ``random.Random(seed)``, so the same
+    arguments always produce the same portfolio. Landlords are written in
+    batches of LANDLORDS_PER_BATCH, one transaction each, which keeps memory
+    flat however large ``scale`` is.
+    """
+
+    def __init__(self, scale=1, months=DEFAULT_MONTHS, seed=DEFAULT_SEED, prefix='seed',
+                 end=None, batch_size=2000, log=None):
+        self.rng = random.Random(seed)
+        self.landlords = max(1, round(scale * LANDLORDS_PER_SCALE))
+        self.months = months
+        self.prefix = prefix
+        self.end = (end or timezone.localdate()).replace(day=1)
+        self.start = _month_add(self.end, 1 - months)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.password = make_password(None)
+        self.counts = defaultdict(int)
+        self.user_number = 0
+
+    def run(self):
+        started = time.perf_counter()
+        for first in range(0, self.landlords, LANDLORDS_PER_BATCH):
+            count = min(LANDLORDS_PER_BATCH, self.landlords - first)
+            with transaction.atomic(), explicit_timestamps(Invoice, Payment, Receipt, Complaint):
+                self._batch(count)
+            self.log(
+                f"{first + count}/{self.landlords} landlords, {self.counts['invoices']} invoices "
+                f"({time.perf_counter() - started:.1f}s)"
+            )
+        self.counts['rollups'] = rollups.rebuild(batch_size=self.batch_size)['created']
+        indexed = search_index.rebuild(batch_size=self.batch_size)
+        self.counts['search_documents'] = sum(count for kind, count in indexed.items() if kind != 'elapsed_seconds')
+        self.counts['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return dict(self.counts)
+
+    def _bulk(self, model, objects, name):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[name] += len(created)
+        return created
+
+    def _user(self, role):
+        self.user_number += 1
+        first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+        return get_user_model()(
+            username=f'{self.prefix}-{role.lower()}-{self.user_number}', password=self.password, role=role,
+            first_name=first_name, last_name=last_name,
+            email=f'{first_name}.{last_name}.{self.user_number}@example.com'.lower(),
+            phone=f'07{self.rng.randrange(10 ** 8):08d}',
+        )
+
+    def _batch(self, landlord_count):
+        rng = self.rng
+        User = get_user_model()
+        landlords = self._bulk(User, [self._user('LANDLORD') for _ in range(landlord_count)], 'landlords')
+        caretakers = self._bulk(User, [self._user('CARETAKER') for _ in range(landlord_count)], 'caretakers')
+        caretaker_of = {landlord.pk: caretaker for landlord, caretaker in zip(landlords, caretakers)}
+
+        # Properties with their units' occupancy, and so their counters, decided up front
+        buildings, lets = [], []
+        for landlord in landlords:
+            for _ in range(rng.randint(*PROPERTIES_PER_LANDLORD)):
+                size = int(min(max(rng.lognormvariate(UNITS_MEDIAN_LOG, UNITS_SIGMA), UNITS_RANGE[0]), UNITS_RANGE[1]))
+                let = [rng.random() < OCCUPANCY for _ in range(size)]
+                city = rng.choice(CITIES)
+                buildings.append(Property(
+                    name=f'{rng.choice(LAST_NAMES)} {rng.choice(["Court", "Apartments", "Heights", "Gardens"])}',
+                    property_type=rng.choice(['APARTMENT', 'APARTMENT', 'APARTMENT', 'MIXED', 'COMMERCIAL']),
+                    address=f'{rng.randint(1, 400)} {rng.choice(STREETS)}', city=city,
+                    owner=landlord, total_units=size, occupied_units=sum(let), vacant_units=size - sum(let),
+                ))
+                lets.append(let)
+        buildings = self._bulk(Property, buildings, 'properties')
+
+        # Units, and which of them are let; a let unit may have had an earlier tenant
+        units, plans = [], []
+        for building, let in zip(buildings, lets):
+            base_rent = rng.randrange(*RENT_RANGE, 500)
+            for number, occupied in enumerate(let, 1):
+                bedrooms = rng.choice([1, 1, 2, 2, 3])
+                unit = Unit(
+                    building=building, unit_number=f'{(number - 1) // 10 + 1}{(number - 1) % 10 + 1:02d}',
+                    floor=(number - 1) // 10, bedrooms=bedrooms, bathrooms=rng.choice([1, 1, 2]),
+                    size_sqft=Decimal(300 + 250 * bedrooms + rng.randrange(-50, 151, 10)),
+                    rent_amount=Decimal(base_rent + rng.randrange(-2000, 2001, 500)),
+                    status='OCCUPIED' if occupied else 'VACANT',
+                )
+                unit.deposit_amount = unit.rent_amount
+                units.append(unit)
+                plans.append(self._tenancy_plan(occupied))
+        units = self._bulk(Unit, units, 'units')
+
+        tenancies = []
+        for unit, plan in zip(units, plans):
+            for move_in, move_out in plan:
+                tenancies.append((unit, move_in, move_out))
+        users = self._bulk(User, [self._user('TENANT') for _ in tenancies], 'tenant_users')
+        tenants = self._bulk(Tenant, [
+            Tenant(
+                user=user, unit=unit, move_in_date=move_in, move_out_date=move_out,
+                status='VACATED' if move_out else 'ACTIVE', deposit_paid=unit.rent_amount,
+                lease_duration_months=rng.choice([6, 12, 12, 24]),
+            )
+            for user, (unit, move_in, move_out) in zip(users, tenancies)
+        ], 'tenancies')
+        let = []
+        for tenant in tenants:
+            if tenant.status == 'ACTIVE':
+                tenant.unit.active_tenant = tenant
+                let.append(tenant.unit)
+        Unit.objects.bulk_update(let, ['active_tenant'], batch_size=self.batch_size)
+        landlord_of = {building.pk: building.owner for building in buildings}
+
+        invoices, payment_plans = self._invoices(tenants)
+        invoices = self._bulk(Invoice, invoices, 'invoices')
+        payments = self._payments(invoices, payment_plans, landlord_of)
+        payments = self._bulk(Payment, payments, 'payments')
+        self._bulk(Receipt, self._receipts(payments), 'receipts')
+        self._bulk(Complaint, self._complaints(tenants, caretaker_of), 'complaints')
+
+    def _tenancy_plan(self, occupied):
+        """(move_in, move_out) pairs for one unit, oldest first"""
+        rng = self.rng
+        window = (self.end - self.start).days + 28
+        plan = []
+        if rng.random() < PREVIOUS_TENANCY or not occupied:
+            if rng.random() < PREVIOUS_TENANCY:
+                move_in = self.start - timedelta(days=rng.randrange(30, 720))
+                move_out = self.start + timedelta(days=rng.randrange(0, window // 2))
+                plan.append((move_in, move_out))
+        if occupied:
+            if plan:
+                move_in = plan[-1][1] + timedelta(days=rng.randrange(7, 60))
+            else:
+                move_in = self.start - timedelta(days=rng.randrange(-window // 2, 1500))
+            plan.append((min(move_in, self.end), None))
+        return plan
+
+    def _invoices(self, tenants):
+        rng = self.rng
+        invoices, payment_plans, periods = [], [], defaultdict(list)
+        today = timezone.localdate()
+        for tenant in tenants:
+            month = max(tenant.move_in_date.replace(day=1), self.start)
+            last = min(tenant.move_out_date.replace(day=1), self.end) if tenant.move_out_date else self.end
+            while month <= last:
+                water = Decimal(rng.randrange(300, 1500, 50))
+                electricity = Decimal(rng.randrange(0, 3000, 50)) if rng.random() < 0.4 else Decimal('0')
+                total = tenant.unit.rent_amount + water + electricity
+                _, share, count = rng.choices(PAYMENT_OUTCOMES, weights=[o[0] for o in PAYMENT_OUTCOMES])[0]
+                # The current month is usually still open
+                if month == self.end and rng.random() < 0.6:
+                    share, count = 0, 0
+                paid = (total * Decimal(str(share))).quantize(Decimal('1'))
+                due_date = month.replace(day=DEFAULT_DUE_DAY)
+                if paid >= total:
+                    status = 'PAID'
+                elif due_date < today:
+                    status = 'OVERDUE'
+                else:
+                    status = 'PENDING'
+                invoice = Invoice(
+                    tenant=tenant, month=month, due_date=due_date,
+                    rent_amount=tenant.unit.rent_amount, water_bill=water, electricity_bill=electricity,
+                    subtotal=total, total_amount=total, amount_paid=paid, balance=total - paid, status=status,
+                    created_at=_aware(month), updated_at=_aware(month),
+                )
+                invoices.append(invoice)
+                payment_plans.append((paid, count))
+                periods[month.strftime('%Y%m')].append(invoice)
+                month = _month_add(month, 1)
+        # Numbers come from the real sequences, so invoices created later do not collide
+        for period, batch in periods.items():
+            for invoice, number in zip(batch, allocate(INVOICE_PREFIX, period, len(batch))):
+                invoice.invoice_number = number
+        return invoices, payment_plans
+
+    def _payments(self, invoices, payment_plans, landlord_of):
+        rng = self.rng
+        today = timezone.localdate()
+        payments = []
+        for invoice, (paid, count) in zip(invoices, payment_plans):
+            if not count:
+                continue
+            parts = [paid] if count == 1 else [(paid / 2).quantize(Decimal('1')), paid - (paid / 2).quantize(Decimal('1'))]
+            method = _pick(rng, METHOD_WEIGHTS)
+            for part in parts:
+                paid_on = min(invoice.due_date + timedelta(days=rng.randint(-6, 12)), today)
+                reference = None
+                if method != 'CASH':
+                    reference = ''.join(rng.choices(string.ascii_uppercase + string.digits, k=10))
+                payments.append(Payment(
+                    tenant=invoice.tenant, invoice=invoice, amount=part, payment_method=method,
+                    payment_date=paid_on, transaction_reference=reference, status='COMPLETED',
+                    recorded_by=landlord_of[invoice.tenant.unit.building_id],
+                    created_at=_aware(paid_on, 10), updated_at=_aware(paid_on, 10),
+                ))
+        return payments
+
+    def _receipts(self, payments):
+        by_day = defaultdict(list)
+        for payment in payments:
+            by_day[payment.payment_date].append(payment)
+        receipts = []
+        for day, batch in by_day.items():
+            numbers = allocate(RECEIPT_PREFIX, day.strftime('%Y%m%d'), len(batch), width=6)
+            receipts += [
+                Receipt(payment=payment, receipt_number=number, generated_at=_aware(day, 10))
+                for payment, number in zip(batch, numbers)
+            ]
+        return receipts
+
+    def _complaints(self, tenants, caretaker_of):
+        rng = self.rng
+        today = timezone.localdate()
+        complaints = []
+        for tenant in tenants:
+            first = max(tenant.move_in_date, self.start)
+            last = min(tenant.move_out_date or today, today)
+            months = max((last - first).days // 30, 0)
+            for _ in range(sum(rng.random() < COMPLAINTS_PER_TENANCY_MONTH for _ in range(months))):
+                submitted = _aware(first + timedelta(days=rng.randrange(max((last - first).days, 1))), rng.randint(7, 20))
+                age = (timezone.now() - submitted).days
+                category = _pick(rng, CATEGORY_WEIGHTS)
+                if age > 30:
+                    status = rng.choice(['RESOLVED', 'CLOSED', 'CLOSED', 'CANCELLED'])
+                elif age > 7:
+                    status = rng.choice(['IN_PROGRESS', 'RESOLVED'])
+                else:
+                    status = rng.choice(['SUBMITTED', 'IN_PROGRESS'])
+                assigned = status != 'SUBMITTED'
+                complaint = Complaint(
+                    tenant=tenant, unit=tenant.unit, title=COMPLAINT_TITLES[category],
+                    description=f'{COMPLAINT_TITLES[category]} in unit {tenant.unit.unit_number}.',
+                    category=category, priority=_pick(rng, PRIORITY_WEIGHTS), status=status,
+                    assigned_to=caretaker_of[tenant.unit.building.owner_id] if assigned else None,
+                    submitted_at=submitted, updated_at=submitted,
+                    started_at=submitted + timedelta(days=1) if assigned else None,
+                )
+                if status in ('RESOLVED', 'CLOSED'):
+                    complaint.resolved_at = submitted + timedelta(days=rng.randint(1, 14))
+                    complaint.actual_cost = Decimal(rng.randrange(500, 20000, 250))
+                    complaint.updated_at = complaint.resolved_at
+                if status == 'CLOSED':
+                    complaint.closed_at = complaint.resolved_at + timedelta(days=rng.randint(0, 5))
+                complaints.append(complaint)
+        return complaints
@@ -0,0 +1,20 @@
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from .images import VARIANTS
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    URLs of an image's thumbnail and WebP variants (see core/images.py),
+    keyed thumb, thumb_webp, medium and medium_webp; empty until rendered
+    """
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for name in VARIANTS:
+            if (value or {}).get(name):
+                url = default_storage.url(value[name])
+                urls[name] = request.build_absolute_uri(url) if request is not None else url
+        return urls
@@ -0,0 +1,248 @@
+"""
+Shared fixtures for the API query-budget tests.
+
+Each app's tests.py lists its endpoints with the most queries one request
+may run, per role. ``QueryBudgetTestCase`` calls every endpoint on a seeded
+portfolio, triples the data and calls it again: the count has to stay
+within budget and must not change, so an N+1 shows up even when a budget
+is set too loose. Failures print the SQL grouped by the code that ran it.
+"""
+import os
+import sys
+import traceback
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from finance.models import Invoice, LateFeePolicy, Payment, Receipt
+from maintenance.models import Complaint, ComplaintImage
+from properties.models import Property, Unit
+from tenants.models import Tenant, TenantDocument
+
+
+User = get_user_model()
+
+ROLES = ('landlord', 'tenant', 'caretaker', 'staff')
+UNITS_PER_PROPERTY = 2
+MONTHS_PER_TENANCY = 2
+FIRST_MONTH = date(2026, 1, 1)
+
+
+def create_users():
+    """One user per role the API distinguishes"""
+    return {
+        'landlord': User.objects.create_user('qb-landlord', role='LANDLORD'),
+        'tenant': User.objects.create_user(
+            'qb-tenant', role='TENANT', first_name='Terry', last_name='Tenant', phone='0700000000'
+        ),
+        'caretaker': User.objects.create_user('qb-caretaker', role='CARETAKER'),
+        'staff': User.objects.create_user('qb-staff', role='ADMIN', is_staff=True),
+    }
+
+
+def _month(index):
+    year, month = divmod(FIRST_MONTH.month - 1 + index, 12)
+    return date(FIRST_MONTH.year + year, month + 1, 1)
+
+
+def _tenancy(users, unit, tenant_user, tag):
+    """A tenant in ``unit`` with invoices, payments, a document and a complaint"""
+    tenant = Tenant.objects.create(user=tenant_user, unit=unit, move_in_date=FIRST_MONTH)
+    TenantDocument.objects.create(tenant=tenant, document_type='ID', document_file=f'tenant_documents/{tag}.pdf')
+    for index in range(MONTHS_PER_TENANCY):
+        month = _month(index)
+        invoice = Invoice.objects.create(
+            tenant=tenant, invoice_number=f'{tag}-INV-{index}', month=month, due_date=month + timedelta(days=4),
+            rent_amount=unit.rent_amount, total_amount=unit.rent_amount,
+        )
+        # One payment against the invoice, one left for allocation
+        for suffix, linked in (('L', invoice), ('U', None)):
+            payment = Payment.objects.create(
+                tenant=tenant, invoice=linked, amount=unit.rent_amount / 2, payment_method='MOBILE_MONEY',
+                payment_date=month + timedelta(days=2), transaction_reference=f'{tag}-{index}{suffix}',
+                recorded_by=users['landlord'],
+            )
+            Receipt.objects.create(payment=payment, receipt_number=f'{tag}-RCP-{index}{suffix}')
+    complaint = Complaint.objects.create(
+        tenant=tenant, unit=unit, title=f'Leak {tag}', description='Dripping tap',
+        category='PLUMBING', priority='URGENT', assigned_to=users['caretaker'],
+    )
+    ComplaintImage.objects.create(complaint=complaint, image=f'complaint_images/{tag}.jpg')
+    return tenant
+
+
+def _units(users, building, count, tag, role_tenant=False):
+    """``count`` let units plus one vacant one; returns the first tenant"""
+    first = None
+    for index in range(count):
+        unit = Unit.objects.create(
+            building=building, unit_number=f'{tag}-{index}', rent_amount=Decimal('10000') + index * 1000
+        )
+        if role_tenant and index == 0:
+            tenant_user = users['tenant']
+        else:
+            tenant_user = User.objects.create_user(f'qb-{tag}-{index}', role='TENANT')
+        tenant = _tenancy(users, unit, tenant_user, f'{tag}-{index}')
+        first = first or tenant
+    Unit.objects.create(building=building, unit_number=f'{tag}-vacant', rent_amount=Decimal('9000'))
+    return first
+
+
+def seed_portfolio(users, scale=1, tag='s1', extend=None):
+    """
+    Add ``scale`` properties for the landlord, mostly let.
+
+    The role tenant takes the first unit of every batch, so their own lists
+    grow with the portfolio too. Call again with another ``tag`` to add
+    more rows for the same users; ``extend`` is an existing property that
+    gets more units as well, so per-property lists grow. Returns the
+    objects detail URLs point at.
+    """
+    first = {}
+    for number in range(scale):
+        building = Property.objects.create(
+            name=f'Block {tag}-{number}', address='1 Test Road', city='Nairobi', owner=users['landlord']
+        )
+        LateFeePolicy.objects.create(building=building, value=Decimal('500'))
+        tenant = _units(users, building, UNITS_PER_PROPERTY, f'{tag}-{number}', role_tenant=number == 0)
+        first = first or {'property': building, 'unit': tenant.unit, 'tenant': tenant}
+        if extend is not None:
+            _units(users, extend, UNITS_PER_PROPERTY, f'{tag}-{number}-extra')
+
+    invoice = first['tenant'].invoices.order_by('month').first()
+    payment = first['tenant'].payments.order_by('pk').first()
+    return {
+        **first,
+        'invoice': invoice,
+        'payment': payment,
+        'receipt': payment.receipt,
+        'document': first['tenant'].documents.first(),
+        'complaint': first['tenant'].complaints.first(),
+        'image': ComplaintImage.objects.filter(complaint__tenant=first['tenant']).first(),
+        'policy': first['property'].late_fee_policy,
+    }
+
+
+def _frame_label(frame, root):
+    path = os.path.relpath(frame.filename, root)
+    return f'{path}:{frame.lineno} in {frame.name}'
+
+
+def _call_site():
+    """
+    Where a query came from: the innermost frame in this project, plus the
+    library frame that actually touched the database when that differs
+    (a serializer field reading a relation, say).
+    """
+    base_dir = str(settings.BASE_DIR)
+    frames = traceback.extract_stack()[:-3]
+    library = None
+    for frame in reversed(frames):
+        path = frame.filename
+        in_project = path.startswith(base_dir) and 'site-packages' not in path
+        if in_project and not path.endswith(('core/testing.py', 'tests.py')):
+            site = _frame_label(frame, base_dir)
+            return f'{site} (via {library})' if library else site
+        if library is None and not in_project and f'{os.sep}django{os.sep}db{os.sep}' not in path:
+            root = next((p for p in sys.path if p and path.startswith(p)), os.path.dirname(path))
+            library = _frame_label(frame, root)
+    return library or '<unknown>'
+
+
+class QueryLog:
+    """Database execute wrapper recording each statement with its call site"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((_call_site(), sql))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def report(self):
+        """The statements grouped by call site, busiest first"""
+        sites = defaultdict(list)
+        for site, sql in self.queries:
+            sites[site].append(sql)
+        lines = []
+        for site, statements in sorted(sites.items(), key=lambda item: -len(item[1])):
+            lines.append(f'  {len(statements)} x {site}')
+            for sql in dict.fromkeys(statements):
+                lines.append(f'      {sql[:300]}')
+        return '\n'.join(lines)
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class for per-app query budget tests.
+
+    Subclasses set ``endpoints``: role -> list of (url, budget). URLs may use
+    the keys returned by ``seed_portfolio`` as format fields, e.g.
+    ``/api/tenants/{tenant.pk}/``.
+    """
+    endpoints = {}
+    growth_scale = 2
+
+    def test_landlord(self):
+        self.assertQueryBudget({'landlord': self.endpoints.get('landlord', [])})
+
+    def test_tenant(self):
+        self.assertQueryBudget({'tenant': self.endpoints.get('tenant', [])})
+
+    def test_caretaker(self):
+        self.assertQueryBudget({'caretaker': self.endpoints.get('caretaker', [])})
+
+    def test_staff(self):
+        self.assertQueryBudget({'staff': self.endpoints.get('staff', [])})
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users()
+        cls.objects = seed_portfolio(cls.users)
+
+    def measure(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        log = QueryLog()
+        with connection.execute_wrapper(log):
+            response = client.get(url)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        self.assertEqual(
+            response.status_code, 200, f'GET {url} returned {response.status_code}: {getattr(response, "data", "")}'
+        )
+        return log
+
+    def assertQueryBudget(self, endpoints):
+        """
+        Every (url, budget) in ``endpoints`` (role -> list) stays within
+        budget and runs the same number of queries once the data triples.
+        """
+        calls = [
+            (role, url.format(**self.objects), budget)
+            for role, role_endpoints in endpoints.items() for url, budget in role_endpoints
+        ]
+        # The first call warms per-object caches such as rendered documents
+        for role, url, _ in calls:
+            self.measure(self.users[role], url)
+        before = {(role, url): len(self.measure(self.users[role], url)) for role, url, _ in calls}
+        seed_portfolio(self.users, scale=self.growth_scale, tag='s2', extend=self.objects['property'])
+
+        for role, url, budget in calls:
+            with self.subTest(role=role, url=url):
+                self.measure(self.users[role], url)
+                log = self.measure(self.users[role], url)
+                if len(log) > budget or len(log) != before[role, url]:
+                    self.fail(
+                        f'GET {url} as {role} ran {len(log)} queries at scale {1 + self.growth_scale} '
+                        f'({before[role, url]} at scale 1, budget {budget}):\n{log.report()}'
+                    )
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image
+from rest_framework.test import APIClient
+
+from maintenance.models import ComplaintImage
+from properties.models import Property
+from . import images, testing
+
+
+def upload(name='photo.jpg', size=(2000, 1500)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageVariantTests(TestCase):
+    """
+    Thumbnail/WebP rendering after uploads, and the backfill
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = self.settings(MEDIA_ROOT=media, BACKGROUND_TASKS_EAGER=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def create_property(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            building = Property.objects.create(
+                name='Court', address='1 Test Road', city='Nairobi', owner=self.users['landlord'], **fields
+            )
+        building.refresh_from_db()
+        return building
+
+    def test_upload_renders_variants(self):
+        variants = self.create_property(image=upload()).image_variants
+        self.assertEqual(set(variants) - {'source'}, set(images.VARIANTS))
+        with default_storage.open(variants['thumb']) as file, Image.open(file) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('JPEG', (320, 320)))
+        with default_storage.open(variants['medium_webp']) as file, Image.open(file) as medium:
+            self.assertEqual((medium.format, medium.size), ('WEBP', (1024, 768)))
+
+    def test_new_upload_replaces_variants(self):
+        building = self.create_property(image=upload())
+        old = images.variant_names(building.image_variants)
+        with self.captureOnCommitCallbacks(execute=True):
+            building.image = upload('second.jpg', size=(400, 300))
+            building.save()
+        building.refresh_from_db()
+        self.assertEqual(building.image_variants['source'], building.image.name)
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            building.image = None
+            building.save()
+        building.refresh_from_db()
+        self.assertEqual(building.image_variants, {})
+
+    def test_unreadable_image_is_recorded_once(self):
+        with self.assertLogs('core.images', 'WARNING'):
+            building = self.create_property(image='properties/missing.jpg')
+        self.assertIn('error', building.image_variants)
+        with self.captureOnCommitCallbacks() as callbacks:
+            building.save()
+        self.assertEqual(callbacks, [])
+
+    def test_list_serializers_return_urls(self):
+        self.create_property(image=upload())
+        client = APIClient()
+        client.force_authenticate(self.users['landlord'])
+        result = client.get('/api/properties/').data['results'][0]
+        self.assertTrue(result['image_variants']['thumb_webp'].startswith('http://testserver/media/derivatives/'))
+
+    def test_backfill(self):
+        building = self.create_property()
+        name = default_storage.save('properties/old.jpg', upload())
+        # Written without signals, as media that predates the pipeline
+        Property.objects.filter(pk=building.pk).update(image=name)
+        counts = images.backfill(labels=['properties.Property'], workers=1)
+        self.assertEqual((counts['rendered'], counts['failed']), (1, 0))
+        building.refresh_from_db()
+        self.assertTrue(os.path.basename(building.image_variants['thumb']).startswith('old.thumb'))
+        self.assertEqual(images.backfill(labels=['properties.Property'], workers=1)['rendered'], 0)
+
+    def test_deleting_removes_variants(self):
+        tenant = testing.seed_portfolio(self.users)['tenant']
+        complaint = tenant.complaints.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ComplaintImage.objects.create(complaint=complaint, image=upload())
+        image.refresh_from_db()
+        names = images.variant_names(image.image_variants)
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in names))
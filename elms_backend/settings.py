@@ -7,6 +7,7 @@ Generated by 'django-admin startproject' using Django 5.2.1.
 from pathlib import Path
 import os
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,11 +35,13 @@ INSTALLED_APPS = [
     'corsheaders',
     
     # Local apps
+    'core',
     'users',
     'properties',
     'tenants',
     'finance',
     'maintenance',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -77,6 +80,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock up front so concurrent writers wait instead of failing
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -107,6 +115,8 @@ AUTH_USER_MODEL = 'users.User'
 
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # REST Framework Settings
 REST_FRAMEWORK = {
@@ -116,7 +126,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -131,3 +141,22 @@ SIMPLE_JWT = {
 # Media Files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Background tasks (see elms_backend/tasks.py)
+BACKGROUND_TASK_WORKERS = int(os.environ.get('BACKGROUND_TASK_WORKERS', 4))
+BACKGROUND_TASKS_EAGER = False
+
+# Mobile money (M-Pesa C2B style) payment callbacks
+MOBILE_MONEY_CALLBACK_SECRET = os.environ.get('MOBILE_MONEY_CALLBACK_SECRET', '')
+
+# Seconds a cached arrears aging report is served before it is recomputed
+AGING_REPORT_CACHE_TIMEOUT = int(os.environ.get('AGING_REPORT_CACHE_TIMEOUT', 300))
+
+# Seconds anonymous vacancy searches are served from the cache
+VACANCY_SEARCH_CACHE_TIMEOUT = int(os.environ.get('VACANCY_SEARCH_CACHE_TIMEOUT', 60))
+
+# Idempotency-Key handling on create endpoints (see core/idempotency.py)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+# A key still marked in progress after this many seconds is assumed abandoned
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_PRUNE_INTERVAL = 15 * 60
@@ -0,0 +1,46 @@
+"""
+Small in-process background task runner.
+
+Work that should not hold up a request (receipts, cache warming, pruning) is
+handed to a shared thread pool. Each task gets its own database connection,
+which is closed when the task finishes. Set BACKGROUND_TASKS_EAGER to run tasks
+inline, e.g. in tests.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 4),
+                thread_name_prefix='elms-task',
+            )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+    finally:
+        connection.close()
+
+
+def submit(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` off the request path"""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        return func(*args, **kwargs)
+    return _get_executor().submit(_run, func, args, kwargs)
@@ -30,6 +30,7 @@ urlpatterns = [
     path('api/', include('tenants.urls')),
     path('api/', include('finance.urls')),
     path('api/', include('maintenance.urls')),
+    path('api/search/', include('search.urls')),
 ]
 
 # Serve media files in development
@@ -1,5 +1,22 @@
 from django.contrib import admin
-from .models import Invoice, Payment, Receipt
+from .models import (
+    Invoice,
+    Payment,
+    Receipt,
+    DocumentSequence,
+    PaymentAllocation,
+    MobileMoneyCallback,
+    LateFeePolicy,
+    InvoiceLineItem,
+    MonthlyRollup,
+    RenderedDocument,
+)
+
+
+class InvoiceLineItemInline(admin.TabularInline):
+    model = InvoiceLineItem
+    extra = 0
+    readonly_fields = ('created_at',)
 
 
 @admin.register(Invoice)
@@ -9,6 +26,7 @@ class InvoiceAdmin(admin.ModelAdmin):
     search_fields = ('invoice_number', 'tenant__user__username', 'tenant__user__first_name')
     readonly_fields = ('subtotal', 'balance', 'created_at', 'updated_at')
     date_hierarchy = 'month'
+    inlines = [InvoiceLineItemInline]
 
 
 @admin.register(Payment)
@@ -25,3 +43,50 @@ class ReceiptAdmin(admin.ModelAdmin):
     list_display = ('receipt_number', 'payment', 'generated_at')
     search_fields = ('receipt_number', 'payment__tenant__user__username')
     readonly_fields = ('generated_at',)
+
+
+@admin.register(PaymentAllocation)
+class PaymentAllocationAdmin(admin.ModelAdmin):
+    list_display = ('payment', 'invoice', 'amount', 'created_at')
+    search_fields = ('invoice__invoice_number', 'payment__transaction_reference')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(MobileMoneyCallback)
+class MobileMoneyCallbackAdmin(admin.ModelAdmin):
+    list_display = ('transaction_id', 'provider', 'amount', 'phone', 'account_reference', 'status', 'received_at')
+    list_filter = ('provider', 'status', 'received_at')
+    search_fields = ('transaction_id', 'phone', 'account_reference')
+    readonly_fields = ('payload', 'payment', 'received_at', 'processed_at')
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'period', 'last_value', 'updated_at')
+    list_filter = ('prefix',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(LateFeePolicy)
+class LateFeePolicyAdmin(admin.ModelAdmin):
+    list_display = ('building', 'fee_type', 'value', 'cap', 'grace_days', 'is_active')
+    list_filter = ('fee_type', 'is_active')
+    search_fields = ('building__name',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ('building', 'month', 'kind', 'payment_method', 'status', 'count', 'invoiced', 'collected', 'outstanding')
+    list_filter = ('kind', 'status', 'payment_method')
+    search_fields = ('building__name',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(RenderedDocument)
+class RenderedDocumentAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'output', 'content_hash', 'rendered_at')
+    list_filter = ('kind', 'output')
+    search_fields = ('content_hash',)
+    exclude = ('content',)
+    readonly_fields = ('kind', 'object_id', 'output', 'content_hash', 'content_type', 'rendered_at')
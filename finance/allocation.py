@@ -0,0 +1,195 @@
+"""
+FIFO allocation of unlinked payments across a tenant's open invoices
+"""
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from tenants.models import Tenant
+from .models import Invoice, Payment, PaymentAllocation
+from .rollups import touch
+
+
+OPEN_STATUSES = ('PENDING', 'OVERDUE')
+FIFO_ORDER = ('month', 'due_date', 'pk')
+
+
+def _fifo(invoices, payments, remaining):
+    """
+    Spread each payment's remaining amount over ``invoices`` oldest-first.
+
+    ``invoices`` and ``payments`` belong to one tenant and are already ordered.
+    Invoices are updated in memory; returns the planned (payment, invoice,
+    amount) triples and the invoices that changed.
+    """
+    queue = [invoice for invoice in invoices if invoice.status in OPEN_STATUSES and invoice.balance > 0]
+    planned = []
+    touched = {}
+    position = 0
+    for payment in payments:
+        left = remaining.get(payment.pk, Decimal('0'))
+        while left > 0 and position < len(queue):
+            invoice = queue[position]
+            amount = min(left, invoice.balance)
+            planned.append((payment, invoice, amount))
+            invoice.set_amount_paid(invoice.amount_paid + amount)
+            touched[invoice.pk] = invoice
+            left -= amount
+            if invoice.balance <= 0:
+                position += 1
+    return planned, list(touched.values())
+
+
+def _write(planned, touched, existing=None):
+    """Persist a FIFO plan with one bulk insert/update per table"""
+    existing = existing or {}
+    merged = {}
+    for payment, invoice, amount in planned:
+        key = (payment.pk, invoice.pk)
+        if key in existing:
+            existing[key].amount += amount
+            merged[key] = existing[key]
+        elif key in merged:
+            merged[key].amount += amount
+        else:
+            merged[key] = PaymentAllocation(payment=payment, invoice=invoice, amount=amount)
+
+    now = timezone.now()
+    for invoice in touched:
+        invoice.updated_at = now
+    Invoice.objects.bulk_update(touched, ['amount_paid', 'balance', 'status', 'updated_at'])
+    touch(tenant_months=[(invoice.tenant_id, invoice.month) for invoice in touched])
+    PaymentAllocation.objects.bulk_update(
+        [allocation for allocation in merged.values() if allocation.pk], ['amount']
+    )
+    PaymentAllocation.objects.bulk_create(
+        [allocation for allocation in merged.values() if not allocation.pk]
+    )
+    return len(merged)
+
+
+def allocate_payments(payments):
+    """
+    Allocate the unallocated remainder of unlinked COMPLETED payments.
+
+    Works on any mix of tenants with a fixed number of queries: one for the
+    existing allocations, one (locking) for the open invoices, then bulk writes.
+    """
+    payments = sorted(
+        (p for p in payments if p.invoice_id is None and p.status == 'COMPLETED'),
+        key=lambda p: (p.payment_date, p.pk)
+    )
+    if not payments:
+        return 0
+
+    with transaction.atomic():
+        existing = {
+            (allocation.payment_id, allocation.invoice_id): allocation
+            for allocation in PaymentAllocation.objects.filter(payment__in=payments)
+        }
+        remaining = {payment.pk: Decimal(str(payment.amount)) for payment in payments}
+        for (payment_id, _), allocation in existing.items():
+            remaining[payment_id] -= allocation.amount
+
+        invoices = defaultdict(list)
+        open_invoices = (
+            Invoice.objects.select_for_update()
+            .filter(tenant_id__in={p.tenant_id for p in payments}, status__in=OPEN_STATUSES, balance__gt=0)
+            .order_by(*FIFO_ORDER)
+        )
+        for invoice in open_invoices:
+            invoices[invoice.tenant_id].append(invoice)
+
+        by_tenant = defaultdict(list)
+        for payment in payments:
+            by_tenant[payment.tenant_id].append(payment)
+
+        planned, touched = [], []
+        for tenant_id, tenant_payments in by_tenant.items():
+            tenant_planned, tenant_touched = _fifo(invoices[tenant_id], tenant_payments, remaining)
+            planned += tenant_planned
+            touched += tenant_touched
+        return _write(planned, touched, existing)
+
+
+def allocate_open_credit(tenant_ids):
+    """Apply any unallocated credit of these tenants to their open invoices"""
+    payments = (
+        Payment.objects.filter(tenant_id__in=tenant_ids, invoice__isnull=True, status='COMPLETED')
+        .annotate(allocated=Sum('allocations__amount'))
+        .filter(Q(allocated__isnull=True) | Q(allocated__lt=F('amount')))
+    )
+    return allocate_payments(list(payments))
+
+
+def release_allocations(payment_ids):
+    """Undo the allocations of these payments and give the amounts back to the invoices"""
+    allocations = PaymentAllocation.objects.filter(payment_id__in=payment_ids)
+    totals = list(allocations.values('invoice').annotate(total=Sum('amount')).order_by())
+    for row in totals:
+        Invoice.objects.filter(pk=row['invoice']).update(**Invoice.paid_amount_updates(-row['total']))
+    touch(invoices=[row['invoice'] for row in totals])
+    allocations.delete()
+
+
+def reallocate_tenant(tenant_id):
+    """
+    Rebuild a tenant's allocations and invoice balances from scratch.
+
+    Linked payments are re-summed per invoice and unlinked payments are
+    re-applied FIFO, all inside one transaction and with a fixed number of
+    queries however many invoices the tenant has.
+    """
+    with transaction.atomic():
+        invoices = list(
+            Invoice.objects.select_for_update().filter(tenant_id=tenant_id).order_by(*FIFO_ORDER)
+        )
+        linked = dict(
+            Payment.objects.filter(tenant_id=tenant_id, status='COMPLETED', invoice__isnull=False)
+            .values('invoice').annotate(total=Sum('amount')).order_by()
+            .values_list('invoice', 'total')
+        )
+        payments = list(
+            Payment.objects.filter(tenant_id=tenant_id, status='COMPLETED', invoice__isnull=True)
+            .order_by('payment_date', 'pk')
+        )
+        PaymentAllocation.objects.filter(payment__tenant_id=tenant_id).delete()
+
+        before = {invoice.pk: (invoice.amount_paid, invoice.balance, invoice.status) for invoice in invoices}
+        for invoice in invoices:
+            invoice.set_amount_paid(linked.get(invoice.pk, Decimal('0')))
+        remaining = {payment.pk: payment.amount for payment in payments}
+        planned, _ = _fifo(invoices, payments, remaining)
+
+        changed = [
+            invoice for invoice in invoices
+            if before[invoice.pk] != (invoice.amount_paid, invoice.balance, invoice.status)
+        ]
+        return {
+            'allocations': _write(planned, changed),
+            'allocated_amount': sum((amount for _, _, amount in planned), Decimal('0')),
+            'invoices_updated': len(changed),
+        }
+
+
+def reallocate_portfolio(owner=None, tenant_ids=None):
+    """Re-run allocation for every tenant of a landlord (or all tenants), one transaction per tenant"""
+    started = time.perf_counter()
+    tenants = Tenant.objects.all()
+    if owner is not None:
+        tenants = tenants.filter(unit__building__owner=owner)
+    if tenant_ids is not None:
+        tenants = tenants.filter(pk__in=tenant_ids)
+
+    summary = {'tenants': 0, 'allocations': 0, 'allocated_amount': Decimal('0'), 'invoices_updated': 0}
+    for tenant_id in list(tenants.order_by('pk').values_list('pk', flat=True)):
+        result = reallocate_tenant(tenant_id)
+        summary['tenants'] += 1
+        for key in ('allocations', 'allocated_amount', 'invoices_updated'):
+            summary[key] += result[key]
+    summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return summary
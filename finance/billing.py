@@ -0,0 +1,226 @@
+"""
+Batch billing jobs for the finance app
+"""
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from tenants.models import Tenant
+from .models import Invoice, InvoiceLineItem, LateFeePolicy
+from .allocation import allocate_open_credit
+from .sequences import invoice_numbers
+from .rollups import touch, touch_invoices
+
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_DUE_DAY = 5
+
+
+def parse_month(value):
+    """Parse 'YYYY-MM' (or a 'YYYY-MM-DD' date) into the first day of that month"""
+    if isinstance(value, date):
+        return value.replace(day=1)
+    value = str(value).strip()
+    for fmt in ('%Y-%m', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid month '{value}', expected YYYY-MM")
+
+
+def generate_monthly_invoices(month, owner=None, due_day=DEFAULT_DUE_DAY,
+                              dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bill every ACTIVE tenancy for ``month`` from its unit's rent.
+
+    Tenants are read in primary-key batches and each batch is written with a
+    single ``bulk_create``. Tenants that already have an invoice for the month
+    are excluded up front, and ``ignore_conflicts`` covers a concurrent run, so
+    re-running the job only fills the gaps. ``owner`` limits the run to one
+    landlord's properties.
+    """
+    started = time.perf_counter()
+    month = parse_month(month)
+    due_date = month.replace(day=max(1, min(int(due_day), 28)))
+    today = timezone.now().date()
+    # bulk_create skips Invoice.save(), so mirror its status rule here
+    initial_status = 'OVERDUE' if due_date < today else 'PENDING'
+
+    active = Tenant.objects.filter(status='ACTIVE')
+    if owner is not None:
+        active = active.filter(unit__building__owner=owner)
+    already_invoiced = active.filter(invoices__month=month).count()
+    pending = active.exclude(invoices__month=month).order_by('pk')
+
+    eligible = 0
+    created = 0
+    total_amount = Decimal('0')
+    last_pk = 0
+    while True:
+        batch = list(
+            pending.filter(pk__gt=last_pk).values_list('pk', 'unit__rent_amount')[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        eligible += len(batch)
+        total_amount += sum((rent for _, rent in batch), Decimal('0'))
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            # One counter bump reserves numbers for the whole batch
+            numbers = invoice_numbers(len(batch))
+            invoices = []
+            for number, (tenant_id, rent) in zip(numbers, batch):
+                invoices.append(Invoice(
+                    tenant_id=tenant_id,
+                    invoice_number=number,
+                    month=month,
+                    rent_amount=rent,
+                    subtotal=rent,
+                    total_amount=rent,
+                    balance=rent,
+                    status=initial_status,
+                    due_date=due_date,
+                ))
+            Invoice.objects.bulk_create(invoices, ignore_conflicts=True)
+            touch(tenant_months=[(tenant_id, month) for tenant_id, _ in batch])
+            created += Invoice.objects.filter(
+                invoice_number__in=[invoice.invoice_number for invoice in invoices]
+            ).count()
+            # Settle the new invoices from any advance payments on account
+            allocate_open_credit([tenant_id for tenant_id, _ in batch])
+
+    elapsed = time.perf_counter() - started
+    processed = eligible if dry_run else created
+    return {
+        'month': month,
+        'due_date': due_date,
+        'dry_run': dry_run,
+        'eligible': eligible,
+        'created': created,
+        'already_invoiced': already_invoiced,
+        'skipped': 0 if dry_run else eligible - created,
+        'total_amount': total_amount,
+        'elapsed_seconds': round(elapsed, 3),
+        'invoices_per_second': round(processed / elapsed, 1) if elapsed > 0 else 0,
+    }
+
+
+def mark_overdue_invoices(today=None):
+    """
+    Flip every PENDING invoice past its due date to OVERDUE in one UPDATE.
+
+    Served by the (status, due_date) index, so the cost tracks the number of
+    invoices that change rather than the size of the table. Returns that number.
+    """
+    today = today or timezone.now().date()
+    overdue = Invoice.objects.filter(status='PENDING', due_date__lt=today)
+    with transaction.atomic():
+        touch_invoices(overdue)
+        return overdue.update(status='OVERDUE', updated_at=timezone.now())
+
+
+def accrue_late_fees(as_of=None, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Charge late fees on overdue invoices of properties with an active policy.
+
+    Each invoice is brought up to the fee its policy says is owed as of
+    ``as_of``; the difference from what was already charged becomes a
+    LATE_FEE line item dated ``as_of``. Per batch the line items are written
+    with one bulk INSERT and the invoice totals with one UPDATE, so a run
+    never calls Invoice.save(). Running twice on the same day charges nothing
+    the second time, unless the policy changed in between; then that day's
+    line item is adjusted instead.
+    """
+    started = time.perf_counter()
+    as_of = as_of or timezone.now().date()
+    swept = 0 if dry_run else mark_overdue_invoices(as_of)
+
+    accrued = (
+        InvoiceLineItem.objects.filter(invoice=OuterRef('pk'), kind='LATE_FEE')
+        .values('invoice').annotate(total=Sum('amount')).values('total')
+    )
+    policy = 'tenant__unit__building__late_fee_policy__'
+    candidates = (
+        Invoice.objects.filter(
+            status__in=('PENDING', 'OVERDUE'),
+            balance__gt=0,
+            due_date__lt=as_of,
+            **{policy + 'is_active': True}
+        )
+        .annotate(accrued=Coalesce(Subquery(accrued), Value(Decimal('0')), output_field=DecimalField()))
+        .order_by('pk')
+        .values_list(
+            'pk', 'rent_amount', 'due_date', 'accrued',
+            policy + 'fee_type', policy + 'value', policy + 'cap', policy + 'grace_days',
+        )
+    )
+
+    charged = 0
+    total_fees = Decimal('0')
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            fees = {}
+            for pk, rent, due_date, already, fee_type, value, cap, grace_days in batch:
+                days_late = (as_of - due_date).days - grace_days
+                fee = (LateFeePolicy.fee_due(fee_type, value, cap, rent, days_late) - already).quantize(Decimal('0.01'))
+                if fee > 0:
+                    fees[pk] = fee
+            charged += len(fees)
+            total_fees += sum(fees.values(), Decimal('0'))
+            if dry_run or not fees:
+                continue
+
+            same_day = {
+                item.invoice_id: item for item in
+                InvoiceLineItem.objects.filter(invoice__in=fees, kind='LATE_FEE', accrued_on=as_of)
+            }
+            for pk, item in same_day.items():
+                item.amount += fees[pk]
+            InvoiceLineItem.objects.bulk_update(same_day.values(), ['amount'])
+            InvoiceLineItem.objects.bulk_create([
+                InvoiceLineItem(
+                    invoice_id=pk,
+                    kind='LATE_FEE',
+                    description=f"Late fee accrued {as_of:%Y-%m-%d}",
+                    amount=fee,
+                    accrued_on=as_of,
+                )
+                for pk, fee in fees.items() if pk not in same_day
+            ])
+            fee = Case(
+                *[When(pk=pk, then=Value(amount)) for pk, amount in fees.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+            Invoice.objects.filter(pk__in=fees).update(
+                other_charges=F('other_charges') + fee,
+                subtotal=F('subtotal') + fee,
+                total_amount=F('total_amount') + fee,
+                balance=F('balance') + fee,
+                updated_at=timezone.now(),
+            )
+            touch(invoices=fees)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'as_of': as_of,
+        'dry_run': dry_run,
+        'marked_overdue': swept,
+        'invoices_charged': charged,
+        'total_fees': total_fees,
+        'elapsed_seconds': round(elapsed, 3),
+    }
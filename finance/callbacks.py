@@ -0,0 +1,172 @@
+"""
+Mobile money (M-Pesa C2B style) confirmation callbacks
+"""
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from tenants.models import Tenant
+from elms_backend.tasks import submit
+from .models import Invoice, MobileMoneyCallback, Payment, Receipt
+from .imports import normalize_phone
+from .sequences import receipt_numbers
+
+
+SIGNATURE_HEADER = 'HTTP_X_CALLBACK_SIGNATURE'
+
+
+def sign(body, secret=None):
+    """Hex HMAC-SHA256 of the raw request body"""
+    secret = settings.MOBILE_MONEY_CALLBACK_SECRET if secret is None else secret
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, signature):
+    secret = settings.MOBILE_MONEY_CALLBACK_SECRET
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(body, secret), signature)
+
+
+def parse_confirmation(payload):
+    """Map a C2B confirmation payload onto MobileMoneyCallback fields"""
+    transaction_id = str(payload.get('TransID') or '').strip()
+    if not transaction_id:
+        raise ValueError('TransID is required')
+    try:
+        amount = Decimal(str(payload.get('TransAmount'))).quantize(Decimal('0.01'))
+        if not amount.is_finite():
+            raise ValueError('TransAmount is invalid')
+    except InvalidOperation:
+        raise ValueError('TransAmount is invalid')
+    if amount <= 0:
+        raise ValueError('TransAmount must be positive')
+
+    transaction_time = None
+    if payload.get('TransTime'):
+        try:
+            transaction_time = timezone.make_aware(datetime.strptime(str(payload['TransTime']), '%Y%m%d%H%M%S'))
+        except ValueError:
+            raise ValueError('TransTime must be YYYYMMDDHHMMSS')
+
+    names = [payload.get(key) for key in ('FirstName', 'MiddleName', 'LastName')]
+    return {
+        'transaction_id': transaction_id,
+        'amount': amount,
+        'phone': payload.get('MSISDN') or None,
+        'account_reference': (payload.get('BillRefNumber') or '').strip() or None,
+        'payer_name': ' '.join(name for name in names if name) or None,
+        'transaction_time': transaction_time,
+        'payload': payload,
+    }
+
+
+def record_callback(payload, provider='MPESA'):
+    """
+    Store a callback and queue it for processing.
+
+    Returns (callback, created). A retry of a transaction we already hold
+    returns the existing row without queueing it again.
+    """
+    fields = parse_confirmation(payload)
+    try:
+        with transaction.atomic():
+            callback = MobileMoneyCallback.objects.create(provider=provider, **fields)
+            transaction.on_commit(lambda: submit(process_callback, callback.pk))
+        return callback, True
+    except IntegrityError:
+        return MobileMoneyCallback.objects.get(provider=provider, transaction_id=fields['transaction_id']), False
+
+
+def _match(callback):
+    """Find the (tenant_id, invoice_id) a callback pays for"""
+    if callback.account_reference:
+        invoice = (
+            Invoice.objects.filter(invoice_number__iexact=callback.account_reference)
+            .values_list('tenant_id', 'pk').first()
+        )
+        if invoice:
+            return invoice
+
+    phone = normalize_phone(callback.phone)
+    if phone:
+        tenants = list(
+            Tenant.objects.filter(status='ACTIVE', user__phone__endswith=phone).values_list('pk', flat=True)[:2]
+        )
+        if len(tenants) == 1:
+            return tenants[0], None
+    return None, None
+
+
+def process_callback(callback_id):
+    """Turn a RECEIVED callback into a Payment and Receipt"""
+    # Claim the row so concurrent workers never process it twice
+    claimed = MobileMoneyCallback.objects.filter(pk=callback_id, status='RECEIVED').update(status='PROCESSING')
+    if not claimed:
+        return None
+    callback = MobileMoneyCallback.objects.get(pk=callback_id)
+
+    try:
+        with transaction.atomic():
+            if Payment.objects.filter(transaction_reference=callback.transaction_id).exists():
+                callback.status = 'DUPLICATE'
+                callback.error = 'A payment with this transaction reference already exists'
+            else:
+                tenant_id, invoice_id = _match(callback)
+                if tenant_id is None:
+                    callback.status = 'UNMATCHED'
+                    callback.error = 'No active tenant matches this account or phone number'
+                else:
+                    paid_at = timezone.localtime(callback.transaction_time or callback.received_at)
+                    payment = Payment.objects.create(
+                        tenant_id=tenant_id,
+                        invoice_id=invoice_id,
+                        amount=callback.amount,
+                        payment_method='MOBILE_MONEY',
+                        payment_date=paid_at.date(),
+                        transaction_reference=callback.transaction_id,
+                        status='COMPLETED',
+                        notes=f"{callback.provider} payment from {callback.payer_name or callback.phone}",
+                    )
+                    Receipt.objects.create(payment=payment, receipt_number=receipt_numbers()[0])
+                    callback.payment = payment
+                    callback.status = 'PROCESSED'
+                    callback.error = None
+            callback.processed_at = timezone.now()
+            callback.save(update_fields=['status', 'payment', 'error', 'processed_at'])
+    except Exception as exc:
+        MobileMoneyCallback.objects.filter(pk=callback_id).update(
+            status='FAILED', error=str(exc), processed_at=timezone.now()
+        )
+        raise
+    return callback
+
+
+def process_pending_callbacks(retry_failed=False, stale_after=timedelta(minutes=10)):
+    """
+    Process callbacks that were never picked up, e.g. after a worker restart.
+
+    Rows stuck in PROCESSING longer than ``stale_after`` are released first.
+    """
+    MobileMoneyCallback.objects.filter(
+        status='PROCESSING', received_at__lt=timezone.now() - stale_after
+    ).update(status='RECEIVED')
+    if retry_failed:
+        MobileMoneyCallback.objects.filter(status='FAILED').update(status='RECEIVED', error=None)
+
+    processed = 0
+    pending = list(
+        MobileMoneyCallback.objects.filter(status='RECEIVED').order_by('received_at').values_list('pk', flat=True)
+    )
+    for callback_id in pending:
+        try:
+            if process_callback(callback_id):
+                processed += 1
+        except Exception:
+            continue
+    return processed
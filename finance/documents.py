@@ -0,0 +1,243 @@
+"""
+Printable invoices and receipts with a rendered-document cache
+"""
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Invoice, InvoiceLineItem, Payment, PaymentAllocation, Receipt, RenderedDocument
+from .billing import parse_month
+from .rendering import RENDERERS, content_hash, init_worker, render, render_job
+
+
+DEFAULT_BATCH_SIZE = 200
+METHOD_LABELS = dict(Payment.PAYMENT_METHOD_CHOICES)
+STATUS_LABELS = dict(Invoice.STATUS_CHOICES)
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def _name(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+def invoice_contexts(invoice_ids):
+    """Render contexts for many invoices from two queries"""
+    line_items = defaultdict(list)
+    for invoice_id, description, amount in (
+        InvoiceLineItem.objects.filter(invoice__in=invoice_ids)
+        .order_by('accrued_on', 'pk').values_list('invoice', 'description', 'amount')
+    ):
+        line_items[invoice_id].append((description, amount))
+
+    contexts = {}
+    for row in Invoice.objects.filter(pk__in=invoice_ids).values(
+        'pk', 'invoice_number', 'month', 'due_date', 'status', 'rent_amount', 'water_bill',
+        'electricity_bill', 'other_charges', 'other_charges_description', 'total_amount',
+        'amount_paid', 'balance', 'tenant__user__first_name', 'tenant__user__last_name',
+        'tenant__user__username', 'tenant__unit__unit_number', 'tenant__unit__building__name',
+    ):
+        lines = [('Rent', _money(row['rent_amount']))]
+        if row['water_bill']:
+            lines.append(('Water', _money(row['water_bill'])))
+        if row['electricity_bill']:
+            lines.append(('Electricity', _money(row['electricity_bill'])))
+        # Itemised charges are part of other_charges; show what is left as one line
+        itemised = line_items[row['pk']]
+        lines += [(description, _money(amount)) for description, amount in itemised]
+        remainder = row['other_charges'] - sum(amount for _, amount in itemised)
+        if remainder:
+            lines.append((row['other_charges_description'] or 'Other charges', _money(remainder)))
+
+        contexts[row['pk']] = {
+            'number': row['invoice_number'],
+            'header': [
+                ('Tenant', _name(row['tenant__user__first_name'], row['tenant__user__last_name'], row['tenant__user__username'])),
+                ('Property', row['tenant__unit__building__name']),
+                ('Unit', row['tenant__unit__unit_number']),
+                ('Month', f"{row['month']:%B %Y}"),
+                ('Due date', f"{row['due_date']:%d %b %Y}"),
+                ('Status', STATUS_LABELS.get(row['status'], row['status'])),
+            ],
+            'lines': lines,
+            'totals': [
+                ('Total', _money(row['total_amount'])),
+                ('Paid', _money(row['amount_paid'])),
+                ('Balance due', _money(row['balance'])),
+            ],
+            'footer': f"Please quote {row['invoice_number']} as the account number when paying.",
+        }
+    return contexts
+
+
+def receipt_contexts(receipt_ids):
+    """Render contexts for many receipts from two queries"""
+    rows = list(Receipt.objects.filter(pk__in=receipt_ids).values(
+        'pk', 'receipt_number', 'generated_at', 'payment', 'payment__amount', 'payment__payment_method',
+        'payment__payment_date', 'payment__transaction_reference', 'payment__invoice__invoice_number',
+        'payment__tenant__user__first_name', 'payment__tenant__user__last_name',
+        'payment__tenant__user__username', 'payment__tenant__unit__unit_number',
+        'payment__tenant__unit__building__name',
+    ))
+    applied = defaultdict(list)
+    for payment_id, number, amount in (
+        PaymentAllocation.objects.filter(payment__in=[row['payment'] for row in rows])
+        .order_by('invoice__month', 'pk').values_list('payment', 'invoice__invoice_number', 'amount')
+    ):
+        applied[payment_id].append((f"Applied to {number}", _money(amount)))
+
+    contexts = {}
+    for row in rows:
+        if row['payment__invoice__invoice_number']:
+            lines = [(f"Paid against {row['payment__invoice__invoice_number']}", _money(row['payment__amount']))]
+        else:
+            lines = applied[row['payment']] or [('Held as credit on account', _money(row['payment__amount']))]
+        contexts[row['pk']] = {
+            'number': row['receipt_number'],
+            'header': [
+                ('Received from', _name(
+                    row['payment__tenant__user__first_name'], row['payment__tenant__user__last_name'],
+                    row['payment__tenant__user__username'],
+                )),
+                ('Property', row['payment__tenant__unit__building__name']),
+                ('Unit', row['payment__tenant__unit__unit_number']),
+                ('Payment date', f"{row['payment__payment_date']:%d %b %Y}"),
+                ('Method', METHOD_LABELS.get(row['payment__payment_method'], row['payment__payment_method'])),
+                ('Reference', row['payment__transaction_reference'] or '-'),
+            ],
+            'lines': lines,
+            'totals': [('Amount received', _money(row['payment__amount']))],
+            'footer': f"Issued {row['generated_at']:%d %b %Y}. Thank you for your payment.",
+        }
+    return contexts
+
+
+CONTEXT_BUILDERS = {
+    'INVOICE': invoice_contexts,
+    'RECEIPT': receipt_contexts,
+}
+
+
+def get_document(kind, object_id, output='pdf'):
+    """
+    The cached rendering of one document, rendering it if it is missing or stale.
+
+    Returns None when the object does not exist.
+    """
+    context = CONTEXT_BUILDERS[kind]([object_id]).get(object_id)
+    if context is None:
+        return None
+    digest = content_hash(kind, output, context)
+    cached = RenderedDocument.objects.filter(
+        kind=kind, object_id=object_id, output=output, content_hash=digest
+    ).first()
+    if cached:
+        return cached
+
+    digest, content_type, content = render(kind, output, context)
+    document, _ = RenderedDocument.objects.update_or_create(
+        kind=kind, object_id=object_id, output=output,
+        defaults={'content_hash': digest, 'content_type': content_type, 'content': content},
+    )
+    return document
+
+
+def prerender_receipts(month, output='pdf', workers=None, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """
+    Render every receipt for payments in ``month`` ahead of time.
+
+    Contexts are built in bulk in this process; the rendering itself is
+    spread over a process pool. Receipts whose cached document already
+    matches their content hash are skipped unless ``force`` is set.
+    """
+    started = time.perf_counter()
+    month = parse_month(month)
+    end = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+    receipt_ids = list(
+        Receipt.objects.filter(payment__payment_date__gte=month, payment__payment_date__lt=end)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+    workers = workers or os.cpu_count() or 1
+    rendered = skipped = 0
+    settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'elms_backend.settings')
+    # Forked workers must not inherit (and later close) this process's connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(settings_module,)) as pool:
+        for start in range(0, len(receipt_ids), batch_size):
+            ids = receipt_ids[start:start + batch_size]
+            contexts = receipt_contexts(ids)
+            current = dict(
+                RenderedDocument.objects.filter(kind='RECEIPT', output=output, object_id__in=ids)
+                .values_list('object_id', 'content_hash')
+            )
+            jobs = [
+                (object_id, 'RECEIPT', output, context) for object_id, context in contexts.items()
+                if force or current.get(object_id) != content_hash('RECEIPT', output, context)
+            ]
+            skipped += len(contexts) - len(jobs)
+            results = list(pool.map(render_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+            RenderedDocument.objects.bulk_create(
+                [
+                    RenderedDocument(
+                        kind='RECEIPT', object_id=object_id, output=output,
+                        content_hash=digest, content_type=content_type, content=content,
+                    )
+                    for object_id, digest, content_type, content in results
+                ],
+                update_conflicts=True,
+                unique_fields=['kind', 'object_id', 'output'],
+                update_fields=['content_hash', 'content_type', 'content', 'rendered_at'],
+            )
+            rendered += len(results)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'month': month,
+        'receipts': len(receipt_ids),
+        'rendered': rendered,
+        'skipped': skipped,
+        'elapsed_seconds': round(elapsed, 3),
+        'receipts_per_second': round(rendered / elapsed, 1) if elapsed > 0 else 0,
+    }
+
+
+class DocumentMixin:
+    """
+    Adds a ``document`` detail action serving the cached PDF/HTML rendering.
+
+    The object is fetched through the viewset's ``get_object()``, so the same
+    role scoping applies. Set ``document_kind`` on the viewset.
+    """
+    document_kind = None
+
+    @action(detail=True, methods=['get'])
+    def document(self, request, pk=None):
+        """Download the document as PDF (?output=pdf) or HTML (?output=html)"""
+        output = request.query_params.get('output', 'pdf')
+        if output not in RENDERERS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(RENDERERS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        instance = self.get_object()
+        document = get_document(self.document_kind, instance.pk, output)
+        etag = f'"{document.content_hash}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified(headers={'ETag': etag})
+
+        number = getattr(instance, 'invoice_number', None) or getattr(instance, 'receipt_number', instance.pk)
+        response = HttpResponse(bytes(document.content), content_type=document.content_type)
+        response['Content-Disposition'] = f'inline; filename="{number}.{output}"'
+        response['ETag'] = etag
+        return response
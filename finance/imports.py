@@ -0,0 +1,262 @@
+"""
+Bulk import of payments from bank / mobile-money statement files
+"""
+import codecs
+import csv
+import re
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from tenants.models import Tenant
+from .models import Invoice, Payment, Receipt
+from .allocation import allocate_payments
+from .sequences import receipt_numbers
+from .rollups import touch
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Normalised header -> field, covering our own template and common statement exports
+COLUMN_ALIASES = {
+    'date': 'date',
+    'paymentdate': 'date',
+    'transactiondate': 'date',
+    'completiontime': 'date',
+    'amount': 'amount',
+    'paidin': 'amount',
+    'credit': 'amount',
+    'reference': 'reference',
+    'transactionreference': 'reference',
+    'transactionid': 'reference',
+    'receiptno': 'reference',
+    'phone': 'phone',
+    'phonenumber': 'phone',
+    'msisdn': 'phone',
+    'account': 'account',
+    'accountreference': 'account',
+    'accountno': 'account',
+    'billrefnumber': 'account',
+    'method': 'method',
+    'paymentmethod': 'method',
+    'notes': 'notes',
+    'details': 'notes',
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y')
+
+
+def normalize_phone(value):
+    """Compare phone numbers on their last nine digits (07XX..., 2547XX..., +2547XX...)"""
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-9:] if len(digits) >= 9 else None
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date '{value}'")
+
+
+def _parse_amount(value):
+    try:
+        amount = Decimal((value or '').replace(',', '').strip())
+        if not amount.is_finite():
+            raise InvalidOperation
+        if amount <= 0:
+            raise ValueError('Amount must be positive')
+        return amount.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{value}'")
+
+
+def _read_rows(stream):
+    """Yield (line_number, {field: value}) without loading the whole file"""
+    reader = csv.reader(codecs.iterdecode(stream, 'utf-8-sig'))
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [COLUMN_ALIASES.get(re.sub(r'[^a-z]', '', column.lower())) for column in header]
+    if not {'date', 'amount', 'reference'} <= set(fields):
+        raise ValueError('Statement must have date, amount and reference columns')
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, {
+            field: value.strip() for field, value in zip(fields, values) if field
+        }
+
+
+class StatementImporter:
+    """
+    Matches statement rows to tenants and records them as payments in batches.
+
+    Tenants are matched on the row's account (an invoice number) first and
+    then on the payer's phone number. Rows are deduplicated on
+    transaction_reference, both against the database and within the file.
+    """
+
+    def __init__(self, payment_method='MOBILE_MONEY', owner=None, recorded_by=None,
+                 dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+        self.payment_method = payment_method
+        self.owner = owner
+        self.recorded_by = recorded_by
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.results = []
+        self.seen_references = set()
+        self.tenants_by_phone = self._load_phone_index()
+
+    def _tenants(self):
+        tenants = Tenant.objects.filter(status='ACTIVE')
+        if self.owner is not None:
+            tenants = tenants.filter(unit__building__owner=self.owner)
+        return tenants
+
+    def _load_phone_index(self):
+        index = {}
+        for tenant_id, phone in self._tenants().values_list('pk', 'user__phone'):
+            key = normalize_phone(phone)
+            if key:
+                # Shared numbers cannot be matched reliably
+                index[key] = None if key in index else tenant_id
+        return index
+
+    def _parse_method(self, value):
+        method = (value or self.payment_method).strip().upper().replace(' ', '_')
+        if method not in dict(Payment.PAYMENT_METHOD_CHOICES):
+            raise ValueError(f"Unknown payment method '{value}'")
+        return method
+
+    def run(self, stream):
+        started = time.perf_counter()
+        batch = []
+        for line_number, row in _read_rows(stream):
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+        if batch:
+            self._process(batch)
+
+        elapsed = time.perf_counter() - started
+        counts = defaultdict(int)
+        for result in self.results:
+            counts[result['status']] += 1
+        return {
+            'dry_run': self.dry_run,
+            'rows': len(self.results),
+            'counts': dict(counts),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(len(self.results) / elapsed, 1) if elapsed > 0 else 0,
+            'results': self.results,
+        }
+
+    def _process(self, batch):
+        parsed = []
+        for line_number, row in batch:
+            result = {'row': line_number, 'reference': row.get('reference') or None}
+            self.results.append(result)
+            try:
+                if not result['reference']:
+                    raise ValueError('Missing transaction reference')
+                result['date'] = _parse_date(row.get('date'))
+                result['amount'] = _parse_amount(row.get('amount'))
+                result['method'] = self._parse_method(row.get('method'))
+            except ValueError as exc:
+                result.update(status='invalid', message=str(exc))
+                continue
+            parsed.append((row, result))
+
+        references = [result['reference'] for _, result in parsed]
+        existing = set(
+            Payment.objects.filter(transaction_reference__in=references)
+            .values_list('transaction_reference', flat=True)
+        )
+        accounts = [row['account'] for row, _ in parsed if row.get('account')]
+        invoices = {
+            number: (invoice_id, tenant_id)
+            for number, invoice_id, tenant_id in (
+                Invoice.objects.filter(invoice_number__in=accounts, tenant__in=self._tenants())
+                .values_list('invoice_number', 'pk', 'tenant_id')
+            )
+        }
+
+        matched = []
+        for row, result in parsed:
+            reference = result['reference']
+            if reference in existing or reference in self.seen_references:
+                result.update(status='duplicate', message='Transaction reference already recorded')
+                continue
+            self.seen_references.add(reference)
+
+            invoice_id, tenant_id = invoices.get(row.get('account'), (None, None))
+            if tenant_id is None:
+                phone = normalize_phone(row.get('phone'))
+                if phone in self.tenants_by_phone and self.tenants_by_phone[phone] is None:
+                    result.update(status='ambiguous', message='Phone number is shared by several tenants')
+                    continue
+                tenant_id = self.tenants_by_phone.get(phone)
+            if tenant_id is None:
+                result.update(status='unmatched', message='No active tenant matches this account or phone')
+                continue
+
+            result.update(status='matched', tenant=tenant_id, invoice=invoice_id)
+            matched.append((row, result))
+
+        if matched and not self.dry_run:
+            self._record(matched)
+
+    @transaction.atomic
+    def _record(self, matched):
+        payments = [
+            Payment(
+                tenant_id=result['tenant'],
+                invoice_id=result['invoice'],
+                amount=result['amount'],
+                payment_method=result['method'],
+                payment_date=result['date'],
+                transaction_reference=result['reference'],
+                status='COMPLETED',
+                notes=row.get('notes') or None,
+                recorded_by=self.recorded_by,
+            )
+            for row, result in matched
+        ]
+        # bulk_create skips Payment.save(), so invoice balances are applied below in bulk
+        Payment.objects.bulk_create(payments)
+        touch(tenant_months=[(payment.tenant_id, payment.payment_date) for payment in payments])
+        Receipt.objects.bulk_create([
+            Receipt(payment=payment, receipt_number=number)
+            for payment, number in zip(payments, receipt_numbers(len(payments)))
+        ])
+
+        linked = defaultdict(Decimal)
+        for payment in payments:
+            if payment.invoice_id:
+                linked[payment.invoice_id] += payment.amount
+        if linked:
+            invoices = list(Invoice.objects.select_for_update().filter(pk__in=linked))
+            now = timezone.now()
+            for invoice in invoices:
+                invoice.set_amount_paid(invoice.amount_paid + linked[invoice.pk])
+                invoice.updated_at = now
+            Invoice.objects.bulk_update(invoices, ['amount_paid', 'balance', 'status', 'updated_at'])
+            touch(invoices=linked)
+        allocate_payments([payment for payment in payments if not payment.invoice_id])
+
+        for payment, (_, result) in zip(payments, matched):
+            result.update(status='created', payment=payment.pk)
+
+
+def import_statement(stream, **options):
+    """Import a CSV statement from a binary stream; see StatementImporter"""
+    return StatementImporter(**options).run(stream)
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from finance.billing import accrue_late_fees, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Accrues late fees on overdue invoices (schedule nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Accrue as of this YYYY-MM-DD (defaults to today)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report the fees without charging them')
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['date']:
+            try:
+                as_of = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        result = accrue_late_fees(as_of, dry_run=options['dry_run'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry run] ' if result['dry_run'] else ''}Charged {result['total_fees']} in late fees "
+            f"on {result['invoices_charged']} invoices as of {result['as_of']} "
+            f"({result['marked_overdue']} newly overdue) in {result['elapsed_seconds']}s"
+        ))
@@ -0,0 +1,82 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from properties.models import Property, Unit
+from tenants.models import Tenant
+from finance.models import Invoice, Payment
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures per-payment invoice balance maintenance cost as an invoice accumulates payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=5000, help='Payments to record against one invoice')
+        parser.add_argument('--sample', type=int, default=50, help='Payments timed at each checkpoint')
+
+    def handle(self, *args, **options):
+        total = options['payments']
+        sample = options['sample']
+        checkpoints = [n for n in (0, 10, 100, 1000, 10000, 100000) if n < total] + [total]
+
+        try:
+            with transaction.atomic():
+                invoice, tenant = self._fixture()
+                self.stdout.write(f"{'payments on invoice':>20} {'ms/payment':>12} {'queries/payment':>16}")
+
+                recorded = 0
+                for checkpoint in checkpoints:
+                    # Fill up to the checkpoint without timing, then sample
+                    Payment.objects.bulk_create([
+                        self._payment(tenant, invoice) for _ in range(checkpoint - recorded)
+                    ])
+                    recorded = checkpoint
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        for _ in range(sample):
+                            self._payment(tenant, invoice).save()
+                        elapsed = time.perf_counter() - started
+                    recorded += sample
+
+                    self.stdout.write(
+                        f"{checkpoint:>20} {elapsed / sample * 1000:>12.3f} "
+                        f"{len(queries) / sample:>16.1f}"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _fixture(self):
+        User = get_user_model()
+        landlord = User.objects.create_user('bench-landlord', role='LANDLORD')
+        building = Property.objects.create(name='Bench', address='-', city='-', owner=landlord)
+        unit = Unit.objects.create(building=building, unit_number='B1', rent_amount=Decimal('1000'))
+        tenant_user = User.objects.create_user('bench-tenant', role='TENANT')
+        tenant = Tenant.objects.create(user=tenant_user, unit=unit, move_in_date=date.today())
+        invoice = Invoice.objects.create(
+            tenant=tenant,
+            invoice_number='BENCH-0001',
+            month=date.today().replace(day=1),
+            rent_amount=Decimal('99999999'),
+            total_amount=Decimal('99999999'),
+            due_date=date.today(),
+        )
+        return invoice, tenant
+
+    def _payment(self, tenant, invoice):
+        return Payment(
+            tenant=tenant,
+            invoice=invoice,
+            amount=Decimal('1'),
+            payment_method='CASH',
+            payment_date=date.today(),
+        )
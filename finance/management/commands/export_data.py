@@ -0,0 +1,74 @@
+import resource
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from finance.exports import (
+    EXPORT_FORMATS,
+    INVOICE_COLUMNS,
+    PAYMENT_COLUMNS,
+    RECEIPT_COLUMNS,
+    export_rows,
+    export_stream,
+)
+from finance.models import Invoice, Payment, Receipt
+
+
+EXPORTS = {
+    'invoices': (Invoice, INVOICE_COLUMNS, 'month', 'tenant__unit__building__owner'),
+    'payments': (Payment, PAYMENT_COLUMNS, 'payment_date', 'tenant__unit__building__owner'),
+    'receipts': (Receipt, RECEIPT_COLUMNS, 'payment__payment_date', 'payment__tenant__unit__building__owner'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Streams invoices, payments or receipts to a CSV/XLSX file and reports rows per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=EXPORTS)
+        parser.add_argument('--output', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--path', help='File to write (default: discard, to measure throughput only)')
+        parser.add_argument('--landlord', help="Only export this landlord username's records")
+
+    def handle(self, *args, **options):
+        model, columns, date_field, owner_lookup = EXPORTS[options['kind']]
+        queryset = model.objects.all()
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+            queryset = queryset.filter(**{owner_lookup: owner})
+
+        count = 0
+
+        def rows():
+            nonlocal count
+            for row in export_rows(queryset.order_by(date_field, 'pk'), columns):
+                count += 1
+                yield row
+
+        started = time.perf_counter()
+        written = 0
+        target = open(options['path'], 'wb') if options['path'] else None
+        try:
+            for chunk in export_stream(options['output'], columns, rows()):
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                written += len(data)
+                if target:
+                    target.write(data)
+        finally:
+            if target:
+                target.close()
+        elapsed = time.perf_counter() - started
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {count} {options['kind']} ({written / 1024 / 1024:.1f} MB {options['output']}) "
+            f"in {elapsed:.2f}s: {count / elapsed if elapsed > 0 else 0:.0f} rows/sec, "
+            f"peak RSS {peak_mb:.0f} MB"
+        ))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from finance.billing import (
+    generate_monthly_invoices,
+    parse_month,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_DUE_DAY,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generates monthly rent invoices for all active tenancies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Billing month as YYYY-MM (defaults to the current month)')
+        parser.add_argument('--landlord', help='Only bill properties owned by this username')
+        parser.add_argument('--due-day', type=int, default=DEFAULT_DUE_DAY)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be billed without writing')
+
+    def handle(self, *args, **options):
+        try:
+            month = parse_month(options['month'] or timezone.now().date())
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        owner = None
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        result = generate_monthly_invoices(
+            month,
+            owner=owner,
+            due_day=options['due_day'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+        )
+
+        if result['dry_run']:
+            self.stdout.write(
+                f"[dry run] {result['eligible']} invoices totalling {result['total_amount']} "
+                f"would be created for {month:%Y-%m} "
+                f"({result['already_invoiced']} tenants already invoiced)"
+            )
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} invoices for {month:%Y-%m} "
+            f"in {result['elapsed_seconds']}s ({result['invoices_per_second']} invoices/sec)"
+        ))
+        if result['skipped']:
+            self.stdout.write(self.style.WARNING(f"Skipped {result['skipped']} conflicting invoices"))
+        if result['already_invoiced']:
+            self.stdout.write(f"{result['already_invoiced']} tenants were already invoiced")
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.auth import get_user_model
+from finance.imports import import_statement, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Imports payments from a CSV bank or mobile-money statement'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with date, amount, reference and phone/account columns')
+        parser.add_argument('--method', default='MOBILE_MONEY', help='Payment method for rows without one')
+        parser.add_argument('--landlord', help='Only match tenants of this landlord username')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Match rows without recording payments')
+        parser.add_argument('--report', help='Write the per-row results to this JSON file')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        try:
+            with open(options['path'], 'rb') as statement:
+                result = import_statement(
+                    statement,
+                    payment_method=options['method'],
+                    owner=owner,
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w') as report:
+                json.dump(result, report, cls=DjangoJSONEncoder, indent=2)
+
+        counts = ', '.join(f"{count} {status}" for status, count in sorted(result['counts'].items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry run] ' if result['dry_run'] else ''}Processed {result['rows']} rows "
+            f"in {result['elapsed_seconds']}s ({result['rows_per_second']} rows/sec): {counts or 'nothing to do'}"
+        ))
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from finance.billing import parse_month
+from finance.documents import DEFAULT_BATCH_SIZE, prerender_receipts
+
+
+class Command(BaseCommand):
+    help = "Renders a month's receipts ahead of time in a process pool (e.g. the night before payday)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Payment month as YYYY-MM (default: current month)')
+        parser.add_argument('--output', choices=['pdf', 'html'], default='pdf')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--force', action='store_true', help='Re-render documents that are already current')
+
+    def handle(self, *args, **options):
+        try:
+            month = parse_month(options['month'] or datetime.now().date())
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        result = prerender_receipts(
+            month,
+            output=options['output'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            force=options['force'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{month:%Y-%m}: rendered {result['rendered']} of {result['receipts']} receipts "
+            f"({result['skipped']} already current) in {result['elapsed_seconds']}s, "
+            f"{result['receipts_per_second']} receipts/sec"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from finance.callbacks import process_pending_callbacks
+
+
+class Command(BaseCommand):
+    help = 'Processes mobile money callbacks that were not picked up by a background worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry callbacks that failed')
+
+    def handle(self, *args, **options):
+        processed = process_pending_callbacks(retry_failed=options['retry_failed'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} callbacks'))
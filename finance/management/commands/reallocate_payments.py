@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from finance.allocation import reallocate_portfolio
+
+
+class Command(BaseCommand):
+    help = 'Re-applies unlinked payments to open invoices oldest-first and rebuilds invoice balances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlord', help='Only reallocate tenants of this landlord username')
+        parser.add_argument('--tenant', type=int, action='append', help='Tenant id (repeatable)')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        result = reallocate_portfolio(owner=owner, tenant_ids=options['tenant'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Reallocated {result['tenants']} tenants: {result['allocations']} allocations "
+            f"totalling {result['allocated_amount']}, {result['invoices_updated']} invoices updated "
+            f"in {result['elapsed_seconds']}s"
+        ))
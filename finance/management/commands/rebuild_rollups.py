@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from finance.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the monthly financial rollups from the invoice and payment tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlord', help='Only rebuild the properties of this landlord username')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        result = rebuild(owner=owner, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Replaced {result['deleted']} rollup rows with {result['created']} "
+            f"in {result['elapsed_seconds']}s"
+        ))
@@ -0,0 +1,111 @@
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from tenants.models import Tenant
+from finance.callbacks import sign
+
+
+class Command(BaseCommand):
+    help = 'Stub mobile money provider: fires bursts of signed C2B callbacks for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Distinct transactions to send')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--retries', type=float, default=0.2, help='Fraction of callbacks the provider re-sends')
+        parser.add_argument('--url', help='Callback URL of a running server (default: in-process test client)')
+        parser.add_argument('--secret', help='Signing secret (default: MOBILE_MONEY_CALLBACK_SECRET)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        secret = options['secret'] or settings.MOBILE_MONEY_CALLBACK_SECRET
+        if not secret:
+            raise CommandError('Set MOBILE_MONEY_CALLBACK_SECRET or pass --secret')
+        rng = random.Random(options['seed'])
+
+        phones = list(
+            Tenant.objects.filter(status='ACTIVE', user__phone__isnull=False).values_list('user__phone', flat=True)
+        ) or ['254700000000']
+        run_id = timezone.now().strftime('%H%M%S')
+        payloads = []
+        for n in range(options['count']):
+            payloads.append({
+                'TransactionType': 'Pay Bill',
+                'TransID': f'SIM{run_id}{n:06d}',
+                'TransTime': timezone.localtime().strftime('%Y%m%d%H%M%S'),
+                'TransAmount': str(rng.choice([500, 1000, 2500, 5000, 12000])),
+                'BusinessShortCode': '600000',
+                'BillRefNumber': '',
+                'MSISDN': rng.choice(phones),
+                'FirstName': 'Load',
+                'LastName': f'Test{n}',
+            })
+        # Providers retry when they think an acknowledgement was lost
+        payloads += rng.sample(payloads, int(len(payloads) * options['retries']))
+        rng.shuffle(payloads)
+
+        send = self._http_sender(options['url'], secret) if options['url'] else self._client_sender(secret)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(send, payloads))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency, _ in results)
+        codes = {}
+        for code, _, description in results:
+            key = f'{code} {description}'
+            codes[key] = codes.get(key, 0) + 1
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(f'Sent {len(results)} callbacks in {elapsed:.2f}s ({len(results) / elapsed:.1f}/sec)')
+        for key, count in sorted(codes.items()):
+            self.stdout.write(f'  {key}: {count}')
+        self.stdout.write(
+            f'Ack latency p50={percentile(0.50):.1f}ms p95={percentile(0.95):.1f}ms '
+            f'p99={percentile(0.99):.1f}ms mean={statistics.mean(latencies) * 1000:.1f}ms'
+        )
+
+    def _client_sender(self, secret):
+        url = reverse('mobile-money-callback')
+
+        def send(payload):
+            body = json.dumps(payload).encode()
+            started = time.perf_counter()
+            response = Client().post(
+                url, body, content_type='application/json', HTTP_X_CALLBACK_SIGNATURE=sign(body, secret)
+            )
+            latency = time.perf_counter() - started
+            return response.status_code, latency, response.json().get('ResultDesc')
+        return send
+
+    def _http_sender(self, url, secret):
+        def send(payload):
+            body = json.dumps(payload).encode()
+            request = urllib.request.Request(url, data=body, method='POST', headers={
+                'Content-Type': 'application/json',
+                'X-Callback-Signature': sign(body, secret),
+            })
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    code, data = response.status, response.read()
+            except urllib.error.HTTPError as exc:
+                code, data = exc.code, exc.read()
+            latency = time.perf_counter() - started
+            try:
+                description = json.loads(data).get('ResultDesc')
+            except ValueError:
+                description = None
+            return code, latency, description
+        return send
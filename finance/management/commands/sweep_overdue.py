@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from finance.billing import mark_overdue_invoices
+
+
+class Command(BaseCommand):
+    help = 'Marks pending invoices past their due date as overdue (schedule daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this YYYY-MM-DD as today')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        changed = mark_overdue_invoices(today)
+        self.stdout.write(self.style.SUCCESS(f'Marked {changed} invoices as overdue'))
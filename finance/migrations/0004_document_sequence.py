@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:48
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each counter above the highest number already issued"""
+    Invoice = apps.get_model('finance', 'Invoice')
+    Receipt = apps.get_model('finance', 'Receipt')
+    DocumentSequence = apps.get_model('finance', 'DocumentSequence')
+
+    highest = {}
+    numbers = (
+        list(Invoice.objects.values_list('invoice_number', flat=True).iterator())
+        + list(Receipt.objects.values_list('receipt_number', flat=True).iterator())
+    )
+    for number in numbers:
+        parts = number.split('-')
+        if len(parts) != 3 or not parts[2].isdigit():
+            continue
+        key = (parts[0], parts[1])
+        highest[key] = max(highest.get(key, 0), int(parts[2]))
+
+    DocumentSequence.objects.bulk_create([
+        DocumentSequence(prefix=prefix, period=period, last_value=value)
+        for (prefix, period), value in highest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10)),
+                ('period', models.CharField(max_length=10)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('prefix', 'period')},
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
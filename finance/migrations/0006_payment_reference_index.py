@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_payment_allocation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='transaction_reference',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_payment_reference_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MobileMoneyCallback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='MPESA', max_length=20)),
+                ('transaction_id', models.CharField(max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('account_reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('payer_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('transaction_time', models.DateTimeField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('RECEIVED', 'Received'), ('PROCESSING', 'Processing'), ('PROCESSED', 'Processed'), ('DUPLICATE', 'Duplicate'), ('UNMATCHED', 'Unmatched'), ('FAILED', 'Failed')], default='RECEIVED', max_length=20)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='callback', to='finance.payment')),
+            ],
+            options={
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['status', 'received_at'], name='finance_mob_status_5200e4_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'transaction_id'), name='unique_provider_transaction')],
+            },
+        ),
+    ]
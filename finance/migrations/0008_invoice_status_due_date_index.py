@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_mobile_money_callback'),
+        ('tenants', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'due_date'], name='finance_inv_status_0e2dc8_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_invoice_status_due_date_index'),
+        ('properties', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LateFeePolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fee_type', models.CharField(choices=[('FLAT', 'Flat Fee'), ('PERCENT', 'Percentage of Rent'), ('DAILY_PERCENT', 'Daily Percentage of Rent')], default='FLAT', max_length=20)),
+                ('value', models.DecimalField(decimal_places=2, help_text='Flat amount, or percentage of rent for percentage policies', max_digits=10)),
+                ('cap', models.DecimalField(blank=True, decimal_places=2, help_text='Maximum total late fee per invoice', max_digits=10, null=True)),
+                ('grace_days', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('building', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='late_fee_policy', to='properties.property')),
+            ],
+            options={
+                'verbose_name_plural': 'Late fee policies',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceLineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('LATE_FEE', 'Late Fee'), ('OTHER', 'Other')], default='OTHER', max_length=20)),
+                ('description', models.CharField(max_length=200)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('accrued_on', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='finance.invoice')),
+            ],
+            options={
+                'ordering': ['accrued_on', 'pk'],
+                'unique_together': {('invoice', 'kind', 'accrued_on')},
+            },
+        ),
+    ]
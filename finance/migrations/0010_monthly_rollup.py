@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:03
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    """Aggregate existing invoices and payments into the new table"""
+    Invoice = apps.get_model('finance', 'Invoice')
+    Payment = apps.get_model('finance', 'Payment')
+    MonthlyRollup = apps.get_model('finance', 'MonthlyRollup')
+
+    def money(value):
+        return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+
+    rollups = []
+    invoices = (
+        Invoice.objects.annotate(bucket=TruncMonth('month'))
+        .values('tenant__unit__building', 'bucket', 'status')
+        .annotate(rows=Count('pk'), invoiced=Sum('total_amount'), collected=Sum('amount_paid'), outstanding=Sum('balance'))
+        .order_by()
+    )
+    for row in invoices:
+        rollups.append(MonthlyRollup(
+            building_id=row['tenant__unit__building'], month=row['bucket'], kind='INVOICE',
+            status=row['status'], count=row['rows'], invoiced=money(row['invoiced']),
+            collected=money(row['collected']), outstanding=money(row['outstanding']),
+        ))
+    payments = (
+        Payment.objects.annotate(bucket=TruncMonth('payment_date'))
+        .values('tenant__unit__building', 'bucket', 'payment_method', 'status')
+        .annotate(rows=Count('pk'), collected=Sum('amount'))
+        .order_by()
+    )
+    for row in payments:
+        rollups.append(MonthlyRollup(
+            building_id=row['tenant__unit__building'], month=row['bucket'], kind='PAYMENT',
+            payment_method=row['payment_method'], status=row['status'], count=row['rows'],
+            collected=money(row['collected']),
+        ))
+    MonthlyRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_late_fees'),
+        ('properties', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('kind', models.CharField(choices=[('INVOICE', 'Invoice'), ('PAYMENT', 'Payment')], max_length=10)),
+                ('payment_method', models.CharField(blank=True, default='', max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollups', to='properties.property')),
+            ],
+            options={
+                'ordering': ['-month', 'building', 'kind'],
+                'indexes': [models.Index(fields=['month', 'kind'], name='finance_mon_month_ab86af_idx')],
+                'constraints': [models.UniqueConstraint(fields=('building', 'month', 'kind', 'payment_method', 'status'), name='unique_monthly_rollup')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_monthly_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('INVOICE', 'Invoice'), ('RECEIPT', 'Receipt')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('output', models.CharField(choices=[('pdf', 'PDF'), ('html', 'HTML')], max_length=10)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('content_type', models.CharField(max_length=100)),
+                ('content', models.BinaryField()),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-rendered_at'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'output'), name='unique_rendered_document')],
+            },
+        ),
+    ]
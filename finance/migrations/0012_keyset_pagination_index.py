@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_rendered_document'),
+        ('tenants', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['month', 'id'], name='finance_inv_month_37cc5d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='finance_pay_payment_376d9a_idx'),
+        ),
+    ]
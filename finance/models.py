@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
 from django.conf import settings
 from tenants.models import Tenant
+from properties.models import Property
 from decimal import Decimal
 
 
@@ -42,12 +44,25 @@ class Invoice(models.Model):
     class Meta:
         ordering = ['-month']
         unique_together = ['tenant', 'month']
+        indexes = [
+            models.Index(fields=['status', 'due_date']),
+            # Keyset pagination key
+            models.Index(fields=['month', 'id']),
+        ]
     
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.tenant.user.get_full_name()}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the rollup bucket as loaded, in case save() moves the invoice
+        instance._loaded_bucket = (instance.__dict__.get('tenant_id'), instance.__dict__.get('month'))
+        return instance
+    
     def save(self, *args, **kwargs):
         from django.utils import timezone
+        from .rollups import touch
         # Calculate totals
         self.subtotal = (
             self.rent_amount + 
@@ -65,6 +80,48 @@ class Invoice(models.Model):
             self.status = 'OVERDUE'
         
         super().save(*args, **kwargs)
+        touch(tenant_months=[getattr(self, '_loaded_bucket', (None, None)), (self.tenant_id, self.month)])
+        self._loaded_bucket = (self.tenant_id, self.month)
+    
+    def delete(self, *args, **kwargs):
+        from .rollups import touch
+        with transaction.atomic():
+            touch(tenant_months=[(self.tenant_id, self.month)])
+            return super().delete(*args, **kwargs)
+    
+    @staticmethod
+    def paid_amount_updates(delta):
+        """
+        UPDATE kwargs that add ``delta`` to amount_paid and re-derive the
+        balance and status in the same statement, so concurrent payments
+        against one invoice cannot overwrite each other.
+        """
+        from django.utils import timezone
+        amount_paid = F('amount_paid') + delta
+        return {
+            'amount_paid': amount_paid,
+            'balance': F('total_amount') - amount_paid,
+            'status': Case(
+                When(status='CANCELLED', then=F('status')),
+                When(total_amount__lte=amount_paid, then=Value('PAID')),
+                When(status='PAID', due_date__lt=timezone.now().date(), then=Value('OVERDUE')),
+                When(status='PAID', then=Value('PENDING')),
+                default=F('status'),
+            ),
+            'updated_at': timezone.now(),
+        }
+    
+    def set_amount_paid(self, amount_paid):
+        """In-memory counterpart of paid_amount_updates() for bulk writers"""
+        from django.utils import timezone
+        self.amount_paid = amount_paid
+        self.balance = self.total_amount - amount_paid
+        if self.status == 'CANCELLED':
+            return
+        if amount_paid >= self.total_amount:
+            self.status = 'PAID'
+        elif self.status == 'PAID':
+            self.status = 'OVERDUE' if self.due_date < timezone.now().date() else 'PENDING'
 
 
 class Payment(models.Model):
@@ -98,7 +155,7 @@ class Payment(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
     payment_date = models.DateField()
-    transaction_reference = models.CharField(max_length=100, blank=True, null=True)
+    transaction_reference = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='COMPLETED')
     notes = models.TextField(blank=True, null=True)
     
@@ -114,24 +171,111 @@ class Payment(models.Model):
     
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['payment_date', 'id']),
+        ]
     
     def __str__(self):
         return f"Payment {self.id} - {self.tenant.user.get_full_name()} - {self.amount}"
     
+    def _contribution(self):
+        """The (invoice_id, amount) this payment adds to a linked invoice's amount_paid"""
+        if self.invoice_id and self.status == 'COMPLETED':
+            return (self.invoice_id, Decimal(str(self.amount)))
+        return (None, Decimal('0'))
+    
+    def _is_allocatable(self):
+        """Unlinked completed payments are spread over open invoices instead"""
+        return self.invoice_id is None and self.status == 'COMPLETED'
+    
+    def _stored_state(self):
+        """The payment's (invoice_id, amount, status, tenant_id, payment_date) as stored, locking the row"""
+        if self._state.adding:
+            return None
+        return (
+            Payment.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list('invoice_id', 'amount', 'status', 'tenant_id', 'payment_date')
+            .first()
+        )
+    
+    @staticmethod
+    def _stored_contribution(stored):
+        if stored and stored[0] and stored[2] == 'COMPLETED':
+            return (stored[0], stored[1])
+        return (None, Decimal('0'))
+    
+    @staticmethod
+    def _shift_invoices(previous, current):
+        """Move amount_paid from the previous contribution to the current one"""
+        from .rollups import touch
+        deltas = {}
+        if previous[0]:
+            deltas[previous[0]] = deltas.get(previous[0], Decimal('0')) - previous[1]
+        if current[0]:
+            deltas[current[0]] = deltas.get(current[0], Decimal('0')) + current[1]
+        for invoice_id, delta in deltas.items():
+            if delta:
+                Invoice.objects.filter(pk=invoice_id).update(**Invoice.paid_amount_updates(delta))
+                touch(invoices=[invoice_id])
+    
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        
-        # Update invoice if linked
-        if self.invoice and self.status == 'COMPLETED':
-            invoice = self.invoice
-            total_paid = invoice.payments.filter(status='COMPLETED').aggregate(
-                total=models.Sum('amount')
-            )['total'] or Decimal('0')
-            invoice.amount_paid = total_paid
-            invoice.balance = invoice.total_amount - invoice.amount_paid
-            if invoice.amount_paid >= invoice.total_amount:
-                invoice.status = 'PAID'
-            invoice.save()
+        from .allocation import allocate_open_credit, allocate_payments, release_allocations
+        from .rollups import touch
+        with transaction.atomic():
+            stored = self._stored_state()
+            previous = self._stored_contribution(stored)
+            was_allocatable = bool(stored) and stored[0] is None and stored[2] == 'COMPLETED'
+            super().save(*args, **kwargs)
+            touch(tenant_months=[stored[3:] if stored else (None, None), (self.tenant_id, self.payment_date)])
+            
+            # Only touch invoices when the amount, status or link changed
+            current = self._contribution()
+            if current != previous:
+                self._shift_invoices(previous, current)
+            
+            moved = bool(stored) and stored[3] != self.tenant_id
+            allocation_changed = (
+                was_allocatable != self._is_allocatable()
+                or (was_allocatable and (moved or stored[1] != Decimal(str(self.amount))))
+            )
+            if allocation_changed:
+                if was_allocatable:
+                    release_allocations([self.pk])
+                if self._is_allocatable():
+                    allocate_payments([self])
+                if was_allocatable and moved:
+                    # The invoices this payment settled may take other credit of the previous tenant
+                    allocate_open_credit([stored[3]])
+    
+    def delete(self, *args, **kwargs):
+        from .allocation import release_allocations
+        from .rollups import touch
+        with transaction.atomic():
+            stored = self._stored_state()
+            release_allocations([self.pk])
+            result = super().delete(*args, **kwargs)
+            self._shift_invoices(self._stored_contribution(stored), (None, Decimal('0')))
+            touch(tenant_months=[stored[3:] if stored else (self.tenant_id, self.payment_date)])
+        return result
+
+
+class PaymentAllocation(models.Model):
+    """
+    Portion of an unlinked payment applied to one of the tenant's open invoices
+    """
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='allocations')
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['invoice__month', 'pk']
+        unique_together = ['payment', 'invoice']
+    
+    def __str__(self):
+        return f"{self.amount} of payment {self.payment_id} to invoice {self.invoice_id}"
 
 
 class Receipt(models.Model):
@@ -147,3 +291,222 @@ class Receipt(models.Model):
     
     def __str__(self):
         return f"Receipt {self.receipt_number} - {self.payment.tenant.user.get_full_name()}"
+
+
+class MobileMoneyCallback(models.Model):
+    """
+    Payment confirmation pushed by a mobile money provider.
+
+    The row is stored as soon as the callback arrives; turning it into a
+    Payment happens in the background. The unique provider transaction id
+    makes provider retries harmless.
+    """
+    STATUS_CHOICES = [
+        ('RECEIVED', 'Received'),
+        ('PROCESSING', 'Processing'),
+        ('PROCESSED', 'Processed'),
+        ('DUPLICATE', 'Duplicate'),
+        ('UNMATCHED', 'Unmatched'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    provider = models.CharField(max_length=20, default='MPESA')
+    transaction_id = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    phone = models.CharField(max_length=20, blank=True, null=True)
+    account_reference = models.CharField(max_length=100, blank=True, null=True)
+    payer_name = models.CharField(max_length=200, blank=True, null=True)
+    transaction_time = models.DateTimeField(blank=True, null=True)
+    payload = models.JSONField(default=dict)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RECEIVED')
+    payment = models.OneToOneField(
+        Payment,
+        on_delete=models.SET_NULL,
+        related_name='callback',
+        blank=True,
+        null=True
+    )
+    error = models.TextField(blank=True, null=True)
+    
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'transaction_id'], name='unique_provider_transaction'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider} {self.transaction_id} ({self.get_status_display()})"
+
+
+class LateFeePolicy(models.Model):
+    """
+    Late fee rules applied to overdue rent for a property
+    """
+    FEE_TYPE_CHOICES = [
+        ('FLAT', 'Flat Fee'),
+        ('PERCENT', 'Percentage of Rent'),
+        ('DAILY_PERCENT', 'Daily Percentage of Rent'),
+    ]
+    
+    building = models.OneToOneField(Property, on_delete=models.CASCADE, related_name='late_fee_policy')
+    fee_type = models.CharField(max_length=20, choices=FEE_TYPE_CHOICES, default='FLAT')
+    value = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Flat amount, or percentage of rent for percentage policies"
+    )
+    cap = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Maximum total late fee per invoice"
+    )
+    grace_days = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Late fee policies'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.building.name} - {self.get_fee_type_display()} {self.value}"
+    
+    @staticmethod
+    def fee_due(fee_type, value, cap, rent_amount, days_late):
+        """Total late fee owed on an invoice that is ``days_late`` days past grace"""
+        if days_late <= 0:
+            return Decimal('0')
+        if fee_type == 'FLAT':
+            fee = value
+        elif fee_type == 'PERCENT':
+            fee = rent_amount * value / 100
+        else:
+            fee = rent_amount * value / 100 * days_late
+        if cap is not None:
+            fee = min(fee, cap)
+        return fee.quantize(Decimal('0.01'))
+
+
+class InvoiceLineItem(models.Model):
+    """
+    Additional charge on an invoice, included in its other_charges
+    """
+    KIND_CHOICES = [
+        ('LATE_FEE', 'Late Fee'),
+        ('OTHER', 'Other'),
+    ]
+    
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='line_items')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='OTHER')
+    description = models.CharField(max_length=200)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    accrued_on = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['accrued_on', 'pk']
+        unique_together = ['invoice', 'kind', 'accrued_on']
+    
+    def __str__(self):
+        return f"{self.invoice.invoice_number} - {self.description} {self.amount}"
+
+
+class DocumentSequence(models.Model):
+    """
+    Counter row backing invoice and receipt numbering, one per prefix and period
+    """
+    prefix = models.CharField(max_length=10)
+    period = models.CharField(max_length=10)
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['prefix', 'period']
+    
+    def __str__(self):
+        return f"{self.prefix}-{self.period}: {self.last_value}"
+
+
+class MonthlyRollup(models.Model):
+    """
+    Pre-aggregated invoice and payment totals per property, month and status
+    """
+    KIND_CHOICES = [
+        ('INVOICE', 'Invoice'),
+        ('PAYMENT', 'Payment'),
+    ]
+    
+    building = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='financial_rollups')
+    month = models.DateField(help_text="First day of the month")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Blank for invoice rows
+    payment_method = models.CharField(max_length=20, blank=True, default='')
+    # Invoice status for invoice rows, payment status for payment rows
+    status = models.CharField(max_length=20)
+    
+    count = models.PositiveIntegerField(default=0)
+    invoiced = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-month', 'building', 'kind']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['building', 'month', 'kind', 'payment_method', 'status'],
+                name='unique_monthly_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'kind']),
+        ]
+    
+    def __str__(self):
+        return f"{self.building.name} {self.month:%Y-%m} {self.kind} {self.payment_method or self.status}"
+
+
+class RenderedDocument(models.Model):
+    """
+    Cached PDF/HTML rendering of an invoice or receipt.
+
+    One row per document and output format; ``content_hash`` covers every
+    value printed on the document, so a changed invoice or payment simply
+    no longer matches and is re-rendered on the next request.
+    """
+    KIND_CHOICES = [
+        ('INVOICE', 'Invoice'),
+        ('RECEIPT', 'Receipt'),
+    ]
+    
+    OUTPUT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('html', 'HTML'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    output = models.CharField(max_length=10, choices=OUTPUT_CHOICES)
+    content_hash = models.CharField(max_length=64)
+    content_type = models.CharField(max_length=100)
+    content = models.BinaryField()
+    rendered_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-rendered_at']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'output'], name='unique_rendered_document'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} ({self.output})"
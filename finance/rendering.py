@@ -0,0 +1,136 @@
+"""
+Rendering of invoice and receipt documents to HTML and PDF.
+
+Everything here works on plain context dicts (see finance.documents), so it
+can run in worker processes without touching the database.
+"""
+import hashlib
+import json
+
+
+# Bump when the templates or the PDF layout change, to invalidate cached documents
+TEMPLATE_VERSION = 1
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+LINE_HEIGHT = 16
+VALUE_X = 360
+
+
+def content_hash(kind, output, context):
+    """SHA-256 over everything that affects the rendered bytes"""
+    payload = json.dumps([TEMPLATE_VERSION, kind, output, context], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_html(kind, context):
+    from django.template.loader import render_to_string
+    return render_to_string(f'finance/{kind.lower()}.html', context).encode()
+
+
+def _pdf_text(value):
+    # The base-14 fonts use WinAnsi; anything outside latin-1 becomes '?'
+    text = str(value).encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _layout(kind, context):
+    """The document as (style, left, right) rows"""
+    title = 'INVOICE' if kind == 'INVOICE' else 'RECEIPT'
+    rows = [('title', title, context['number']), ('gap', '', '')]
+    rows += [('text', label, value) for label, value in context['header']]
+    rows.append(('rule', '', ''))
+    rows += [('text', label, value) for label, value in context['lines']]
+    rows.append(('rule', '', ''))
+    rows += [('bold', label, value) for label, value in context['totals']]
+    if context.get('footer'):
+        rows += [('gap', '', ''), ('small', context['footer'], '')]
+    return rows
+
+
+def _page_stream(rows):
+    commands = []
+    y = PAGE_HEIGHT - MARGIN
+    for style, left, right in rows:
+        if style == 'rule':
+            commands.append(f'{MARGIN} {y + 6} m {PAGE_WIDTH - MARGIN} {y + 6} l S')
+            y -= LINE_HEIGHT / 2
+            continue
+        if style == 'gap':
+            y -= LINE_HEIGHT / 2
+            continue
+        font, size = {'title': ('F2', 18), 'bold': ('F2', 11), 'small': ('F1', 8)}.get(style, ('F1', 11))
+        commands.append(f'BT /{font} {size} Tf {MARGIN} {y} Td ({_pdf_text(left)}) Tj ET')
+        if right != '':
+            commands.append(f'BT /{font} {size} Tf {VALUE_X} {y} Td ({_pdf_text(right)}) Tj ET')
+        y -= LINE_HEIGHT + (10 if style == 'title' else 0)
+    return '\n'.join(commands).encode('latin-1')
+
+
+def render_pdf(kind, context):
+    """
+    A text-only PDF in the standard Helvetica fonts.
+
+    Small enough to write by hand, which keeps a PDF library out of the
+    dependencies; long documents flow onto further pages.
+    """
+    rows = _layout(kind, context)
+    per_page = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT - 2
+    pages = [rows[i:i + per_page] for i in range(0, len(rows), per_page)] or [[]]
+
+    # 1 catalog, 2 page tree, 3-4 fonts, then a page and a content stream per page
+    objects = {
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        4: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    }
+    kids = []
+    for index, page_rows in enumerate(pages):
+        page_id, stream_id = 5 + 2 * index, 6 + 2 * index
+        stream = _page_stream(page_rows)
+        objects[page_id] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {stream_id} 0 R >>'
+        ).encode()
+        objects[stream_id] = b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+        kids.append(f'{page_id} 0 R')
+    objects[1] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'.encode()
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for number in sorted(objects):
+        out += b'%010d 00000 n \n' % offsets[number]
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+RENDERERS = {
+    'pdf': ('application/pdf', render_pdf),
+    'html': ('text/html; charset=utf-8', render_html),
+}
+
+
+def render(kind, output, context):
+    """Return (content_hash, content_type, bytes) for a document"""
+    content_type, renderer = RENDERERS[output]
+    return content_hash(kind, output, context), content_type, renderer(kind, context)
+
+
+def render_job(job):
+    """Process pool entry point: (object_id, kind, output, context) -> rendered result"""
+    object_id, kind, output, context = job
+    digest, content_type, content = render(kind, output, context)
+    return object_id, digest, content_type, content
+
+
+def init_worker(settings_module):
+    """Process pool initializer; HTML templates need Django set up when workers are spawned"""
+    import os
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
@@ -0,0 +1,198 @@
+"""
+Reporting queries for the finance app
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils.dateparse import parse_date
+
+from .models import Invoice, Payment
+
+
+CENTS = Decimal('0.01')
+
+AGING_BUCKETS = ('current', 'days_0_30', 'days_31_60', 'days_61_90', 'days_over_90')
+AGING_GROUPS = {
+    'property': {
+        'id': 'tenant__unit__building',
+        'name': 'tenant__unit__building__name',
+    },
+    'tenant': {
+        'id': 'tenant',
+        'first_name': 'tenant__user__first_name',
+        'last_name': 'tenant__user__last_name',
+        'unit': 'tenant__unit__unit_number',
+        'property': 'tenant__unit__building__name',
+    },
+}
+
+
+def _money(value):
+    # SQLite hands back floats for arithmetic on decimal columns
+    if value is None:
+        return Decimal('0.00')
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def _date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+
+class TenantStatement:
+    """
+    A tenant's ledger: invoices as debits and completed payments as credits.
+
+    The running balance is computed by the database with a window function
+    over the whole history, so rows inside the requested range carry the
+    correct balance without replaying earlier entries in Python. Supports
+    ``count()`` and slicing so it can be handed to DRF's paginator.
+    """
+    COLUMNS = ('entry_date', 'entry_type', 'reference', 'description', 'debit', 'credit', 'balance')
+
+    def __init__(self, tenant_id, start=None, end=None):
+        self.tenant_id = tenant_id
+        self.start = start or date(1900, 1, 1)
+        self.end = end or date(9999, 12, 31)
+        self._count = None
+
+    def _entries_sql(self):
+        invoices = connection.ops.quote_name(Invoice._meta.db_table)
+        payments = connection.ops.quote_name(Payment._meta.db_table)
+        return f"""
+            SELECT month AS entry_date, 'INVOICE' AS entry_type, 0 AS sort_order, id AS entry_id,
+                   invoice_number AS reference, 'Invoice for ' || invoice_number AS description,
+                   total_amount AS debit, 0 AS credit
+            FROM {invoices}
+            WHERE tenant_id = %s AND status <> 'CANCELLED'
+            UNION ALL
+            SELECT payment_date, 'PAYMENT', 1, id,
+                   COALESCE(transaction_reference, ''), 'Payment (' || payment_method || ')',
+                   0, amount
+            FROM {payments}
+            WHERE tenant_id = %s AND status = 'COMPLETED'
+        """
+
+    def _params(self, *extra):
+        return [self.tenant_id, self.tenant_id, *extra]
+
+    def _range(self):
+        adapt = connection.ops.adapt_datefield_value
+        return adapt(self.start), adapt(self.end)
+
+    def _rows_sql(self):
+        return f"""
+            SELECT entry_date, entry_type, reference, description, debit, credit, balance
+            FROM (
+                SELECT entries.*,
+                       SUM(debit - credit) OVER (
+                           ORDER BY entry_date, sort_order, entry_id
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                       ) AS balance
+                FROM ({self._entries_sql()}) entries
+            ) ledger
+            WHERE entry_date >= %s AND entry_date <= %s
+            ORDER BY entry_date, sort_order, entry_id
+        """
+
+    def _row(self, values):
+        row = dict(zip(self.COLUMNS, values))
+        row['entry_date'] = _date(row['entry_date'])
+        for key in ('debit', 'credit', 'balance'):
+            row[key] = _money(row[key])
+        return row
+
+    def summary(self):
+        """Opening balance, closing balance and number of entries in the range"""
+        start, end = self._range()
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT SUM(CASE WHEN entry_date < %s THEN debit - credit ELSE 0 END),
+                       SUM(CASE WHEN entry_date <= %s THEN debit - credit ELSE 0 END),
+                       SUM(CASE WHEN entry_date >= %s AND entry_date <= %s THEN 1 ELSE 0 END)
+                FROM ({self._entries_sql()}) entries
+            """, [start, end, start, end, *self._params()])
+            opening, closing, count = cursor.fetchone()
+        self._count = count or 0
+        return {
+            'opening_balance': _money(opening),
+            'closing_balance': _money(closing),
+            'count': self._count,
+        }
+
+    def count(self):
+        if self._count is None:
+            self.summary()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = (index.stop - offset) if index.stop is not None else 2 ** 62
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self._rows_sql() + ' LIMIT %s OFFSET %s',
+                self._params(*self._range(), limit, offset)
+            )
+            return [self._row(values) for values in cursor.fetchall()]
+
+    def iterate(self, chunk_size=1000):
+        """Yield every row in the range from a single query, chunk by chunk"""
+        with connection.cursor() as cursor:
+            cursor.execute(self._rows_sql(), self._params(*self._range()))
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                for values in chunk:
+                    yield self._row(values)
+
+
+def aging_report(invoices, as_of=None, group='property'):
+    """
+    Outstanding balances bucketed by days past due, one row per property or tenant.
+
+    ``invoices`` is an already scoped Invoice queryset. The buckets are
+    computed with conditional SUMs in a single grouped query; ``current``
+    holds balances that are not yet due.
+    """
+    if group not in AGING_GROUPS:
+        raise ValueError(f"group must be one of: {', '.join(AGING_GROUPS)}")
+    as_of = as_of or date.today()
+    d30, d60, d90 = (as_of - timedelta(days=days) for days in (30, 60, 90))
+    buckets = {
+        'current': Q(due_date__gte=as_of),
+        'days_0_30': Q(due_date__lt=as_of, due_date__gte=d30),
+        'days_31_60': Q(due_date__lt=d30, due_date__gte=d60),
+        'days_61_90': Q(due_date__lt=d60, due_date__gte=d90),
+        'days_over_90': Q(due_date__lt=d90),
+    }
+    fields = AGING_GROUPS[group]
+    rows = (
+        invoices.filter(status__in=('PENDING', 'OVERDUE'), balance__gt=0)
+        .values(*fields.values())
+        .annotate(
+            invoice_count=Count('pk'),
+            total=Sum('balance'),
+            **{name: Sum('balance', filter=condition) for name, condition in buckets.items()}
+        )
+        .order_by('-total')
+    )
+
+    results = []
+    totals = dict.fromkeys(AGING_BUCKETS + ('total',), Decimal('0.00'))
+    totals['invoice_count'] = 0
+    for row in rows:
+        result = {key: row[lookup] for key, lookup in fields.items()}
+        result['invoice_count'] = row['invoice_count']
+        for key in AGING_BUCKETS + ('total',):
+            result[key] = _money(row[key])
+            totals[key] += result[key]
+        totals['invoice_count'] += row['invoice_count']
+        results.append(result)
+    return {'as_of': as_of, 'group': group, 'totals': totals, 'results': results}
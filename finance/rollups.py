@@ -0,0 +1,266 @@
+"""
+Monthly financial rollups backing the dashboard statistics and charts
+"""
+import threading
+import time
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from tenants.models import Tenant
+from .models import Invoice, MonthlyRollup, Payment
+from .reports import _money
+
+
+ROLLUP_FIELDS = ('count', 'invoiced', 'collected', 'outstanding')
+ROLLUP_KEY = ('building', 'month', 'kind', 'payment_method', 'status')
+MAX_SERIES_MONTHS = 240
+
+_pending = threading.local()
+
+
+def _month(value):
+    if isinstance(value, str):
+        value = parse_date(value)
+    return value.replace(day=1) if value else None
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _drain():
+    """Take this thread's pending marks, leaving empty sets behind"""
+    marks = tuple(getattr(_pending, name, set()) for name in ('tenant_months', 'invoices', 'buckets'))
+    _pending.tenant_months, _pending.invoices, _pending.buckets = set(), set(), set()
+    return marks
+
+
+def touch(tenant_months=(), invoices=(), buckets=()):
+    """
+    Mark rollup buckets as stale; they are recomputed when the transaction commits.
+
+    Buckets can be given as (tenant_id, date) pairs, invoice ids or
+    (building_id, date) pairs. Tenants and invoices are resolved to their
+    property in bulk at commit time, so callers never pay for the lookup.
+    """
+    if not hasattr(_pending, 'tenant_months'):
+        _drain()
+    _pending.tenant_months.update(
+        (tenant_id, _month(day)) for tenant_id, day in tenant_months if tenant_id and day
+    )
+    _pending.invoices.update(pk for pk in invoices if pk)
+    _pending.buckets.update(
+        (building_id, _month(day)) for building_id, day in buckets if building_id and day
+    )
+    # Every mark registers a flush; the first one to run drains the set. If the
+    # transaction rolls back the marks stay and are refreshed by the next flush.
+    transaction.on_commit(flush)
+
+
+def touch_invoices(invoices):
+    """Mark the buckets of every invoice in a queryset, e.g. before a mass UPDATE"""
+    touch(buckets=invoices.values_list('tenant__unit__building', 'month').distinct().order_by())
+
+
+def touch_tenant(tenant_id, buildings):
+    """Mark every month of a tenant's invoices and payments under each of ``buildings``, e.g. when they move"""
+    months = set(Invoice.objects.filter(tenant_id=tenant_id).values_list('month', flat=True))
+    months.update(Payment.objects.filter(tenant_id=tenant_id).values_list('payment_date', flat=True))
+    touch(buckets=[(building_id, month) for building_id in set(buildings) for month in months])
+
+
+def flush():
+    """Recompute every bucket marked since the last flush"""
+    tenant_months, invoices, buckets = _drain()
+    if not (tenant_months or invoices or buckets):
+        return
+
+    if tenant_months:
+        buildings = dict(
+            Tenant.objects.filter(pk__in={tenant_id for tenant_id, _ in tenant_months})
+            .values_list('pk', 'unit__building')
+        )
+        buckets.update(
+            (buildings[tenant_id], month) for tenant_id, month in tenant_months if tenant_id in buildings
+        )
+    if invoices:
+        buckets.update(
+            (building_id, _month(month)) for building_id, month in
+            Invoice.objects.filter(pk__in=invoices).values_list('tenant__unit__building', 'month')
+        )
+    refresh(buckets)
+
+
+def _aggregate(buildings=None, months=None):
+    """
+    Build MonthlyRollup rows from the invoice and payment tables.
+
+    With ``buildings`` and ``months`` only the cross product of the two is
+    computed: two grouped queries over an indexed date range.
+    """
+    invoices = Invoice.objects.all()
+    payments = Payment.objects.all()
+    if buildings is not None:
+        invoices = invoices.filter(tenant__unit__building__in=buildings)
+        payments = payments.filter(tenant__unit__building__in=buildings)
+    if months is not None:
+        start, end = min(months), _next_month(max(months))
+        invoices = invoices.filter(month__gte=start, month__lt=end)
+        payments = payments.filter(payment_date__gte=start, payment_date__lt=end)
+
+    invoice_rows = (
+        invoices.annotate(bucket=TruncMonth('month'))
+        .values('tenant__unit__building', 'bucket', 'status')
+        .annotate(
+            rows=Count('pk'),
+            total_invoiced=Sum('total_amount'),
+            total_collected=Sum('amount_paid'),
+            total_outstanding=Sum('balance'),
+        )
+        .order_by()
+    )
+    payment_rows = (
+        payments.annotate(bucket=TruncMonth('payment_date'))
+        .values('tenant__unit__building', 'bucket', 'payment_method', 'status')
+        .annotate(rows=Count('pk'), total_collected=Sum('amount'))
+        .order_by()
+    )
+
+    rollups = []
+    for kind, rows in (('INVOICE', invoice_rows), ('PAYMENT', payment_rows)):
+        for row in rows.iterator():
+            month = _month(row['bucket'])
+            if months is not None and month not in months:
+                continue
+            rollups.append(MonthlyRollup(
+                building_id=row['tenant__unit__building'],
+                month=month,
+                kind=kind,
+                payment_method=row.get('payment_method', ''),
+                status=row['status'],
+                count=row['rows'],
+                invoiced=_money(row.get('total_invoiced')),
+                collected=_money(row['total_collected']),
+                outstanding=_money(row.get('total_outstanding')),
+            ))
+    return rollups
+
+
+def refresh(buckets):
+    """Recompute the given (building_id, month) buckets from the source tables"""
+    if not buckets:
+        return 0
+    buildings = {building_id for building_id, _ in buckets}
+    months = {month for _, month in buckets}
+    with transaction.atomic():
+        MonthlyRollup.objects.filter(building__in=buildings, month__in=months).delete()
+        rollups = _aggregate(buildings, months)
+        # A concurrent refresh of the same bucket may have inserted first
+        MonthlyRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=ROLLUP_KEY,
+            update_fields=ROLLUP_FIELDS,
+        )
+    return len(rollups)
+
+
+def rebuild(owner=None, batch_size=1000):
+    """Replace the rollups of every property (or one landlord's) from scratch"""
+    started = time.perf_counter()
+    buildings = None
+    if owner is not None:
+        buildings = list(owner.properties.values_list('pk', flat=True))
+    with transaction.atomic():
+        existing = MonthlyRollup.objects.all()
+        if buildings is not None:
+            existing = existing.filter(building__in=buildings)
+        deleted, _ = existing.delete()
+        rollups = MonthlyRollup.objects.bulk_create(_aggregate(buildings), batch_size=batch_size)
+    return {
+        'deleted': deleted,
+        'created': len(rollups),
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def for_user(user):
+    """Rollups a user may see; None for users the rollups cannot scope (tenants)"""
+    if user.is_landlord:
+        return MonthlyRollup.objects.filter(building__owner=user)
+    elif user.is_staff:
+        return MonthlyRollup.objects.all()
+    return None
+
+
+def invoice_statistics(rollups):
+    """InvoiceViewSet.statistics figures from one aggregate over the rollups"""
+    invoice = Q(kind='INVOICE')
+    totals = rollups.aggregate(
+        total_invoiced=Sum('invoiced', filter=invoice),
+        total_paid=Sum('collected', filter=invoice),
+        total_outstanding=Sum('outstanding', filter=invoice),
+        pending_count=Sum('count', filter=invoice & Q(status='PENDING')),
+        overdue_count=Sum('count', filter=invoice & Q(status='OVERDUE')),
+        paid_count=Sum('count', filter=invoice & Q(status='PAID')),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def payment_statistics(rollups, month=None):
+    """PaymentViewSet.statistics figures from one aggregate over the rollups"""
+    month = _month(month or date.today())
+    payment = Q(kind='PAYMENT')
+    completed = payment & Q(status='COMPLETED')
+    totals = rollups.aggregate(
+        total_received=Sum('collected', filter=completed),
+        monthly_collection=Sum('collected', filter=completed & Q(month=month)),
+        total_payments=Sum('count', filter=payment),
+        completed_count=Sum('count', filter=completed),
+        pending_count=Sum('count', filter=payment & Q(status='PENDING')),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def monthly_series(rollups, start, end):
+    """
+    Invoiced, collected and outstanding totals per month from ``start`` to ``end``.
+
+    Months without activity are included with zeros so charts get a
+    continuous axis. Cancelled invoices are left out of the invoiced total.
+    """
+    start, end = _month(start), _month(end)
+    invoice = Q(kind='INVOICE') & ~Q(status='CANCELLED')
+    collected = Q(kind='PAYMENT', status='COMPLETED')
+    rows = {
+        _month(row['month']): row for row in
+        rollups.filter(month__gte=start, month__lte=end)
+        .values('month')
+        .annotate(
+            invoiced_total=Sum('invoiced', filter=invoice),
+            collected_total=Sum('collected', filter=collected),
+            outstanding_total=Sum('outstanding', filter=invoice),
+            invoice_count=Sum('count', filter=invoice),
+            payment_count=Sum('count', filter=collected),
+        )
+        .order_by('month')
+    }
+
+    series = []
+    month = start
+    while month <= end:
+        row = rows.get(month, {})
+        series.append({
+            'month': month,
+            'invoiced': _money(row.get('invoiced_total')),
+            'collected': _money(row.get('collected_total')),
+            'outstanding': _money(row.get('outstanding_total')),
+            'invoice_count': row.get('invoice_count') or 0,
+            'payment_count': row.get('payment_count') or 0,
+        })
+        month = _next_month(month)
+    return series
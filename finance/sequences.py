@@ -0,0 +1,75 @@
+"""
+Document number allocation for invoices and receipts
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentSequence
+
+
+INVOICE_PREFIX = 'INV'
+RECEIPT_PREFIX = 'RCP'
+
+
+def reserve(prefix, period, count=1):
+    """
+    Reserve ``count`` consecutive values of the (prefix, period) counter and
+    return the first one.
+
+    The counter row is bumped with a single atomic UPDATE, so concurrent
+    workers never see the same value and the cost does not depend on how many
+    documents already exist. Where the database supports UPDATE ... RETURNING
+    the whole reservation is one round-trip.
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+
+    with transaction.atomic():
+        last_value = _increment(prefix, period, count)
+        if last_value is None:
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(prefix=prefix, period=period, last_value=count)
+                return 1
+            except IntegrityError:
+                # Another worker created the row first
+                last_value = _increment(prefix, period, count)
+    return last_value - count + 1
+
+
+def _increment(prefix, period, count):
+    """Bump the counter and return its new value, or None if the row is missing"""
+    if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+        table = connection.ops.quote_name(DocumentSequence._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET last_value = last_value + %s, updated_at = %s "
+                f"WHERE prefix = %s AND period = %s RETURNING last_value",
+                [count, connection.ops.adapt_datetimefield_value(timezone.now()), prefix, period]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    rows = DocumentSequence.objects.filter(prefix=prefix, period=period)
+    if not rows.update(last_value=F('last_value') + count, updated_at=timezone.now()):
+        return None
+    return rows.values_list('last_value', flat=True).get()
+
+
+def allocate(prefix, period, count=1, width=4):
+    """Return ``count`` formatted document numbers such as INV-202501-0001"""
+    first = reserve(prefix, period, count)
+    return [f"{prefix}-{period}-{value:0{width}d}" for value in range(first, first + count)]
+
+
+def invoice_numbers(count=1, when=None):
+    """Allocate invoice numbers (INV-YYYYMM-NNNN) for the month of ``when``"""
+    when = timezone.localtime(when)
+    return allocate(INVOICE_PREFIX, when.strftime('%Y%m'), count, width=4)
+
+
+def receipt_numbers(count=1, when=None):
+    """Allocate receipt numbers (RCP-YYYYMMDD-NNNNNN) for the day of ``when``"""
+    when = timezone.localtime(when)
+    return allocate(RECEIPT_PREFIX, when.strftime('%Y%m%d'), count, width=6)
@@ -1,10 +1,21 @@
 from rest_framework import serializers
-from .models import Invoice, Payment, Receipt
-from datetime import datetime
+from .models import Invoice, Payment, Receipt, PaymentAllocation, LateFeePolicy, InvoiceLineItem
+from .allocation import allocate_open_credit
+from .sequences import invoice_numbers, receipt_numbers
+
+
+class InvoiceLineItemSerializer(serializers.ModelSerializer):
+    """Serializer for invoice line items"""
+    
+    class Meta:
+        model = InvoiceLineItem
+        fields = ('id', 'kind', 'description', 'amount', 'accrued_on', 'created_at')
+        read_only_fields = fields
 
 
 class InvoiceSerializer(serializers.ModelSerializer):
     """Serializer for Invoice model"""
+    line_items = InvoiceLineItemSerializer(many=True, read_only=True)
     tenant_name = serializers.CharField(source='tenant.user.get_full_name', read_only=True)
     tenant_phone = serializers.CharField(source='tenant.user.phone', read_only=True)
     unit_number = serializers.CharField(source='tenant.unit.unit_number', read_only=True)
@@ -13,15 +24,17 @@ class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
-        read_only_fields = ('id', 'invoice_number', 'subtotal', 'balance', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'invoice_number', 'subtotal', 'amount_paid', 'balance', 'created_at', 'updated_at')
     
     def create(self, validated_data):
         # Generate invoice number
-        today = datetime.now()
-        count = Invoice.objects.filter(created_at__year=today.year, created_at__month=today.month).count()
-        invoice_number = f"INV-{today.strftime('%Y%m')}-{count + 1:04d}"
-        validated_data['invoice_number'] = invoice_number
-        return super().create(validated_data)
+        validated_data['invoice_number'] = invoice_numbers()[0]
+        invoice = super().create(validated_data)
+        
+        # Apply any advance payments the tenant has on account
+        allocate_open_credit([invoice.tenant_id])
+        invoice.refresh_from_db()
+        return invoice
 
 
 class InvoiceListSerializer(serializers.ModelSerializer):
@@ -53,9 +66,20 @@ class ReceiptSerializer(serializers.ModelSerializer):
         }
 
 
+class PaymentAllocationSerializer(serializers.ModelSerializer):
+    """Serializer for the invoices an unlinked payment was applied to"""
+    invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True)
+    
+    class Meta:
+        model = PaymentAllocation
+        fields = ('id', 'invoice', 'invoice_number', 'amount', 'created_at')
+        read_only_fields = fields
+
+
 class PaymentSerializer(serializers.ModelSerializer):
     """Serializer for Payment model"""
     receipt = ReceiptSerializer(read_only=True)
+    allocations = PaymentAllocationSerializer(many=True, read_only=True)
     tenant_name = serializers.CharField(source='tenant.user.get_full_name', read_only=True)
     invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True, allow_null=True)
     
@@ -70,8 +94,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         payment = super().create(validated_data)
         
         # Auto-generate receipt
-        receipt_number = f"RCP-{datetime.now().strftime('%Y%m%d')}-{payment.id:06d}"
-        Receipt.objects.create(payment=payment, receipt_number=receipt_number)
+        Receipt.objects.create(payment=payment, receipt_number=receipt_numbers()[0])
         
         return payment
 
@@ -85,3 +108,28 @@ class PaymentListSerializer(serializers.ModelSerializer):
         model = Payment
         fields = ('id', 'tenant_name', 'amount', 'payment_method_display', 
                   'payment_date', 'transaction_reference', 'status')
+
+
+class LateFeePolicySerializer(serializers.ModelSerializer):
+    """Serializer for property late fee policies"""
+    property_name = serializers.CharField(source='building.name', read_only=True)
+    
+    class Meta:
+        model = LateFeePolicy
+        fields = '__all__'
+        read_only_fields = ('id', 'created_at', 'updated_at')
+    
+    def validate_building(self, building):
+        user = self.context['request'].user
+        if not user.is_staff and building.owner_id != user.id:
+            raise serializers.ValidationError("You can only set late fees on your own properties.")
+        return building
+    
+    def validate(self, attrs):
+        fee_type = attrs.get('fee_type', getattr(self.instance, 'fee_type', 'FLAT'))
+        value = attrs.get('value', getattr(self.instance, 'value', None))
+        if value is not None and value < 0:
+            raise serializers.ValidationError({"value": "Must not be negative."})
+        if fee_type != 'FLAT' and value is not None and value > 100:
+            raise serializers.ValidationError({"value": "Percentage must be at most 100."})
+        return attrs
@@ -1,3 +1,644 @@
-from django.test import TestCase
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import idempotency, testing
+from core.models import IdempotencyKey
+from properties.models import Property, Unit
+from tenants.models import Tenant
+from . import sequences
+from .allocation import reallocate_tenant
+from .billing import accrue_late_fees, generate_monthly_invoices, mark_overdue_invoices
+from .callbacks import parse_confirmation
+from .documents import receipt_contexts
+from .exports import INVOICE_COLUMNS
+from .models import DocumentSequence, Invoice, LateFeePolicy, MonthlyRollup, Payment, Receipt, RenderedDocument
+from .reports import AGING_BUCKETS, TenantStatement, aging_report
+
+
+INVOICE_ENDPOINTS = [
+    ('/api/invoices/', 2),
+    ('/api/invoices/{invoice.pk}/', 2),
+    ('/api/invoices/pending/', 1),
+    ('/api/invoices/overdue/', 1),
+    ('/api/invoices/paid/', 2),
+    ('/api/invoices/aging/', 1),
+    ('/api/invoices/export/', 1),
+    ('/api/invoices/{invoice.pk}/document/', 5),
+]
+PAYMENT_ENDPOINTS = [
+    ('/api/payments/', 2),
+    ('/api/payments/{payment.pk}/', 2),
+    ('/api/payments/recent/', 1),
+    ('/api/payments/by_tenant/?tenant_id={tenant.pk}', 4),
+    ('/api/payments/export/', 1),
+    ('/api/receipts/', 2),
+    ('/api/receipts/{receipt.pk}/', 1),
+    ('/api/receipts/export/', 1),
+    ('/api/receipts/{receipt.pk}/document/', 4),
+]
+# Landlords and staff read statistics from the monthly rollups
+PORTFOLIO_ENDPOINTS = [
+    ('/api/invoices/statistics/', 1),
+    ('/api/payments/statistics/', 1),
+    ('/api/late-fee-policies/', 2),
+    ('/api/late-fee-policies/{policy.pk}/', 1),
+    ('/api/reports/timeseries/', 1),
+]
+
+
+class FinanceQueryBudgetTests(testing.QueryBudgetTestCase):
+    """
+    Query budgets for the invoice, payment, receipt and report endpoints
+    """
+    endpoints = {
+        'landlord': INVOICE_ENDPOINTS + PAYMENT_ENDPOINTS + PORTFOLIO_ENDPOINTS,
+        'tenant': INVOICE_ENDPOINTS + PAYMENT_ENDPOINTS + [
+            ('/api/invoices/statistics/', 6),
+            ('/api/payments/statistics/', 5),
+            ('/api/late-fee-policies/', 0),
+        ],
+        'caretaker': [
+            ('/api/invoices/', 0),
+            ('/api/invoices/statistics/', 0),
+            ('/api/payments/', 0),
+            ('/api/payments/statistics/', 0),
+            ('/api/receipts/', 0),
+        ],
+        'staff': INVOICE_ENDPOINTS + PAYMENT_ENDPOINTS + PORTFOLIO_ENDPOINTS,
+    }
+
+
+class CallbackParsingTests(SimpleTestCase):
+    """
+    Malformed mobile money confirmations are rejected as invalid
+    """
+
+    def test_invalid_amounts(self):
+        for amount in ('NaN', 'Infinity', 'abc', '-5', '0'):
+            with self.subTest(amount=amount), self.assertRaises(ValueError):
+                parse_confirmation({'TransID': 'QX1', 'TransAmount': amount})
+        self.assertEqual(str(parse_confirmation({'TransID': 'QX1', 'TransAmount': '1500'})['amount']), '1500.00')
+
+
+
+class FinanceTestCase(TestCase):
+    """
+    One tenant renting a unit at 10,000 a month, with helpers for their invoices and payments
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+        cls.building = Property.objects.create(
+            name='Ledger Court', address='1 Test Road', city='Nairobi', owner=cls.users['landlord']
+        )
+        cls.unit = Unit.objects.create(building=cls.building, unit_number='L1', rent_amount=Decimal('10000'))
+        cls.tenant = Tenant.objects.create(user=cls.users['tenant'], unit=cls.unit, move_in_date=date(2026, 1, 1))
+
+    def client_for(self, role):
+        client = APIClient()
+        client.force_authenticate(self.users[role])
+        return client
+
+    def invoice(self, month, tenant=None, rent='10000', **fields):
+        tenant = tenant or self.tenant
+        return Invoice.objects.create(
+            tenant=tenant, invoice_number=f'T{tenant.pk}-{month:%Y%m}', month=month,
+            due_date=fields.pop('due_date', month + timedelta(days=4)),
+            rent_amount=Decimal(rent), total_amount=Decimal(rent), **fields
+        )
+
+    def pay(self, amount, invoice=None, tenant=None, payment_date=date(2026, 1, 3), **fields):
+        return Payment.objects.create(
+            tenant=tenant or self.tenant, invoice=invoice, amount=Decimal(amount),
+            payment_method='MOBILE_MONEY', payment_date=payment_date, **fields
+        )
+
+    def balances(self, *invoices):
+        """(amount_paid, balance, status) of each invoice as stored"""
+        return [
+            Invoice.objects.values_list('amount_paid', 'balance', 'status').get(pk=invoice.pk)
+            for invoice in invoices
+        ]
+
+
+class StatementImportTests(FinanceTestCase):
+    """
+    Statement uploads match rows to tenants and record them as payments
+    """
+
+    def upload(self, *rows, **data):
+        content = 'Date,Amount,Reference,Phone,Account\n' + ''.join(f'{row}\n' for row in rows)
+        statement = SimpleUploadedFile('statement.csv', content.encode(), content_type='text/csv')
+        response = self.client_for('landlord').post('/api/payments/import/', {'file': statement, **data})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_matching_and_deduplication(self):
+        january, february = self.invoice(date(2026, 1, 1)), self.invoice(date(2026, 2, 1))
+        self.pay('100', transaction_reference='QX0')
+        rows = [
+            f'2026-02-03,"4,000",QX1,,{february.invoice_number}',
+            '03/02/2026,2500,QX2,+254 700 000 000,',
+            '2026-02-03,2500,QX2,0700000000,',
+            '2026-02-03,100,QX0,0700000000,',
+            '2026-02-03,100,QX3,0711111111,',
+            '2026-02-03,100,,0700000000,',
+        ]
+        preview = self.upload(*rows, dry_run='true')
+        self.assertEqual(
+            [row['status'] for row in preview['results']],
+            ['matched', 'matched', 'duplicate', 'duplicate', 'unmatched', 'invalid']
+        )
+        self.assertEqual(Payment.objects.count(), 1)
+
+        result = self.upload(*rows)
+        self.assertEqual(result['counts'], {'created': 2, 'duplicate': 2, 'unmatched': 1, 'invalid': 1})
+        self.assertEqual(Payment.objects.get(transaction_reference='QX1').invoice, february)
+        self.assertEqual(Payment.objects.get(transaction_reference='QX2').payment_date, date(2026, 2, 3))
+        self.assertEqual(self.balances(january, february), [
+            (Decimal('2600'), Decimal('7400'), 'OVERDUE'),
+            (Decimal('4000'), Decimal('6000'), 'OVERDUE'),
+        ])
+        self.assertEqual(self.upload(*rows)['counts'], {'duplicate': 4, 'unmatched': 1, 'invalid': 1})
+
+    def test_non_finite_amounts_are_invalid_rows(self):
+        rows = [f'2026-01-05,{amount},QX{index},0700000000,' for index, amount in enumerate(['NaN', 'Infinity', '1e400'])]
+        for dry_run in ('true', 'false'):
+            with self.subTest(dry_run=dry_run):
+                result = self.upload(*rows, '2026-01-05,1500,QX9,0700000000,', dry_run=dry_run)
+                self.assertEqual([row['status'] for row in result['results']][:3], ['invalid'] * 3)
+                self.assertTrue(all(row['message'].startswith('Invalid amount') for row in result['results'][:3]))
+        self.assertEqual(list(Payment.objects.values_list('transaction_reference', 'amount')), [('QX9', Decimal('1500'))])
+
+
+class RollupTests(FinanceTestCase):
+    """
+    The monthly rollups behind the portfolio time series follow invoices, payments and tenancies
+    """
+
+    def series(self, **params):
+        response = self.client_for('landlord').get('/api/reports/timeseries/', {'from': '2026-01', 'to': '2026-02', **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(row['invoiced'], row['collected'], row['outstanding']) for row in response.data['results']]
+
+    def test_series_per_property(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = self.invoice(date(2026, 1, 1))
+            self.pay('4000', invoice=invoice, payment_date=date(2026, 2, 2))
+        self.assertEqual(self.series(property=self.building.pk), [
+            (Decimal('10000.00'), Decimal('0.00'), Decimal('6000.00')),
+            (Decimal('0.00'), Decimal('4000.00'), Decimal('0.00')),
+        ])
+
+    def test_invalid_property(self):
+        response = self.client_for('landlord').get('/api/reports/timeseries/', {'property': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_moving_tenant_moves_their_totals(self):
+        other = Property.objects.create(name='Annex', address='2 Test Road', city='Nairobi', owner=self.users['landlord'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pay('4000', invoice=self.invoice(date(2026, 1, 1)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.unit = Unit.objects.create(building=other, unit_number='A1', rent_amount=Decimal('10000'))
+            self.tenant.save()
+        empty = (Decimal('0.00'), Decimal('0.00'), Decimal('0.00'))
+        self.assertEqual(self.series(property=self.building.pk), [empty, empty])
+        self.assertEqual(self.series(property=other.pk)[0], (Decimal('10000.00'), Decimal('4000.00'), Decimal('6000.00')))
+
+
+class LateFeeTests(FinanceTestCase):
+    """
+    Late fees are accrued once per invoice and day, up to what the policy says is owed
+    """
+
+    def setUp(self):
+        self.policy = LateFeePolicy.objects.create(building=self.building, value=Decimal('500'), grace_days=2)
+        self.overdue = self.invoice(date(2026, 1, 1), due_date=date(2026, 1, 5))
+
+    def fees(self):
+        return list(self.overdue.line_items.values_list('accrued_on', 'amount'))
+
+    def test_daily_fee_accrues_up_to_the_cap(self):
+        self.policy.fee_type, self.policy.value, self.policy.cap = 'DAILY_PERCENT', Decimal('1'), Decimal('1500')
+        self.policy.save()
+        self.pay('10000', invoice=self.invoice(date(2026, 2, 1), due_date=date(2026, 1, 5)))
+        self.assertEqual(accrue_late_fees(date(2026, 1, 7))['invoices_charged'], 0)
+        preview = accrue_late_fees(date(2026, 1, 10), dry_run=True)
+        self.assertEqual((preview['invoices_charged'], preview['total_fees']), (1, Decimal('300')))
+        self.assertEqual(self.fees(), [])
+
+        for day in (10, 12, 30, 31):
+            accrue_late_fees(date(2026, 1, day))
+        self.assertEqual(self.fees(), [
+            (date(2026, 1, 10), Decimal('300')),
+            (date(2026, 1, 12), Decimal('200')),
+            (date(2026, 1, 30), Decimal('1000')),
+        ])
+        self.assertEqual(self.balances(self.overdue), [(Decimal('0'), Decimal('11500'), 'OVERDUE')])
+
+    def test_inactive_policy(self):
+        self.policy.is_active = False
+        self.policy.save()
+        self.assertEqual(accrue_late_fees(date(2026, 2, 1))['invoices_charged'], 0)
+        self.assertEqual(self.fees(), [])
+
+    def test_rerun_after_policy_change_adjusts_the_same_day(self):
+        as_of = date(2026, 1, 10)
+        self.assertEqual(accrue_late_fees(as_of)['total_fees'], Decimal('500'))
+        self.policy.value = Decimal('800')
+        self.policy.save()
+        self.assertEqual(accrue_late_fees(as_of)['total_fees'], Decimal('300'))
+        self.assertEqual(accrue_late_fees(as_of)['invoices_charged'], 0)
+        self.assertEqual(self.fees(), [(as_of, Decimal('800'))])
+        self.overdue.refresh_from_db()
+        self.assertEqual(
+            (self.overdue.other_charges, self.overdue.total_amount, self.overdue.balance),
+            (Decimal('800'), Decimal('10800'), Decimal('10800'))
+        )
+
+
+class AllocationTests(FinanceTestCase):
+    """
+    Unlinked payments settle a tenant's open invoices oldest first
+    """
+
+    def second_tenant(self):
+        unit = Unit.objects.create(building=self.building, unit_number='L2', rent_amount=Decimal('10000'))
+        user = testing.User.objects.create_user('ledger-second', role='TENANT')
+        return Tenant.objects.create(user=user, unit=unit, move_in_date=date(2026, 1, 1))
+
+    def test_fifo_and_release(self):
+        january, february = self.invoice(date(2026, 1, 1)), self.invoice(date(2026, 2, 1))
+        first = self.pay('15000')
+        second = self.pay('8000', payment_date=date(2026, 1, 20))
+        self.assertEqual(self.balances(january, february), [
+            (Decimal('10000'), Decimal('0'), 'PAID'),
+            (Decimal('10000'), Decimal('0'), 'PAID'),
+        ])
+        self.assertEqual(list(first.allocations.values_list('invoice', 'amount')), [
+            (january.pk, Decimal('10000')), (february.pk, Decimal('5000')),
+        ])
+        self.assertEqual(list(second.allocations.values_list('invoice', 'amount')), [(february.pk, Decimal('5000'))])
+
+        first.delete()
+        self.assertEqual(self.balances(january, february), [
+            (Decimal('0'), Decimal('10000'), 'OVERDUE'),
+            (Decimal('5000'), Decimal('5000'), 'OVERDUE'),
+        ])
+
+        # Rebuilding from scratch moves the remaining credit to the oldest invoice
+        result = reallocate_tenant(self.tenant.pk)
+        self.assertEqual((result['allocated_amount'], result['invoices_updated']), (Decimal('8000'), 2))
+        self.assertEqual(self.balances(january, february), [
+            (Decimal('8000'), Decimal('2000'), 'OVERDUE'),
+            (Decimal('0'), Decimal('10000'), 'OVERDUE'),
+        ])
+
+    def test_moving_payment_to_another_tenant(self):
+        other = self.second_tenant()
+        mine, theirs = self.invoice(date(2026, 1, 1)), self.invoice(date(2026, 1, 1), tenant=other)
+        payment = self.pay('4000')
+        self.pay('7000', payment_date=date(2026, 1, 20))
+        self.assertEqual(self.balances(mine), [(Decimal('10000'), Decimal('0'), 'PAID')])
+
+        payment.tenant = other
+        payment.save()
+        self.assertEqual(self.balances(mine, theirs), [
+            (Decimal('7000'), Decimal('3000'), 'OVERDUE'),
+            (Decimal('4000'), Decimal('6000'), 'OVERDUE'),
+        ])
+        self.assertEqual(list(payment.allocations.values_list('invoice', 'amount')), [(theirs.pk, Decimal('4000'))])
+
+
+class InvoiceGenerationTests(FinanceTestCase):
+    """
+    Bulk monthly invoicing bills each active tenancy once and applies credit on account
+    """
+
+    def test_generate_rerun_and_credit(self):
+        vacated = Tenant.objects.create(
+            user=testing.User.objects.create_user('ledger-vacated', role='TENANT'), status='VACATED',
+            unit=Unit.objects.create(building=self.building, unit_number='L2', rent_amount=Decimal('8000')),
+            move_in_date=date(2025, 1, 1),
+        )
+        advance = self.pay('12000', payment_date=date(2026, 2, 25))
+
+        result = generate_monthly_invoices('2026-03', owner=self.users['landlord'], due_day=5)
+        self.assertEqual(
+            (result['eligible'], result['created'], result['already_invoiced'], result['total_amount']),
+            (1, 1, 0, Decimal('10000'))
+        )
+        invoice = self.tenant.invoices.get()
+        self.assertEqual((invoice.month, invoice.due_date), (date(2026, 3, 1), date(2026, 3, 5)))
+        self.assertEqual(self.balances(invoice), [(Decimal('10000'), Decimal('0'), 'PAID')])
+        self.assertEqual(list(advance.allocations.values_list('invoice', 'amount')), [(invoice.pk, Decimal('10000'))])
+        self.assertFalse(vacated.invoices.exists())
+
+        rerun = generate_monthly_invoices('2026-03', owner=self.users['landlord'])
+        self.assertEqual((rerun['created'], rerun['already_invoiced']), (0, 1))
+        self.assertEqual(self.tenant.invoices.count(), 1)
+
+    def test_generate_endpoint(self):
+        client = self.client_for('landlord')
+        response = client.post('/api/invoices/generate/', {'month': '2026-04', 'dry_run': 'true'})
+        self.assertEqual((response.status_code, response.data['eligible'], response.data['created']), (200, 1, 0))
+        self.assertEqual(client.post('/api/invoices/generate/', {'month': '2026-04'}).status_code, 201)
+        self.assertEqual(self.balances(self.tenant.invoices.get()), [(Decimal('0'), Decimal('10000'), 'OVERDUE')])
+        self.assertEqual(client.post('/api/invoices/generate/', {'month': 'April'}).status_code, 400)
+        self.assertEqual(self.client_for('tenant').post('/api/invoices/generate/', {}).status_code, 403)
+
+
+class SequenceTests(TestCase):
+    """
+    Document numbers are consecutive per prefix and period, without gaps
+    """
+
+    def test_consecutive_numbers(self):
+        self.assertEqual(sequences.allocate('INV', '202601', 2), ['INV-202601-0001', 'INV-202601-0002'])
+        self.assertEqual(sequences.reserve('INV', '202601', 3), 3)
+        self.assertEqual(sequences.allocate('INV', '202602'), ['INV-202602-0001'])
+        self.assertEqual(sequences.allocate('RCP', '20260101', width=6), ['RCP-20260101-000001'])
+        self.assertEqual(
+            dict(DocumentSequence.objects.values_list('period', 'last_value').filter(prefix='INV')),
+            {'202601': 5, '202602': 1}
+        )
+        with self.assertRaises(ValueError):
+            sequences.reserve('INV', '202601', 0)
+
+    def test_without_returning(self):
+        sequences.reserve('INV', '202601', 2)
+        with mock.patch.object(connection.features, 'can_return_columns_from_insert', False):
+            self.assertEqual(sequences.allocate('INV', '202601', 2), ['INV-202601-0003', 'INV-202601-0004'])
+
+
+class InvoiceBalanceTests(FinanceTestCase):
+    """
+    Linked payments move their invoice's amount_paid by the difference on every change
+    """
+
+    def test_edit_relink_and_delete(self):
+        january, february = self.invoice(date(2026, 1, 1)), self.invoice(date(2026, 2, 1))
+        payment = self.pay('3000', invoice=january)
+        self.pay('2000', invoice=january)
+        self.assertEqual(self.balances(january), [(Decimal('5000'), Decimal('5000'), 'OVERDUE')])
+
+        payment.amount = Decimal('8000')
+        payment.save()
+        self.assertEqual(self.balances(january), [(Decimal('10000'), Decimal('0'), 'PAID')])
+
+        payment.invoice = february
+        payment.save()
+        self.assertEqual(self.balances(january, february), [
+            (Decimal('2000'), Decimal('8000'), 'OVERDUE'),
+            (Decimal('8000'), Decimal('2000'), 'OVERDUE'),
+        ])
+
+        payment.status = 'FAILED'
+        payment.save()
+        self.assertEqual(self.balances(february), [(Decimal('0'), Decimal('10000'), 'OVERDUE')])
+
+        payment.status = 'COMPLETED'
+        payment.save()
+        payment.delete()
+        self.assertEqual(self.balances(january, february), [
+            (Decimal('2000'), Decimal('8000'), 'OVERDUE'),
+            (Decimal('0'), Decimal('10000'), 'OVERDUE'),
+        ])
+
+
+class OverdueSweepTests(FinanceTestCase):
+    """
+    The sweep flips pending invoices past their due date, and only those
+    """
+
+    def test_sweep(self):
+        due = self.invoice(date(2030, 1, 1), due_date=date(2030, 1, 5))
+        later = self.invoice(date(2030, 2, 1), due_date=date(2030, 2, 5))
+        paid = self.invoice(date(2030, 3, 1), due_date=date(2030, 1, 5))
+        self.pay('10000', invoice=paid)
+        cancelled = self.invoice(date(2030, 4, 1), due_date=date(2030, 1, 5), status='CANCELLED')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_overdue_invoices(date(2030, 1, 6)), 1)
+        self.assertEqual(
+            [status for _, _, status in self.balances(due, later, paid, cancelled)],
+            ['OVERDUE', 'PENDING', 'PAID', 'CANCELLED']
+        )
+        self.assertEqual(
+            MonthlyRollup.objects.get(building=self.building, month=date(2030, 1, 1), kind='INVOICE').status,
+            'OVERDUE'
+        )
+
+        out = StringIO()
+        call_command('sweep_overdue', date='2030-02-06', stdout=out)
+        self.assertIn('Marked 1 invoices as overdue', out.getvalue())
+        self.assertEqual(mark_overdue_invoices(date(2030, 2, 6)), 0)
+
+
+class TenantStatementTests(FinanceTestCase):
+    """
+    Statements carry the running balance from the start of the tenant's history
+    """
+
+    def setUp(self):
+        self.pay('6000', invoice=self.invoice(date(2026, 1, 1)))
+        self.invoice(date(2026, 2, 1))
+        self.invoice(date(2026, 3, 1), status='CANCELLED')
+        self.pay('9000', payment_date=date(2026, 2, 10), transaction_reference='QX1')
+        self.pay('500', payment_date=date(2026, 2, 11), status='FAILED')
+
+    def test_running_balance_in_range(self):
+        statement = TenantStatement(self.tenant.pk, date(2026, 2, 1), date(2026, 2, 28))
+        self.assertEqual(statement.summary(), {
+            'opening_balance': Decimal('4000.00'), 'closing_balance': Decimal('5000.00'), 'count': 2,
+        })
+        self.assertEqual(
+            [(row['entry_type'], row['debit'], row['credit'], row['balance']) for row in statement[0:10]],
+            [('INVOICE', Decimal('10000.00'), Decimal('0.00'), Decimal('14000.00')),
+             ('PAYMENT', Decimal('0.00'), Decimal('9000.00'), Decimal('5000.00'))]
+        )
+
+    def test_endpoint(self):
+        client = self.client_for('tenant')
+        url = f'/api/tenants/{self.tenant.pk}/statement/'
+        response = client.get(url, {'from': '2026-02-01', 'page_size': 1})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            (response.data['count'], response.data['opening_balance'], response.data['closing_balance']),
+            (2, Decimal('4000.00'), Decimal('5000.00'))
+        )
+        self.assertEqual(response.data['results'][0]['balance'], Decimal('14000.00'))
+        self.assertEqual(client.get(url, {'from': '2026-03-01', 'to': '2026-02-01'}).status_code, 400)
+
+        lines = b''.join(client.get(url, {'output': 'csv'}).streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(TenantStatement.COLUMNS))
+        self.assertEqual(lines[-1], '2026-02-10,PAYMENT,QX1,Payment (MOBILE_MONEY),0.00,9000.00,5000.00')
+
+
+class AgingReportTests(FinanceTestCase):
+    """
+    Outstanding balances land in buckets by days past due as of the report date
+    """
+
+    def setUp(self):
+        for due in (date(2026, 7, 5), date(2026, 5, 10), date(2026, 4, 20), date(2026, 1, 5)):
+            self.invoice(due.replace(day=1), due_date=due)
+        self.pay('3000', invoice=self.invoice(date(2026, 6, 1), due_date=date(2026, 6, 5)))
+        self.pay('10000', invoice=self.invoice(date(2026, 2, 1)))
+
+    def test_buckets(self):
+        report = aging_report(Invoice.objects.all(), as_of=date(2026, 6, 30), group='tenant')
+        self.assertEqual(len(report['results']), 1)
+        row = report['results'][0]
+        self.assertEqual((row['id'], row['first_name'], row['unit'], row['invoice_count']), (self.tenant.pk, 'Terry', 'L1', 5))
+        self.assertEqual(
+            [row[bucket] for bucket in AGING_BUCKETS + ('total',)],
+            [Decimal(amount) for amount in ('10000.00', '7000.00', '10000.00', '10000.00', '10000.00', '47000.00')]
+        )
+        self.assertEqual(report['totals']['total'], Decimal('47000.00'))
+
+    def test_endpoint(self):
+        client = self.client_for('landlord')
+        response = client.get('/api/invoices/aging/', {'as_of': '2026-06-30'})
+        self.assertEqual(response.status_code, 200, response.data)
+        row = response.data['results'][0]
+        self.assertEqual((row['id'], row['days_0_30']), (self.building.pk, Decimal('7000.00')))
+        self.assertEqual(client.get('/api/invoices/aging/', {'group': 'unit'}).status_code, 400)
+        self.assertEqual(client.get('/api/invoices/aging/', {'as_of': '30/06/2026'}).status_code, 400)
+
+
+class ExportTests(FinanceTestCase):
+    """
+    Exports stream the rows the user may list, filtered by date
+    """
+
+    def setUp(self):
+        self.invoice(date(2026, 1, 1))
+        self.pay('2500', invoice=self.invoice(date(2026, 2, 1)), payment_date=date(2026, 2, 3), transaction_reference='QX1')
+
+    def export(self, url, user=None, **params):
+        client = APIClient()
+        client.force_authenticate(user or self.users['landlord'])
+        response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        lines = self.export('/api/invoices/export/', **{'from': '2026-02-01'}).decode().splitlines()
+        self.assertEqual(lines, [
+            ','.join(header for header, _ in INVOICE_COLUMNS),
+            f'T{self.tenant.pk}-202602,2026-02-01,2026-02-05,Ledger Court,L1,Terry,Tenant,'
+            '10000.00,0.00,0.00,0.00,10000.00,2500.00,7500.00,OVERDUE',
+        ])
+        other = testing.User.objects.create_user('ledger-other', role='LANDLORD')
+        self.assertEqual(len(self.export('/api/payments/export/', user=other).decode().splitlines()), 1)
+
+    def test_xlsx(self):
+        content = self.export('/api/payments/export/', output='xlsx')
+        with zipfile.ZipFile(BytesIO(content)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 2)
+        # 2026-02-03 as a date serial, then the amount
+        self.assertIn('<c s="1"><v>46056</v></c>', sheet)
+        self.assertIn('<c s="3"><v>2500.00</v></c>', sheet)
+        self.assertIn('<t>QX1</t>', sheet)
+
+    def test_invalid_parameters(self):
+        client = self.client_for('landlord')
+        for params in ({'output': 'pdf'}, {'from': '03/02/2026'}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get('/api/receipts/export/', params).status_code, 400)
+
+
+class DocumentTests(FinanceTestCase):
+    """
+    Invoice and receipt documents are rendered once per content and served from the cache
+    """
+
+    def setUp(self):
+        self.january = self.invoice(date(2026, 1, 1))
+        LateFeePolicy.objects.create(building=self.building, value=Decimal('500'))
+        accrue_late_fees(date(2026, 1, 10))
+
+    def test_invoice_document_cache(self):
+        client = self.client_for('tenant')
+        url = f'/api/invoices/{self.january.pk}/document/'
+        html = client.get(url, {'output': 'html'})
+        self.assertEqual(html.status_code, 200)
+        self.assertIn(b'Late fee accrued 2026-01-10', html.content)
+        self.assertIn(b'10,500.00', html.content)
+
+        pdf = client.get(url)
+        self.assertEqual((pdf['Content-Type'], pdf.content[:5]), ('application/pdf', b'%PDF-'))
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=pdf['ETag']).status_code, 304)
+        self.assertEqual(RenderedDocument.objects.filter(kind='INVOICE').count(), 2)
+
+        self.pay('4000', invoice=self.january)
+        changed = client.get(url)
+        self.assertNotEqual(changed['ETag'], pdf['ETag'])
+        self.assertEqual(RenderedDocument.objects.filter(kind='INVOICE').count(), 2)
+        self.assertEqual(client.get(url, {'output': 'docx'}).status_code, 400)
+
+    def test_receipt_context(self):
+        payment = self.pay('12000', transaction_reference='QX1')
+        receipt = Receipt.objects.create(payment=payment, receipt_number='RCP-20260103-000001')
+        context = receipt_contexts([receipt.pk])[receipt.pk]
+        self.assertEqual(context['lines'], [
+            (f'Applied to {self.january.invoice_number}', '10,500.00'),
+        ])
+        self.assertEqual(context['totals'], [('Amount received', '12,000.00')])
+        self.assertIn(('Reference', 'QX1'), context['header'])
+        response = self.client_for('landlord').get(f'/api/receipts/{receipt.pk}/document/', {'output': 'html'})
+        self.assertIn(b'RCP-20260103-000001', response.content)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class IdempotencyTests(FinanceTestCase):
+    """
+    Retried creates with the same Idempotency-Key replay the first response
+    """
+
+    def body(self, amount='4000'):
+        return {
+            'tenant': self.tenant.pk, 'invoice': self.january.pk, 'amount': amount,
+            'payment_method': 'CASH', 'payment_date': '2026-01-03',
+        }
+
+    def post(self, key, amount='4000'):
+        client = self.client_for('landlord')
+        return client.post('/api/payments/', self.body(amount), format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def setUp(self):
+        self.january = self.invoice(date(2026, 1, 1))
+
+    def test_replay_and_conflict(self):
+        first = self.post('pay-1')
+        self.assertEqual(first.status_code, 201, first.data)
+        replay = self.post('pay-1')
+        self.assertEqual((replay.status_code, replay['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(replay.data['id'], first.data['id'])
+        self.assertEqual(self.balances(self.january), [(Decimal('4000'), Decimal('6000'), 'OVERDUE')])
+
+        self.assertEqual(self.post('pay-1', amount='5000').status_code, 422)
+        self.assertEqual(self.post('pay-2').status_code, 201)
+        self.assertEqual(self.post('x' * 256).status_code, 400)
+        self.assertEqual(self.balances(self.january), [(Decimal('8000'), Decimal('2000'), 'OVERDUE')])
+
+    def test_key_in_progress(self):
+        IdempotencyKey.objects.create(
+            user=self.users['landlord'], scope='payment', key='pay-1',
+            request_hash=idempotency.request_hash(self.body()), expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(self.post('pay-1').status_code, 409)
+        self.assertEqual(Payment.objects.count(), 0)
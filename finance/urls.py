@@ -1,12 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InvoiceViewSet, PaymentViewSet, ReceiptViewSet
+from .views import (
+    InvoiceViewSet,
+    PaymentViewSet,
+    ReceiptViewSet,
+    LateFeePolicyViewSet,
+    ReportViewSet,
+    MobileMoneyCallbackView,
+)
 
 router = DefaultRouter()
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
 router.register(r'payments', PaymentViewSet, basename='payment')
 router.register(r'receipts', ReceiptViewSet, basename='receipt')
+router.register(r'late-fee-policies', LateFeePolicyViewSet, basename='late-fee-policy')
+router.register(r'reports', ReportViewSet, basename='report')
 
 urlpatterns = [
+    path('callbacks/mobile-money/', MobileMoneyCallbackView.as_view(), name='mobile-money-callback'),
+    path('callbacks/mobile-money/<str:provider>/', MobileMoneyCallbackView.as_view(), name='mobile-money-callback-provider'),
     path('', include(router.urls)),
 ]
@@ -1,24 +1,43 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.views import APIView
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Sum, Q
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
-from .models import Invoice, Payment, Receipt
+from core.mixins import IdempotentCreateMixin, PaginatedActionMixin, QueryPlanMixin
+from .models import Invoice, Payment, Receipt, LateFeePolicy
+from .billing import generate_monthly_invoices, parse_month, DEFAULT_DUE_DAY
+from .allocation import reallocate_portfolio
+from .imports import import_statement
+from .callbacks import record_callback, verify_signature, SIGNATURE_HEADER
+from .reports import aging_report
+from .exports import ExportMixin, INVOICE_COLUMNS, PAYMENT_COLUMNS, RECEIPT_COLUMNS
+from .documents import DocumentMixin
+from . import rollups
 from .serializers import (
     InvoiceSerializer,
     InvoiceListSerializer,
     PaymentSerializer,
     PaymentListSerializer,
-    ReceiptSerializer
+    ReceiptSerializer,
+    LateFeePolicySerializer
 )
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(IdempotentCreateMixin, PaginatedActionMixin, ExportMixin, DocumentMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing invoices
     """
     permission_classes = [IsAuthenticated]
+    export_columns = INVOICE_COLUMNS
+    export_date_field = 'month'
+    export_name = 'invoices'
+    document_kind = 'INVOICE'
+    cursor_ordering = ('-month', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -42,26 +61,28 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def pending(self, request):
         """Get all pending invoices"""
         invoices = self.get_queryset().filter(status='PENDING')
-        serializer = InvoiceListSerializer(invoices, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(invoices, InvoiceListSerializer)
     
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Get all overdue invoices"""
         invoices = self.get_queryset().filter(status='OVERDUE')
-        serializer = InvoiceListSerializer(invoices, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(invoices, InvoiceListSerializer)
     
     @action(detail=False, methods=['get'])
     def paid(self, request):
         """Get all paid invoices"""
         invoices = self.get_queryset().filter(status='PAID')
-        serializer = InvoiceListSerializer(invoices, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(invoices, InvoiceListSerializer)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get invoice statistics"""
+        # Landlords and admins are answered from the monthly rollups
+        summary = rollups.for_user(request.user)
+        if summary is not None:
+            return Response(rollups.invoice_statistics(summary))
+        
         queryset = self.get_queryset()
         total_invoiced = queryset.aggregate(total=Sum('total_amount'))['total'] or 0
         total_paid = queryset.aggregate(total=Sum('amount_paid'))['total'] or 0
@@ -75,13 +96,75 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             'overdue_count': queryset.filter(status='OVERDUE').count(),
             'paid_count': queryset.filter(status='PAID').count(),
         })
+    
+    @action(detail=False, methods=['get'])
+    def aging(self, request):
+        """Get outstanding balances in 0-30 / 31-60 / 61-90 / 90+ day buckets"""
+        group = request.query_params.get('group', 'property')
+        as_of = request.query_params.get('as_of')
+        try:
+            as_of = parse_date(as_of) if as_of else datetime.now().date()
+        except ValueError:
+            as_of = None
+        if as_of is None:
+            return Response(
+                {'error': 'as_of must be a date in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        use_cache = str(request.query_params.get('cached', '')).lower() in ('1', 'true', 'yes')
+        # Scoping follows get_queryset(), so the cache key is per user
+        key = f"finance:aging:{request.user.pk}:{as_of:%Y-%m-%d}:{group}"
+        report = cache.get(key) if use_cache else None
+        cached = report is not None
+        if not cached:
+            try:
+                report = aging_report(self.get_queryset(), as_of=as_of, group=group)
+            except ValueError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            if use_cache:
+                cache.set(key, report, settings.AGING_REPORT_CACHE_TIMEOUT)
+        
+        return Response(dict(report, cached=cached))
+    
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Generate monthly rent invoices for all active tenants"""
+        user = request.user
+        if not (user.is_landlord or user.is_staff):
+            return Response(
+                {'error': 'Only landlords and administrators can generate invoices'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            month = parse_month(request.data.get('month') or datetime.now().date())
+            due_day = int(request.data.get('due_day', DEFAULT_DUE_DAY))
+        except (TypeError, ValueError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        result = generate_monthly_invoices(
+            month,
+            owner=user if user.is_landlord else None,
+            due_day=due_day,
+            dry_run=dry_run,
+        )
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK
+        )
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(IdempotentCreateMixin, PaginatedActionMixin, ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing payments
     """
     permission_classes = [IsAuthenticated]
+    export_columns = PAYMENT_COLUMNS
+    export_date_field = 'payment_date'
+    export_name = 'payments'
+    cursor_ordering = ('-payment_date', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -106,8 +189,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         """Get recent payments (last 30 days)"""
         thirty_days_ago = datetime.now().date() - timedelta(days=30)
         payments = self.get_queryset().filter(payment_date__gte=thirty_days_ago)
-        serializer = PaymentListSerializer(payments, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(payments, PaymentListSerializer)
     
     @action(detail=False, methods=['get'])
     def by_tenant(self, request):
@@ -117,12 +199,16 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return Response({'error': 'tenant_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         payments = self.get_queryset().filter(tenant_id=tenant_id)
-        serializer = PaymentSerializer(payments, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(payments, PaymentSerializer)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get payment statistics"""
+        # Landlords and admins are answered from the monthly rollups
+        summary = rollups.for_user(request.user)
+        if summary is not None:
+            return Response(rollups.payment_statistics(summary))
+        
         queryset = self.get_queryset()
         total_received = queryset.filter(status='COMPLETED').aggregate(total=Sum('amount'))['total'] or 0
         
@@ -140,14 +226,61 @@ class PaymentViewSet(viewsets.ModelViewSet):
             'completed_count': queryset.filter(status='COMPLETED').count(),
             'pending_count': queryset.filter(status='PENDING').count(),
         })
+    
+    @action(detail=False, methods=['post'])
+    def reallocate(self, request):
+        """Re-apply unlinked payments to open invoices oldest-first"""
+        user = request.user
+        if not (user.is_landlord or user.is_staff):
+            return Response(
+                {'error': 'Only landlords and administrators can reallocate payments'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        tenant_id = request.data.get('tenant_id')
+        result = reallocate_portfolio(
+            owner=user if user.is_landlord else None,
+            tenant_ids=[tenant_id] if tenant_id else None,
+        )
+        return Response(result)
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_statement(self, request):
+        """Record payments in bulk from an uploaded CSV statement"""
+        user = request.user
+        if not (user.is_landlord or user.is_staff):
+            return Response(
+                {'error': 'Only landlords and administrators can import statements'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        statement = request.FILES.get('file')
+        if not statement:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            result = import_statement(
+                statement,
+                payment_method=request.data.get('payment_method', 'MOBILE_MONEY'),
+                owner=user if user.is_landlord else None,
+                recorded_by=user,
+                dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes'),
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
 
 
-class ReceiptViewSet(viewsets.ReadOnlyModelViewSet):
+class ReceiptViewSet(QueryPlanMixin, ExportMixin, DocumentMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing receipts (read-only)
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ReceiptSerializer
+    export_columns = RECEIPT_COLUMNS
+    export_date_field = 'payment__payment_date'
+    export_name = 'receipts'
+    document_kind = 'RECEIPT'
     
     def get_queryset(self):
         user = self.request.user
@@ -161,3 +294,90 @@ class ReceiptViewSet(viewsets.ReadOnlyModelViewSet):
         elif user.is_tenant:
             return Receipt.objects.filter(payment__tenant__user=user)
         return Receipt.objects.none()
+
+
+class LateFeePolicyViewSet(QueryPlanMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for managing property late fee policies
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = LateFeePolicySerializer
+    
+    def get_queryset(self):
+        user = self.request.user
+        # Landlords manage policies for their own properties
+        if user.is_landlord:
+            return LateFeePolicy.objects.filter(building__owner=user)
+        # Admins see all policies
+        elif user.is_staff:
+            return LateFeePolicy.objects.all()
+        return LateFeePolicy.objects.none()
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Portfolio reports answered from the monthly rollups
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """Get invoiced, collected and outstanding totals per month"""
+        summary = rollups.for_user(request.user)
+        if summary is None:
+            return Response(
+                {'error': 'Only landlords and administrators can view portfolio reports'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            end = parse_month(request.query_params.get('to') or datetime.now().date())
+            start = parse_month(request.query_params.get('from') or end.replace(year=end.year - 1))
+            building = request.query_params.get('property')
+            building = int(building) if building else None
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end.year - start.year) * 12 + end.month - start.month >= rollups.MAX_SERIES_MONTHS:
+            return Response(
+                {'error': f'from must be before to and at most {rollups.MAX_SERIES_MONTHS} months earlier'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if building:
+            summary = summary.filter(building_id=building)
+        
+        return Response({
+            'from': start,
+            'to': end,
+            'property': building,
+            'results': rollups.monthly_series(summary, start, end),
+        })
+
+
+class MobileMoneyCallbackView(APIView):
+    """
+    Receives signed payment confirmations from the mobile money provider.
+    
+    The callback is stored and acknowledged straight away; the payment and
+    receipt are created in the background.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    
+    def post(self, request, provider='MPESA'):
+        if not verify_signature(request.body, request.META.get(SIGNATURE_HEADER)):
+            return Response(
+                {'ResultCode': 1, 'ResultDesc': 'Invalid signature'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if not isinstance(request.data, dict):
+            return Response(
+                {'ResultCode': 1, 'ResultDesc': 'Expected a JSON object'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            callback, created = record_callback(request.data, provider=provider.upper())
+        except ValueError as exc:
+            return Response({'ResultCode': 1, 'ResultDesc': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'ResultCode': 0, 'ResultDesc': 'Accepted' if created else 'Already received'})
@@ -1,19 +1,18 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { financeAPI, tenantsAPI } from '../../services/api';
+import { financeAPI, searchAPI } from '../../services/api';
 
-interface Tenant {
+interface TenantMatch {
     id: number;
-    full_name: string;
-    unit?: {
-        unit_number: string;
-    };
+    title: string;
+    subtitle: string;
 }
 
 const PaymentForm = () => {
     const navigate = useNavigate();
     const [loading, setLoading] = useState(false);
-    const [tenants, setTenants] = useState<Tenant[]>([]);
+    const [tenantQuery, setTenantQuery] = useState('');
+    const [tenants, setTenants] = useState<TenantMatch[]>([]);
     const [formData, setFormData] = useState({
         tenant: '', // tenant ID
         amount: '',
@@ -22,17 +21,22 @@ const PaymentForm = () => {
         reference_number: '',
     });
 
+    // Look tenants up as the name, phone or ID number is typed
     useEffect(() => {
-        fetchTenants();
-    }, []);
+        if (tenantQuery.trim().length < 2) {
+            setTenants([]);
+            return;
+        }
+        const timer = setTimeout(() => searchTenants(tenantQuery), 250);
+        return () => clearTimeout(timer);
+    }, [tenantQuery]);
 
-    const fetchTenants = async () => {
+    const searchTenants = async (query) => {
         try {
-            const response = await tenantsAPI.getAll();
-            const data = response.data.results || response.data;
-            setTenants(Array.isArray(data) ? data : []);
+            const response = await searchAPI.search(query, { kind: 'tenant' });
+            setTenants(response.data.results);
         } catch (error) {
-            console.error('Failed to load tenants', error);
+            console.error('Failed to search tenants', error);
         }
     };
 
@@ -56,6 +60,13 @@ const PaymentForm = () => {
             <form onSubmit={handleSubmit} className="card space-y-6">
                 <div>
                     <label className="block text-sm font-medium text-gray-700">Tenant</label>
+                    <input
+                        type="search"
+                        className="input-field mb-2"
+                        placeholder="Search by name, phone or ID number"
+                        value={tenantQuery}
+                        onChange={(e) => setTenantQuery(e.target.value)}
+                    />
                     <select
                         required
                         className="input-field"
@@ -65,7 +76,7 @@ const PaymentForm = () => {
                         <option value="">-- Select Tenant --</option>
                         {tenants.map(tenant => (
                             <option key={tenant.id} value={tenant.id}>
-                                {tenant.full_name} ({tenant.unit?.unit_number || 'No Unit'})
+                                {tenant.title} ({tenant.subtitle})
                             </option>
                         ))}
                     </select>
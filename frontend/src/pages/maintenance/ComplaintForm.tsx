@@ -50,8 +50,7 @@ const ComplaintForm = () => {
 
     const fetchUnits = async (propertyId) => {
         try {
-            const response = await propertiesAPI.getUnits(propertyId);
-            setUnits(response.data);
+            setUnits(await propertiesAPI.getAllUnits(propertyId));
         } catch (error) {
             console.error('Failed to load units', error);
         }
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { unitsAPI } from '../../services/api';
+import { vacanciesAPI } from '../../services/api';
 import { HomeIcon } from '@heroicons/react/24/outline';
 
 interface Building {
@@ -25,7 +25,7 @@ const AvailableUnits = () => {
 
     const fetchVacantUnits = async () => {
         try {
-            const response = await unitsAPI.getVacant();
+            const response = await vacanciesAPI.search();
             const data = response.data.results || response.data;
             setUnits(Array.isArray(data) ? data : []);
         } catch (error) {
@@ -50,7 +50,12 @@ const AvailableUnits = () => {
                     <div key={unit.id} className="card p-0 overflow-hidden hover:shadow-lg transition-shadow">
                         <div className="h-48 bg-gray-200 flex items-center justify-center">
                             {unit.building?.image ? (
-                                <img src={unit.building.image} alt={unit.building.name} className="w-full h-full object-cover" />
+                                <img
+                                    src={unit.building.image_variants?.medium_webp || unit.building.image}
+                                    alt={unit.building.name}
+                                    loading="lazy"
+                                    className="w-full h-full object-cover"
+                                />
                             ) : (
                                 <HomeIcon className="w-16 h-16 text-gray-400" />
                             )}
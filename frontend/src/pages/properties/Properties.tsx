@@ -68,8 +68,9 @@ const Properties = () => {
                         >
                             {property.image ? (
                                 <img
-                                    src={property.image}
+                                    src={property.image_variants?.medium_webp || property.image}
                                     alt={property.name}
+                                    loading="lazy"
                                     className="w-full h-48 object-cover rounded-t-lg -mx-6 -mt-6 mb-4 w-[calc(100%+3rem)]"
                                 />
                             ) : (
@@ -20,12 +20,12 @@ const PropertyDetails = () => {
     const fetchPropertyData = async () => {
         try {
             setLoading(true);
-            const [propRes, unitsRes] = await Promise.all([
+            const [propRes, allUnits] = await Promise.all([
                 propertiesAPI.getOne(id),
-                propertiesAPI.getUnits(id)
+                propertiesAPI.getAllUnits(id)
             ]);
             setProperty(propRes.data);
-            setUnits(unitsRes.data);
+            setUnits(allUnits);
         } catch (error) {
             console.error('Failed to load property data:', error);
         } finally {
@@ -53,11 +53,7 @@ const TenantForm = () => {
 
     const fetchVacantUnits = async (propertyId) => {
         try {
-            // Fetch all units for property and filter, or use specific endpoint if available
-            // Assuming propertiesAPI.getUnits returns all units
-            const response = await propertiesAPI.getUnits(propertyId);
-            const vacant = response.data.filter(u => u.status === 'VACANT');
-            setVacantUnits(vacant);
+            setVacantUnits(await propertiesAPI.getVacantUnits(propertyId));
         } catch (err) {
             console.error('Failed to load units', err);
         }
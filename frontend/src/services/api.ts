@@ -21,6 +21,17 @@ apiClient.interceptors.request.use(
     (error) => Promise.reject(error)
 );
 
+// Every row of a paginated list action, following its `next` links
+const getAllPages = async (url) => {
+    let response = await apiClient.get(url, { params: { page_size: 100 } });
+    const rows = [...response.data.results];
+    while (response.data.next) {
+        response = await apiClient.get(response.data.next);
+        rows.push(...response.data.results);
+    }
+    return rows;
+};
+
 // Auth API
 export const authAPI = {
     login: (credentials) => axios.post(`${API_URL}/auth/token/`, credentials),
@@ -41,6 +52,9 @@ export const propertiesAPI = {
     delete: (id) => apiClient.delete(`/properties/${id}/`),
     getStatistics: () => apiClient.get('/properties/statistics/'),
     getUnits: (id) => apiClient.get(`/properties/${id}/units/`),
+    // Arrays of every unit (or every vacant unit) of a property, across pages
+    getAllUnits: (id) => getAllPages(`/properties/${id}/units/`),
+    getVacantUnits: (id) => getAllPages(`/properties/${id}/vacant_units/`),
 
     // Units
     createUnit: (data) => apiClient.post('/units/', data),
@@ -55,6 +69,16 @@ export const unitsAPI = {
     getOccupied: () => apiClient.get('/units/occupied/'),
 };
 
+// Public vacancy search
+export const vacanciesAPI = {
+    search: (params = {}) => apiClient.get('/vacancies/', { params }),
+};
+
+// Search API (prefix matching, for autocomplete); kind: 'tenant', 'property', 'unit', 'complaint'
+export const searchAPI = {
+    search: (q, params = {}) => apiClient.get('/search/', { params: { q, ...params } }),
+};
+
 // Tenants API
 export const tenantsAPI = {
     getAll: () => apiClient.get('/tenants/'),
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0002_initial'),
+        ('properties', '0002_initial'),
+        ('tenants', '0003_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['submitted_at', 'id'], name='maintenance_submitt_712ca2_idx'),
+        ),
+    ]
@@ -71,6 +71,10 @@ class Complaint(models.Model):
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['submitted_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.tenant.user.get_full_name()} ({self.get_status_display()})"
@@ -82,6 +86,8 @@ class ComplaintImage(models.Model):
     """
     complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='complaint_images/')
+    # Thumbnail/WebP variants of the image (see core/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.CharField(max_length=200, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from core.serializers import ImageVariantsField
 from .models import Complaint, ComplaintImage
 
 
 class ComplaintImageSerializer(serializers.ModelSerializer):
     """Serializer for complaint images"""
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = ComplaintImage
@@ -1,3 +1,79 @@
+from datetime import date, datetime, timedelta, timezone
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import testing
+from properties.models import Property, Unit
+from tenants.models import Tenant
+from .models import Complaint
+
+
+COMPLAINT_ENDPOINTS = [
+    ('/api/complaints/', 2),
+    ('/api/complaints/{complaint.pk}/', 2),
+    ('/api/complaints/submitted/', 2),
+    ('/api/complaints/in_progress/', 1),
+    ('/api/complaints/resolved/', 1),
+    ('/api/complaints/urgent/', 2),
+    ('/api/complaints/statistics/', 6),
+]
+IMAGE_ENDPOINTS = [
+    ('/api/images/', 2),
+    ('/api/images/{image.pk}/', 1),
+]
+
+
+class MaintenanceQueryBudgetTests(testing.QueryBudgetTestCase):
+    """
+    Query budgets for the complaint and complaint image endpoints
+    """
+    endpoints = {
+        'landlord': COMPLAINT_ENDPOINTS + IMAGE_ENDPOINTS,
+        'tenant': COMPLAINT_ENDPOINTS + IMAGE_ENDPOINTS,
+        'caretaker': COMPLAINT_ENDPOINTS + [('/api/images/', 0)],
+        'staff': COMPLAINT_ENDPOINTS + IMAGE_ENDPOINTS,
+    }
+
+
+class ComplaintCursorPaginationTests(TestCase):
+    """
+    Keyset cursors over submitted_at keep its microseconds
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+        building = Property.objects.create(
+            name='Cursor Court', address='1 Test Road', city='Nairobi', owner=cls.users['landlord']
+        )
+        unit = Unit.objects.create(building=building, unit_number='1', rent_amount=10000)
+        tenant = Tenant.objects.create(user=cls.users['tenant'], unit=unit, move_in_date=date(2026, 1, 1))
+        # Six complaints in one millisecond, submitted in the opposite order of their ids
+        start = datetime(2026, 3, 1, 9, 30, 0, 100000, tzinfo=timezone.utc)
+        cls.complaints = []
+        for number in range(6):
+            complaint = Complaint.objects.create(tenant=tenant, unit=unit, title=f'Issue {number}', description='-')
+            Complaint.objects.filter(pk=complaint.pk).update(submitted_at=start - timedelta(microseconds=number * 10))
+            cls.complaints.append(complaint.pk)
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']], response.data
+
+    def test_walk_forward_and_back(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users['landlord'])
+        ids, data = self.page('/api/complaints/?pagination=cursor&page_size=2')
+        pages = [ids]
+        while data['next']:
+            ids, data = self.page(data['next'])
+            pages.append(ids)
+        self.assertEqual(pages, [self.complaints[0:2], self.complaints[2:4], self.complaints[4:6]])
+
+        for expected in (pages[1], pages[0]):
+            ids, data = self.page(data['previous'])
+            self.assertEqual(ids, expected)
+        self.assertIsNone(data['previous'])
 
-# Create your tests here.
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.utils import timezone
+from core.mixins import IdempotentCreateMixin, PaginatedActionMixin, QueryPlanMixin
 from .models import Complaint, ComplaintImage
 from .serializers import (
     ComplaintSerializer,
@@ -13,11 +14,12 @@ from .serializers import (
 )
 
 
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(IdempotentCreateMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing complaints
     """
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-submitted_at', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -46,29 +48,25 @@ class ComplaintViewSet(viewsets.ModelViewSet):
     def submitted(self, request):
         """Get all submitted complaints"""
         complaints = self.get_queryset().filter(status='SUBMITTED')
-        serializer = ComplaintListSerializer(complaints, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(complaints, ComplaintListSerializer)
     
     @action(detail=False, methods=['get'])
     def in_progress(self, request):
         """Get all in-progress complaints"""
         complaints = self.get_queryset().filter(status='IN_PROGRESS')
-        serializer = ComplaintListSerializer(complaints, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(complaints, ComplaintListSerializer)
     
     @action(detail=False, methods=['get'])
     def resolved(self, request):
         """Get all resolved complaints"""
         complaints = self.get_queryset().filter(status='RESOLVED')
-        serializer = ComplaintListSerializer(complaints, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(complaints, ComplaintListSerializer)
     
     @action(detail=False, methods=['get'])
     def urgent(self, request):
         """Get all urgent complaints"""
         complaints = self.get_queryset().filter(priority='URGENT')
-        serializer = ComplaintListSerializer(complaints, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(complaints, ComplaintListSerializer)
     
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
@@ -133,7 +131,7 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         })
 
 
-class ComplaintImageViewSet(viewsets.ModelViewSet):
+class ComplaintImageViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing complaint images
     """
@@ -7,7 +7,9 @@ class PropertyAdmin(admin.ModelAdmin):
     list_display = ('name', 'property_type', 'city', 'owner', 'total_units', 'occupied_units', 'vacant_units')
     list_filter = ('property_type', 'city')
     search_fields = ('name', 'city', 'address', 'owner__username')
-    readonly_fields = ('total_units', 'created_at', 'updated_at')
+    readonly_fields = (
+        'total_units', 'occupied_units', 'vacant_units', 'maintenance_units', 'created_at', 'updated_at'
+    )
 
 
 @admin.register(Unit)
@@ -0,0 +1,62 @@
+"""
+Rebuilding the Property unit counters from the units themselves
+"""
+import time
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import STATUS_COUNTERS, UNIT_COUNTERS, Property, Unit
+
+
+def count_units(building_ids):
+    """{building_id: {counter: value}} counted from the unit table"""
+    counts = {pk: dict.fromkeys(UNIT_COUNTERS, 0) for pk in building_ids}
+    rows = (
+        Unit.objects.filter(building__in=building_ids)
+        .values_list('building', 'status').annotate(count=Count('id')).order_by()
+    )
+    for building_id, status, count in rows:
+        counts[building_id]['total_units'] += count
+        if status in STATUS_COUNTERS:
+            counts[building_id][STATUS_COUNTERS[status]] += count
+    return counts
+
+
+def reconcile(owner=None, batch_size=1000):
+    """
+    Correct the counters of every property (or one landlord's) that have
+    drifted from their units.
+
+    Each batch of properties is locked before its units are counted, so a
+    unit saved meanwhile waits and then applies its change on top of the
+    corrected value.
+    """
+    started = time.perf_counter()
+    buildings = Property.objects.order_by('pk')
+    if owner is not None:
+        buildings = buildings.filter(owner=owner)
+    checked = corrected = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                buildings.filter(pk__gt=last_pk).select_for_update()
+                .values_list('pk', *UNIT_COUNTERS)[:batch_size]
+            )
+            if not batch:
+                break
+            counts = count_units([row[0] for row in batch])
+            drifted = [
+                Property(pk=row[0], **counts[row[0]]) for row in batch
+                if tuple(counts[row[0]][field] for field in UNIT_COUNTERS) != row[1:]
+            ]
+            Property.objects.bulk_update(drifted, UNIT_COUNTERS)
+        checked += len(batch)
+        corrected += len(drifted)
+        last_pk = batch[-1][0]
+    return {
+        'checked': checked,
+        'corrected': corrected,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from properties.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recounts the total/occupied/vacant/maintenance unit counters of each property from its units'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlord', help='Only reconcile the properties of this landlord username')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Properties per transaction')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        result = reconcile(owner=owner, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {result['checked']} properties, corrected {result['corrected']} "
+            f"in {result['elapsed_seconds']}s"
+        ))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:28
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+
+
+def count_units(apps, schema_editor):
+    """Fill in the new counters, and total_units, from the existing units"""
+    Property = apps.get_model('properties', 'Property')
+    counters = {
+        'total_units': Q(),
+        'occupied_units': Q(units__status='OCCUPIED'),
+        'vacant_units': Q(units__status='VACANT'),
+        'maintenance_units': Q(units__status='MAINTENANCE'),
+    }
+
+    # One grouped query for every property, including those without units
+    buildings = list(Property.objects.only('pk').annotate(**{
+        f'counted_{field}': Coalesce(Count('units', filter=condition), 0) for field, condition in counters.items()
+    }))
+    for building in buildings:
+        for field in counters:
+            setattr(building, field, getattr(building, f'counted_{field}'))
+    Property.objects.bulk_update(buildings, list(counters), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='maintenance_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='occupied_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='vacant_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_units, migrations.RunPython.noop),
+    ]
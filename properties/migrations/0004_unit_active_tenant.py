@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_active_tenants(apps, schema_editor):
+    """Point every unit at its ACTIVE tenancy"""
+    Tenant = apps.get_model('tenants', 'Tenant')
+    Unit = apps.get_model('properties', 'Unit')
+
+    units = []
+    for unit_id, tenant_id in Tenant.objects.filter(status='ACTIVE').values_list('unit', 'pk').iterator():
+        units.append(Unit(pk=unit_id, active_tenant_id=tenant_id))
+    Unit.objects.bulk_update(units, ['active_tenant'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_unit_counters'),
+        ('tenants', '0004_unique_active_tenancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='active_tenant',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.tenant'),
+        ),
+        migrations.RunPython(link_active_tenants, migrations.RunPython.noop),
+    ]
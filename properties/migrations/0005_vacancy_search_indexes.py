@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_unit_active_tenant'),
+        ('tenants', '0004_unique_active_tenancy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['city', 'property_type'], name='properties__city_15744f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['status', 'rent_amount'], name='properties__status_2aab45_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['status', 'size_sqft'], name='properties__status_4132d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['status', 'bedrooms', 'rent_amount'], name='properties__status_f952ee_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 
 
@@ -25,24 +26,54 @@ class Property(models.Model):
         limit_choices_to={'role': 'LANDLORD'}
     )
     image = models.ImageField(upload_to='properties/', blank=True, null=True)
+    # Thumbnail/WebP variants of the image (see core/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Unit counters, maintained by Unit.save() / Unit.delete()
     total_units = models.IntegerField(default=0)
+    occupied_units = models.IntegerField(default=0)
+    vacant_units = models.IntegerField(default=0)
+    maintenance_units = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Properties'
         ordering = ['-created_at']
+        indexes = [
+            # Vacancy search filters
+            models.Index(fields=['city', 'property_type']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.city}"
     
-    @property
-    def occupied_units(self):
-        return self.units.filter(status='OCCUPIED').count()
+    def save(self, *args, **kwargs):
+        # Never write back counters loaded before a unit changed underneath
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in UNIT_COUNTERS
+            ]
+        super().save(*args, **kwargs)
     
-    @property
-    def vacant_units(self):
-        return self.units.filter(status='VACANT').count()
+    @staticmethod
+    def shift_unit_counts(previous, current):
+        """
+        Move one unit's count from its previous (building_id, status) to the
+        current one, as F() updates so concurrent changes add up.
+        """
+        deltas = {}
+        for state, step in ((previous, -1), (current, 1)):
+            if state is None or state[0] is None:
+                continue
+            building = deltas.setdefault(state[0], {})
+            for field in ('total_units', STATUS_COUNTERS.get(state[1])):
+                if field:
+                    building[field] = building.get(field, 0) + step
+        for building_id, changes in deltas.items():
+            changes = {field: F(field) + delta for field, delta in changes.items() if delta}
+            if changes:
+                Property.objects.filter(pk=building_id).update(**changes)
     
     @property
     def occupancy_rate(self):
@@ -51,6 +82,14 @@ class Property(models.Model):
         return (self.occupied_units / self.total_units) * 100
 
 
+STATUS_COUNTERS = {
+    'OCCUPIED': 'occupied_units',
+    'VACANT': 'vacant_units',
+    'MAINTENANCE': 'maintenance_units',
+}
+UNIT_COUNTERS = ('total_units', *STATUS_COUNTERS.values())
+
+
 class Unit(models.Model):
     """
     Individual rental unit (room/apartment) within a property
@@ -70,20 +109,64 @@ class Unit(models.Model):
     rent_amount = models.DecimalField(max_digits=10, decimal_places=2)
     deposit_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='VACANT')
+    # The unit's ACTIVE tenancy, kept up to date by Tenant.save()
+    active_tenant = models.OneToOneField(
+        'tenants.Tenant',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        editable=False,
+    )
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='units/', blank=True, null=True)
+    # Thumbnail/WebP variants of the image (see core/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['building', 'unit_number']
         unique_together = ['building', 'unit_number']
+        indexes = [
+            # Vacancy search: rent range and sorts within a status, and the bedrooms filter
+            models.Index(fields=['status', 'rent_amount']),
+            models.Index(fields=['status', 'size_sqft']),
+            models.Index(fields=['status', 'bedrooms', 'rent_amount']),
+        ]
     
     def __str__(self):
         return f"{self.building.name} - Unit {self.unit_number}"
     
+    def _stored_state(self):
+        """The unit's (building_id, status) as stored, locking the row"""
+        if self._state.adding:
+            return None
+        return Unit.objects.select_for_update().filter(pk=self.pk).values_list('building_id', 'status').first()
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = self._stored_state()
+            super().save(*args, **kwargs)
+            current = (self.building_id, self.status)
+            update_fields = kwargs.get('update_fields')
+            if stored and update_fields is not None:
+                # Fields left out of update_fields keep their stored value
+                current = tuple(
+                    value if {name, f'{name}_id'} & set(update_fields) else old
+                    for name, value, old in zip(('building', 'status'), current, stored)
+                )
+            if stored != current:
+                Property.shift_unit_counts(stored, current)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = self._stored_state()
+            result = super().delete(*args, **kwargs)
+            Property.shift_unit_counts(stored, None)
+        return result
+    
     @property
     def current_tenant(self):
         """Get the current active tenant for this unit"""
-        from tenants.models import Tenant
-        return Tenant.objects.filter(unit=self, status='ACTIVE').first()
+        return self.active_tenant
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import ImageVariantsField
 from .models import Property, Unit
 
 
@@ -6,14 +7,17 @@ class UnitSerializer(serializers.ModelSerializer):
     """Serializer for Unit model"""
     current_tenant = serializers.SerializerMethodField()
     property_name = serializers.CharField(source='building.name', read_only=True)
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Unit
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
+        # Read by get_current_tenant
+        select_related = ('active_tenant__user',)
     
     def get_current_tenant(self, obj):
-        tenant = obj.current_tenant
+        tenant = obj.active_tenant
         if tenant:
             return {
                 'id': tenant.id,
@@ -26,10 +30,31 @@ class UnitSerializer(serializers.ModelSerializer):
 class UnitListSerializer(serializers.ModelSerializer):
     """Minimal serializer for unit lists"""
     property_name = serializers.CharField(source='building.name', read_only=True)
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Unit
-        fields = ('id', 'unit_number', 'property_name', 'rent_amount', 'status')
+        fields = ('id', 'unit_number', 'property_name', 'rent_amount', 'status', 'image_variants')
+
+
+class VacancyPropertySerializer(serializers.ModelSerializer):
+    """Public details of the property a vacant unit is in"""
+    image_variants = ImageVariantsField()
+    
+    class Meta:
+        model = Property
+        fields = ('id', 'name', 'property_type', 'address', 'city', 'image', 'image_variants')
+
+
+class VacancySerializer(serializers.ModelSerializer):
+    """Public listing of a vacant unit, without tenant or owner details"""
+    building = VacancyPropertySerializer(read_only=True)
+    image_variants = ImageVariantsField()
+    
+    class Meta:
+        model = Unit
+        fields = ('id', 'unit_number', 'floor', 'bedrooms', 'bathrooms', 'size_sqft',
+                  'rent_amount', 'deposit_amount', 'description', 'image', 'image_variants', 'building')
 
 
 class PropertySerializer(serializers.ModelSerializer):
@@ -37,13 +62,15 @@ class PropertySerializer(serializers.ModelSerializer):
     units = UnitSerializer(many=True, read_only=True)
     owner_name = serializers.CharField(source='owner.get_full_name', read_only=True)
     occupancy_rate = serializers.ReadOnlyField()
-    occupied_units = serializers.ReadOnlyField()
-    vacant_units = serializers.ReadOnlyField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Property
         fields = '__all__'
-        read_only_fields = ('id', 'total_units', 'created_at', 'updated_at')
+        read_only_fields = (
+            'id', 'total_units', 'occupied_units', 'vacant_units', 'maintenance_units',
+            'created_at', 'updated_at',
+        )
     
     def create(self, validated_data):
         # Set owner to current user if not provided
@@ -56,8 +83,10 @@ class PropertyListSerializer(serializers.ModelSerializer):
     """Minimal serializer for property lists"""
     owner_name = serializers.CharField(source='owner.get_full_name', read_only=True)
     occupancy_rate = serializers.ReadOnlyField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Property
         fields = ('id', 'name', 'property_type', 'city', 'total_units', 
-                  'occupied_units', 'vacant_units', 'occupancy_rate', 'owner_name')
+                  'occupied_units', 'vacant_units', 'maintenance_units', 'occupancy_rate', 'owner_name',
+                  'image', 'image_variants')
@@ -1,3 +1,210 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import testing
+from tenants.models import Tenant
+from .counters import count_units, reconcile
+from .models import UNIT_COUNTERS, Property, Unit
+
+
+UNIT_ENDPOINTS = [
+    ('/api/units/', 2),
+    ('/api/units/{unit.pk}/', 1),
+    ('/api/units/vacant/', 2),
+    ('/api/units/occupied/', 2),
+]
+VACANCY_ENDPOINTS = [
+    ('/api/vacancies/', 3),
+    ('/api/vacancies/?bedrooms=1&sort=-rent&min_rent=5000', 3),
+]
+# Read from the stored unit counters
+PROPERTY_COUNT_ENDPOINTS = [
+    ('/api/properties/', 2),
+    ('/api/properties/statistics/', 1),
+]
+# UnitSerializer.current_tenant joins Unit.active_tenant
+CURRENT_TENANT_ENDPOINTS = [
+    ('/api/properties/{property.pk}/', 4),
+    ('/api/properties/{property.pk}/units/', 3),
+    ('/api/properties/{property.pk}/vacant_units/', 3),
+]
+
+
+class PropertyQueryBudgetTests(testing.QueryBudgetTestCase):
+    """
+    Query budgets for the property and unit endpoints
+    """
+    endpoints = {
+        'landlord': UNIT_ENDPOINTS + VACANCY_ENDPOINTS,
+        'tenant': UNIT_ENDPOINTS + VACANCY_ENDPOINTS,
+        'caretaker': [
+            ('/api/properties/', 1),
+            ('/api/properties/statistics/', 1),
+            ('/api/units/', 1),
+            ('/api/units/vacant/', 1),
+        ] + VACANCY_ENDPOINTS,
+        'staff': UNIT_ENDPOINTS + VACANCY_ENDPOINTS,
+    }
+
+    def test_property_unit_counts(self):
+        self.assertQueryBudget({
+            role: PROPERTY_COUNT_ENDPOINTS for role in ('landlord', 'tenant', 'staff')
+        })
+
+    def test_unit_current_tenant(self):
+        self.assertQueryBudget({
+            role: CURRENT_TENANT_ENDPOINTS for role in ('landlord', 'tenant', 'staff')
+        })
+
+
+class UnitCounterTests(TestCase):
+    """
+    Property unit counters follow unit and tenancy changes
+    """
+
+    def setUp(self):
+        self.users = testing.create_users()
+        self.building = Property.objects.create(
+            name='Counter Court', address='1 Test Road', city='Nairobi', owner=self.users['landlord']
+        )
+        self.other = Property.objects.create(
+            name='Other Court', address='2 Test Road', city='Nairobi', owner=self.users['landlord']
+        )
+
+    def assertCounters(self, building, **expected):
+        building.refresh_from_db()
+        stored = {field: getattr(building, field) for field in UNIT_COUNTERS}
+        self.assertEqual(stored, {**dict.fromkeys(UNIT_COUNTERS, 0), **expected})
+        self.assertEqual(stored, count_units([building.pk])[building.pk])
+
+    def test_unit_lifecycle(self):
+        first = Unit.objects.create(building=self.building, unit_number='1', rent_amount=10000)
+        second = Unit.objects.create(building=self.building, unit_number='2', rent_amount=10000)
+        self.assertCounters(self.building, total_units=2, vacant_units=2)
+
+        tenant = Tenant.objects.create(user=self.users['tenant'], unit=first, move_in_date=date(2026, 1, 1))
+        self.assertCounters(self.building, total_units=2, occupied_units=1, vacant_units=1)
+
+        second.status = 'MAINTENANCE'
+        second.save()
+        self.assertCounters(self.building, total_units=2, occupied_units=1, maintenance_units=1)
+
+        tenant.status = 'VACATED'
+        tenant.save()
+        self.assertCounters(self.building, total_units=2, vacant_units=1, maintenance_units=1)
+
+        second.building = self.other
+        second.save()
+        self.assertCounters(self.building, total_units=1, vacant_units=1)
+        self.assertCounters(self.other, total_units=1, maintenance_units=1)
+
+        second.delete()
+        self.assertCounters(self.other)
+
+    def test_stale_property_save_keeps_counters(self):
+        stale = Property.objects.get(pk=self.building.pk)
+        Unit.objects.create(building=self.building, unit_number='1', rent_amount=10000)
+        stale.name = 'Renamed Court'
+        stale.save()
+        self.assertCounters(self.building, total_units=1, vacant_units=1)
+
+    def test_reconcile(self):
+        Unit.objects.create(building=self.building, unit_number='1', rent_amount=10000)
+        Property.objects.filter(pk=self.building.pk).update(total_units=7, vacant_units=0)
+        self.assertEqual(reconcile()['corrected'], 1)
+        self.assertCounters(self.building, total_units=1, vacant_units=1)
+        self.assertEqual(reconcile()['corrected'], 0)
+
+
+class UnitActionPaginationTests(TestCase):
+    """
+    Unit list actions return page-number envelopes
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+        cls.building = Property.objects.create(
+            name='Paged Court', address='1 Test Road', city='Nairobi', owner=cls.users['landlord']
+        )
+        Unit.objects.bulk_create(
+            Unit(building=cls.building, unit_number=f'{number:02}', rent_amount=10000) for number in range(25)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users['landlord'])
+
+    def test_envelope_and_page_size(self):
+        for url in (
+            f'/api/properties/{self.building.pk}/units/',
+            f'/api/properties/{self.building.pk}/vacant_units/',
+            '/api/units/vacant/',
+        ):
+            with self.subTest(url=url):
+                data = self.client.get(url).data
+                self.assertEqual(list(data), ['count', 'next', 'previous', 'results'])
+                self.assertEqual((data['count'], len(data['results'])), (25, 20))
+                self.assertEqual(len(self.client.get(data['next']).data['results']), 5)
+                self.assertEqual(len(self.client.get(url, {'page_size': 100}).data['results']), 25)
+
+
+class VacancySearchTests(TestCase):
+    """
+    Public vacancy search filters, facets and anonymous caching
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+        for city, property_type, rooms in (('Nairobi', 'APARTMENT', (1, 2, 2)), ('Mombasa', 'HOUSE', (2, 3))):
+            building = Property.objects.create(
+                name=f'{city} Court', property_type=property_type, address='1 Test Road', city=city,
+                owner=cls.users['landlord'],
+            )
+            for number, bedrooms in enumerate(rooms):
+                Unit.objects.create(
+                    building=building, unit_number=str(number), bedrooms=bedrooms,
+                    rent_amount=10000 * (number + 1) + bedrooms * 1000,
+                )
+        Unit.objects.filter(building__city='Mombasa', bedrooms=3).update(status='OCCUPIED')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, **params):
+        response = self.client.get('/api/vacancies/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_filters_and_sort(self):
+        data = self.search(city='Nairobi', bedrooms=2, sort='-rent').data
+        self.assertEqual([unit['rent_amount'] for unit in data['results']], ['32000.00', '22000.00'])
+        self.assertEqual(self.search(property_type='house', max_rent=15000).data['count'], 1)
+
+    def test_facets_ignore_their_own_filter(self):
+        facets = self.search(city='Nairobi', bedrooms=2).data['facets']
+        self.assertEqual(facets['city'], {'Mombasa': 1, 'Nairobi': 2})
+        self.assertEqual(facets['bedrooms'], {'1': 1, '2': 2})
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'bedrooms': 'two'}, {'sort': 'name'}, {'min_rent': 10, 'max_rent': 5},
+            {'min_rent': 'NaN'}, {'max_rent': 'Infinity'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/vacancies/', params).status_code, 400)
+
+    def test_anonymous_results_are_cached(self):
+        self.search()
+        Unit.objects.filter(building__city='Nairobi').update(status='OCCUPIED')
+        response = self.search()
+        self.assertEqual(response.data['count'], 4)
+        self.assertIn('max-age', response['Cache-Control'])
 
-# Create your tests here.
+        self.client.force_authenticate(self.users['landlord'])
+        self.assertEqual(self.search().data['count'], 1)
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet, UnitViewSet
+from .views import PropertyViewSet, UnitViewSet, VacancySearchView
 
 router = DefaultRouter()
 router.register(r'properties', PropertyViewSet, basename='property')
 router.register(r'units', UnitViewSet, basename='unit')
 
 urlpatterns = [
+    path('vacancies/', VacancySearchView.as_view(), name='vacancy-search'),
     path('', include(router.urls)),
 ]
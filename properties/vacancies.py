@@ -0,0 +1,106 @@
+"""
+Public search over vacant units, with facet counts
+"""
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count
+
+from .models import Property, Unit
+
+
+SORTS = {
+    'rent': ('rent_amount', 'id'),
+    '-rent': ('-rent_amount', '-id'),
+    'size': ('size_sqft', 'id'),
+    '-size': ('-size_sqft', '-id'),
+}
+DEFAULT_SORT = 'rent'
+PROPERTY_TYPES = {value for value, _ in Property.PROPERTY_TYPE_CHOICES}
+
+
+def parse_params(query_params):
+    """
+    Validated search parameters, or raise ValueError with a message for the
+    client. Unknown parameters are ignored; empty ones count as absent.
+    """
+    def value(name):
+        return (query_params.get(name) or '').strip() or None
+
+    def number(name, kind, minimum=0):
+        raw = value(name)
+        if raw is None:
+            return None
+        try:
+            parsed = kind(raw)
+        except (ValueError, InvalidOperation):
+            raise ValueError(f'{name} must be a number')
+        if isinstance(parsed, Decimal) and not parsed.is_finite():
+            raise ValueError(f'{name} must be a number')
+        if parsed < minimum:
+            raise ValueError(f'{name} must be at least {minimum}')
+        return parsed
+
+    params = {
+        'city': value('city'),
+        'property_type': value('property_type'),
+        'bedrooms': number('bedrooms', int),
+        'bathrooms': number('bathrooms', int),
+        'min_rent': number('min_rent', Decimal),
+        'max_rent': number('max_rent', Decimal),
+        'sort': value('sort') or DEFAULT_SORT,
+    }
+    if params['property_type'] is not None:
+        params['property_type'] = params['property_type'].upper()
+        if params['property_type'] not in PROPERTY_TYPES:
+            raise ValueError(f"property_type must be one of {', '.join(sorted(PROPERTY_TYPES))}")
+    if params['sort'] not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    if None not in (params['min_rent'], params['max_rent']) and params['min_rent'] > params['max_rent']:
+        raise ValueError('min_rent cannot be more than max_rent')
+    return params
+
+
+def _filter(queryset, params, facets=False):
+    """Apply ``params``; with ``facets`` leave out the faceted city and bedrooms"""
+    lookups = {
+        'building__property_type': params['property_type'],
+        'bathrooms': params['bathrooms'],
+        'rent_amount__gte': params['min_rent'],
+        'rent_amount__lte': params['max_rent'],
+    }
+    if not facets:
+        lookups.update({'building__city': params['city'], 'bedrooms': params['bedrooms']})
+    return queryset.filter(**{lookup: value for lookup, value in lookups.items() if value is not None})
+
+
+def vacant_units():
+    return Unit.objects.filter(status='VACANT')
+
+
+def search(params):
+    """Vacant units matching ``params`` in the requested order"""
+    return _filter(vacant_units(), params).order_by(*SORTS[params['sort']])
+
+
+def facets(params):
+    """
+    Matching units per city and per bedroom count, from one grouped query.
+
+    Each facet counts as if its own filter were not set, so a client can
+    show how many units picking another city or bedroom count would give.
+    """
+    rows = (
+        _filter(vacant_units(), params, facets=True)
+        .values_list('building__city', 'bedrooms').annotate(count=Count('id')).order_by()
+    )
+    cities, bedrooms = Counter(), Counter()
+    for city, bedroom_count, count in rows:
+        if params['bedrooms'] is None or bedroom_count == params['bedrooms']:
+            cities[city] += count
+        if params['city'] is None or city == params['city']:
+            bedrooms[bedroom_count] += count
+    return {
+        'city': dict(sorted(cities.items())),
+        'bedrooms': {str(key): value for key, value in sorted(bedrooms.items())},
+    }
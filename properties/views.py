@@ -1,18 +1,26 @@
-from rest_framework import viewsets, status
+import hashlib
+import json
+
+from rest_framework import generics, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from core.mixins import PaginatedActionMixin, QueryPlanMixin
+from . import vacancies
 from .models import Property, Unit
 from .serializers import (
     PropertySerializer, 
     PropertyListSerializer,
     UnitSerializer,
-    UnitListSerializer
+    UnitListSerializer,
+    VacancySerializer
 )
 
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing properties
     """
@@ -21,6 +29,9 @@ class PropertyViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'list':
             return PropertyListSerializer
+        # These list units; get_object() needs no units prefetched with the property
+        if self.action in ('units', 'vacant_units'):
+            return UnitSerializer
         return PropertySerializer
     
     def get_queryset(self):
@@ -44,36 +55,37 @@ class PropertyViewSet(viewsets.ModelViewSet):
         """Get all units for a property"""
         property = self.get_object()
         units = property.units.all()
-        serializer = UnitSerializer(units, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(units, UnitSerializer)
     
     @action(detail=True, methods=['get'])
     def vacant_units(self, request, pk=None):
         """Get vacant units for a property"""
         property = self.get_object()
         units = property.units.filter(status='VACANT')
-        serializer = UnitSerializer(units, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(units, UnitSerializer)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get overall property statistics"""
-        queryset = self.get_queryset()
-        total_properties = queryset.count()
-        total_units = sum(p.total_units for p in queryset)
-        occupied_units = sum(p.occupied_units for p in queryset)
-        vacant_units = sum(p.vacant_units for p in queryset)
+        totals = self.get_queryset().aggregate(
+            total_properties=Count('id'),
+            total_units=Sum('total_units'),
+            occupied_units=Sum('occupied_units'),
+            vacant_units=Sum('vacant_units'),
+        )
+        total_units = totals['total_units'] or 0
+        occupied_units = totals['occupied_units'] or 0
         
         return Response({
-            'total_properties': total_properties,
+            'total_properties': totals['total_properties'],
             'total_units': total_units,
             'occupied_units': occupied_units,
-            'vacant_units': vacant_units,
+            'vacant_units': totals['vacant_units'] or 0,
             'occupancy_rate': (occupied_units / total_units * 100) if total_units > 0 else 0
         })
 
 
-class UnitViewSet(viewsets.ModelViewSet):
+class UnitViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing units
     """
@@ -88,7 +100,7 @@ class UnitViewSet(viewsets.ModelViewSet):
         user = self.request.user
         # Landlords see units in their properties
         if user.is_landlord:
-            return Unit.objects.filter(property__owner=user)
+            return Unit.objects.filter(building__owner=user)
         # Admins see all units
         elif user.is_staff:
             return Unit.objects.all()
@@ -97,30 +109,49 @@ class UnitViewSet(viewsets.ModelViewSet):
             return Unit.objects.filter(tenant__user=user)
         return Unit.objects.none()
     
-    def perform_create(self, serializer):
-        unit = serializer.save()
-        # Update property total_units count
-        building = unit.building
-        building.total_units = building.units.count()
-        building.save()
-    
-    def perform_destroy(self, instance):
-        building = instance.building
-        instance.delete()
-        # Update property total_units count
-        building.total_units = building.units.count()
-        building.save()
-    
     @action(detail=False, methods=['get'])
     def vacant(self, request):
         """Get all vacant units"""
         units = self.get_queryset().filter(status='VACANT')
-        serializer = UnitListSerializer(units, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(units, UnitListSerializer)
     
     @action(detail=False, methods=['get'])
     def occupied(self, request):
         """Get all occupied units"""
         units = self.get_queryset().filter(status='OCCUPIED')
-        serializer = UnitListSerializer(units, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(units, UnitListSerializer)
+
+
+class VacancySearchView(QueryPlanMixin, generics.ListAPIView):
+    """
+    Public search over vacant units, with facet counts
+    """
+    permission_classes = [AllowAny]
+    serializer_class = VacancySerializer
+    
+    def cache_key(self, params):
+        page = {name: self.request.query_params.get(name) for name in ('page', 'page_size')}
+        key = json.dumps({**params, **page}, sort_keys=True, default=str)
+        return f"properties:vacancies:{hashlib.sha256(key.encode()).hexdigest()}"
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            params = vacancies.parse_params(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Anonymous visitors all see the same results, so they share a short-lived cache
+        anonymous = not request.user.is_authenticated
+        key = self.cache_key(params) if anonymous else None
+        data = cache.get(key) if anonymous else None
+        if data is None:
+            page = self.paginate_queryset(self.filter_queryset(vacancies.search(params)))
+            data = self.get_paginated_response(self.get_serializer(page, many=True).data).data
+            data['facets'] = vacancies.facets(params)
+            if anonymous:
+                cache.set(key, data, settings.VACANCY_SEARCH_CACHE_TIMEOUT)
+        
+        response = Response(data)
+        if anonymous:
+            response['Cache-Control'] = f'public, max-age={settings.VACANCY_SEARCH_CACHE_TIMEOUT}'
+        return response
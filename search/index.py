@@ -0,0 +1,229 @@
+"""
+Full-text search over tenants, properties, units and complaints.
+
+Each searchable object has one SearchDocument, written by the signal
+handlers in signals.py as the object changes, or in bulk by rebuild().
+On SQLite with FTS5 the documents' title and content are indexed by an
+external-content FTS5 table and results are ranked with bm25; without it
+the same search runs as LIKE scans over the document table.
+"""
+import re
+import time
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from maintenance.models import Complaint
+from properties.models import Property, Unit
+from tenants.models import Tenant
+
+from .models import SearchDocument
+
+
+FTS_TABLE = 'search_searchdocument_fts'
+TERM = re.compile(r'\w+')
+MAX_TERMS = 8
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+KINDS = [value for value, _ in SearchDocument.KIND_CHOICES]
+DOCUMENT_FIELDS = [
+    'title', 'subtitle', 'content', 'owner', 'building', 'unit', 'tenant_user', 'assignee', 'updated_at',
+]
+
+# Kind -> the lookup from its model to the owning landlord
+OWNER_LOOKUPS = {
+    'TENANT': 'unit__building__owner',
+    'PROPERTY': 'owner',
+    'UNIT': 'building__owner',
+    'COMPLAINT': 'unit__building__owner',
+}
+
+_fts_available = {}
+
+
+def _text(*values):
+    return ' '.join(str(value) for value in values if value)
+
+
+def _tenant_document(tenant):
+    user, unit = tenant.user, tenant.unit
+    building = unit.building
+    return SearchDocument(
+        kind='TENANT', object_id=tenant.pk,
+        title=user.get_full_name() or user.username,
+        subtitle=f'{building.name} · Unit {unit.unit_number} · {tenant.get_status_display()}',
+        content=_text(
+            user.username, user.email, user.phone, user.national_id, tenant.emergency_contact_name,
+            tenant.emergency_contact_phone, unit.unit_number, building.name,
+        ),
+        owner_id=building.owner_id, building_id=building.pk, unit_id=unit.pk, tenant_user_id=user.pk,
+    )
+
+
+def _property_document(building):
+    return SearchDocument(
+        kind='PROPERTY', object_id=building.pk,
+        title=building.name,
+        subtitle=f'{building.city} · {building.get_property_type_display()}',
+        content=_text(building.address, building.city, building.description),
+        owner_id=building.owner_id, building_id=building.pk,
+    )
+
+
+def _unit_document(unit):
+    building = unit.building
+    return SearchDocument(
+        kind='UNIT', object_id=unit.pk,
+        title=f'Unit {unit.unit_number}',
+        subtitle=f'{building.name} · {unit.get_status_display()}',
+        content=_text(unit.unit_number, building.name, unit.description),
+        owner_id=building.owner_id, building_id=building.pk, unit_id=unit.pk,
+    )
+
+
+def _complaint_document(complaint):
+    unit, user = complaint.unit, complaint.tenant.user
+    building = unit.building
+    return SearchDocument(
+        kind='COMPLAINT', object_id=complaint.pk,
+        title=complaint.title,
+        subtitle=f'{building.name} · Unit {unit.unit_number} · {complaint.get_status_display()}',
+        content=_text(
+            complaint.description, complaint.get_category_display(), complaint.resolution_notes,
+            user.get_full_name() or user.username, complaint.technician_name, unit.unit_number, building.name,
+        ),
+        owner_id=building.owner_id, building_id=building.pk, unit_id=unit.pk,
+        tenant_user_id=user.pk, assignee_id=complaint.assigned_to_id,
+    )
+
+
+# Kind -> (queryset with what its document reads, document builder)
+SOURCES = {
+    'TENANT': (lambda: Tenant.objects.select_related('user', 'unit__building'), _tenant_document),
+    'PROPERTY': (lambda: Property.objects.all(), _property_document),
+    'UNIT': (lambda: Unit.objects.select_related('building'), _unit_document),
+    'COMPLAINT': (lambda: Complaint.objects.select_related('unit__building', 'tenant__user'), _complaint_document),
+}
+
+
+def _write(documents):
+    SearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=DOCUMENT_FIELDS,
+    )
+
+
+def index(kind, queryset, batch_size=500):
+    """Write the documents of the ``kind`` objects in ``queryset``; returns how many"""
+    build = SOURCES[kind][1]
+    batch, written = [], 0
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(build(obj))
+        if len(batch) >= batch_size:
+            _write(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        _write(batch)
+        written += len(batch)
+    return written
+
+
+def index_objects(kind, **lookups):
+    """(Re)index the ``kind`` objects matching ``lookups``"""
+    return index(kind, SOURCES[kind][0]().filter(**lookups))
+
+
+def remove(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def stored(kind, object_id, *fields):
+    """``fields`` of the current document of an object; None when it has none"""
+    return SearchDocument.objects.filter(kind=kind, object_id=object_id).values_list(*fields).first()
+
+
+def rebuild(owner=None, kinds=None, batch_size=500):
+    """
+    Rewrite the documents of every object (or one landlord's) and drop
+    those whose object is gone.
+    """
+    started = time.perf_counter()
+    counts = {}
+    with transaction.atomic():
+        for kind in kinds or KINDS:
+            source = SOURCES[kind][0]()
+            documents = SearchDocument.objects.filter(kind=kind)
+            if owner is not None:
+                source = source.filter(**{OWNER_LOOKUPS[kind]: owner})
+                documents = documents.filter(owner=owner)
+            counts[kind.lower()] = index(kind, source, batch_size)
+            documents.exclude(object_id__in=source.model.objects.values('pk')).delete()
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    counts['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return counts
+
+
+def fts_available():
+    """Whether the FTS5 table exists on this database, checked once per database"""
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _fts_available:
+        _fts_available[key] = (
+            connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available[key]
+
+
+def scope(user):
+    """Q of the documents ``user`` may find, as the list endpoints scope them; None for none"""
+    if user.is_landlord:
+        return Q(owner=user)
+    elif user.is_caretaker:
+        return Q(kind='COMPLAINT', assignee=user)
+    elif user.is_staff:
+        return Q()
+    elif user.is_tenant:
+        tenancies = Tenant.objects.filter(user=user)
+        return (
+            Q(kind__in=['TENANT', 'COMPLAINT'], tenant_user=user)
+            | Q(kind='UNIT', unit__in=tenancies.values('unit'))
+            | Q(kind='PROPERTY', building__in=tenancies.values('unit__building'))
+        )
+    return None
+
+
+def search(user, query, kinds=None, limit=DEFAULT_LIMIT):
+    """
+    Documents visible to ``user`` matching every word of ``query``, best
+    first. The last word, and every other, also matches as a prefix, so
+    partial input works for autocomplete.
+    """
+    terms = TERM.findall(query.lower())[:MAX_TERMS]
+    condition = scope(user)
+    if not terms or condition is None:
+        return []
+    documents = SearchDocument.objects.filter(condition)
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    if fts_available():
+        return _match(documents, terms, limit)
+    return _scan(documents, terms, limit)
+
+
+def _match(documents, terms, limit):
+    expression = ' '.join(f'"{term}"*' for term in terms)
+    scoped, params = documents.values('pk').query.sql_with_params()
+    return list(SearchDocument.objects.raw(
+        f'SELECT document.* FROM {FTS_TABLE} '
+        f'JOIN {SearchDocument._meta.db_table} document ON document.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s AND document.id IN ({scoped}) '
+        f'ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), document.id LIMIT %s',
+        [expression, *params, limit],
+    ))
+
+
+def _scan(documents, terms, limit):
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    return list(documents.order_by('title', 'id')[:limit])
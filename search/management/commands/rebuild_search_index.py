@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from search import index
+
+
+class Command(BaseCommand):
+    help = 'Rewrites the search documents of tenants, properties, units and complaints from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlord', help='Only rebuild the documents of this landlord username')
+        parser.add_argument(
+            '--kind', action='append', choices=[kind.lower() for kind in index.KINDS],
+            help='Only rebuild this kind of document (repeatable)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Documents per write')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['landlord']:
+            User = get_user_model()
+            try:
+                owner = User.objects.get(username=options['landlord'], role='LANDLORD')
+            except User.DoesNotExist:
+                raise CommandError(f"Landlord '{options['landlord']}' not found")
+
+        kinds = [kind.upper() for kind in options['kind']] if options['kind'] else None
+        result = index.rebuild(owner=owner, kinds=kinds, batch_size=options['batch_size'])
+        elapsed = result.pop('elapsed_seconds')
+        counts = ', '.join(f'{count} {kind}' for kind, count in result.items())
+        fallback = '' if index.fts_available() else ' (FTS5 unavailable; searches fall back to LIKE scans)'
+        self.stdout.write(self.style.SUCCESS(f"Indexed {counts} in {elapsed}s{fallback}"))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+from django.db import migrations
+
+
+FTS_TABLE = 'search_searchdocument_fts'
+DOCUMENTS = 'search_searchdocument'
+
+
+def create_fts_index(apps, schema_editor):
+    """
+    External-content FTS5 table over the documents' title and content, fed
+    by triggers on the document table. Skipped on other databases and on
+    SQLite builds without FTS5; searches then fall back to LIKE scans.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+            return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, content='{DOCUMENTS}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    insert = f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);"
+    delete = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) "
+        f"VALUES ('delete', old.id, old.title, old.content);"
+    )
+    schema_editor.execute(f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {DOCUMENTS} BEGIN {insert} END")
+    schema_editor.execute(f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {DOCUMENTS} BEGIN {delete} END")
+    schema_editor.execute(
+        f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, content ON {DOCUMENTS} "
+        f"BEGIN {delete} {insert} END"
+    )
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for trigger in ('insert', 'delete', 'update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
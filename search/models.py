@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of one tenant, property, unit or complaint, with the
+    ids its visibility is scoped by. The FTS5 index over title and content
+    is kept in step by triggers (see migration 0002).
+    """
+    KIND_CHOICES = [
+        ('TENANT', 'Tenant'),
+        ('PROPERTY', 'Property'),
+        ('UNIT', 'Unit'),
+        ('COMPLAINT', 'Complaint'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    content = models.TextField(blank=True)
+
+    # Copied from the indexed object so results can be scoped per role
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', null=True, blank=True
+    )
+    building = models.ForeignKey(
+        'properties.Property', on_delete=models.CASCADE, related_name='+', null=True, blank=True
+    )
+    unit = models.ForeignKey(
+        'properties.Unit', on_delete=models.CASCADE, related_name='+', null=True, blank=True
+    )
+    tenant_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', null=True, blank=True
+    )
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name='+', null=True, blank=True
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
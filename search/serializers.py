@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from .models import SearchDocument
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """Serializer for one search hit; ``id`` is the id of the matched object"""
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    
+    class Meta:
+        model = SearchDocument
+        fields = ['kind', 'id', 'title', 'subtitle']
@@ -0,0 +1,89 @@
+"""
+Keep the search documents in step with the objects they describe
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from maintenance.models import Complaint
+from properties.models import Property, Unit
+from tenants.models import Tenant
+
+from . import index
+
+
+User = get_user_model()
+
+# Fields the documents read; saves limited to other fields are ignored
+USER_FIELDS = {'first_name', 'last_name', 'username', 'email', 'phone', 'national_id'}
+PROPERTY_FIELDS = {'name', 'property_type', 'address', 'city', 'description', 'owner'}
+UNIT_FIELDS = {'unit_number', 'building', 'status', 'description'}
+
+
+def _skipped(raw, update_fields, fields=None):
+    """True for fixture loads and for saves that wrote none of ``fields``"""
+    return raw or (fields is not None and update_fields is not None and not set(update_fields) & fields)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _skipped(raw, update_fields, USER_FIELDS):
+        return
+    index.index_objects('TENANT', user=instance)
+    index.index_objects('COMPLAINT', tenant__user=instance)
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _skipped(raw, update_fields, PROPERTY_FIELDS):
+        return
+    previous = index.stored('PROPERTY', instance.pk, 'title', 'owner')
+    index.index_objects('PROPERTY', pk=instance.pk)
+    # Units, tenants and complaints show the property name and share its owner
+    if previous is not None and previous != (instance.name, instance.owner_id):
+        index.index_objects('UNIT', building=instance)
+        index.index_objects('TENANT', unit__building=instance)
+        index.index_objects('COMPLAINT', unit__building=instance)
+
+
+@receiver(post_save, sender=Unit)
+def unit_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if _skipped(raw, update_fields, UNIT_FIELDS):
+        return
+    previous = index.stored('UNIT', instance.pk, 'title', 'building')
+    index.index_objects('UNIT', pk=instance.pk)
+    if previous is not None and previous != (f'Unit {instance.unit_number}', instance.building_id):
+        index.index_objects('TENANT', unit=instance)
+        index.index_objects('COMPLAINT', unit=instance)
+
+
+@receiver(post_save, sender=Tenant)
+def tenant_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index.index_objects('TENANT', pk=instance.pk)
+
+
+@receiver(post_save, sender=Complaint)
+def complaint_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index.index_objects('COMPLAINT', pk=instance.pk)
+
+
+@receiver(post_delete, sender=Tenant)
+def tenant_deleted(sender, instance, **kwargs):
+    index.remove('TENANT', [instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    index.remove('PROPERTY', [instance.pk])
+
+
+@receiver(post_delete, sender=Unit)
+def unit_deleted(sender, instance, **kwargs):
+    index.remove('UNIT', [instance.pk])
+
+
+@receiver(post_delete, sender=Complaint)
+def complaint_deleted(sender, instance, **kwargs):
+    index.remove('COMPLAINT', [instance.pk])
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import testing
+from maintenance.models import Complaint
+from properties.models import Property
+from . import index
+from .models import SearchDocument
+
+
+SEARCH_ENDPOINTS = [
+    ('/api/search/?q=leak', 1),
+    ('/api/search/?q=terry%20ten&kind=tenant', 1),
+    ('/api/search/?q=block&kind=property,unit&limit=50', 1),
+]
+
+
+class SearchQueryBudgetTests(testing.QueryBudgetTestCase):
+    """
+    Query budgets for the search endpoint
+    """
+    endpoints = {role: SEARCH_ENDPOINTS for role in testing.ROLES}
+
+
+class SearchTests(TestCase):
+    """
+    Search index upkeep, prefix matching and role scoping
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+        cls.objects = testing.seed_portfolio(cls.users)
+        cls.other = testing.User.objects.create_user('other-landlord', role='LANDLORD')
+
+    def search(self, user, q, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(result['kind'], result['id']) for result in response.data['results']]
+
+    def test_prefix_matches_name_and_phone(self):
+        tenant = self.objects['tenant']
+        for q in ('ter', 'Terry Ten', '07000', 'TERRY'):
+            with self.subTest(q=q):
+                self.assertIn(('TENANT', tenant.pk), self.search(self.users['landlord'], q, kind='tenant'))
+        self.assertEqual(self.search(self.users['landlord'], 'terry nobody'), [])
+
+    def test_results_follow_the_list_scopes(self):
+        complaint = self.objects['complaint']
+        self.assertIn(('COMPLAINT', complaint.pk), self.search(self.users['caretaker'], 'dripping'))
+        self.assertEqual({kind for kind, _ in self.search(self.users['caretaker'], 'terry')}, {'COMPLAINT'})
+        self.assertEqual(self.search(self.other, 'terry'), [])
+        units = {pk for _, pk in self.search(self.users['tenant'], 'block', kind='unit', limit=50)}
+        self.assertEqual(units, set(self.users['tenant'].tenancies.values_list('unit', flat=True)))
+        own = {pk for _, pk in self.search(self.users['tenant'], 'leak', kind='complaint')}
+        self.assertEqual(own, set(Complaint.objects.filter(tenant__user=self.users['tenant']).values_list('pk', flat=True)))
+
+    def test_index_follows_changes(self):
+        landlord, tenant = self.users['landlord'], self.objects['tenant']
+        self.users['tenant'].first_name = 'Tamsin'
+        self.users['tenant'].save()
+        self.assertIn(('TENANT', tenant.pk), self.search(landlord, 'tamsin'))
+        self.assertNotIn(('TENANT', tenant.pk), self.search(landlord, 'terry'))
+
+        building = self.objects['property']
+        building.name = 'Riverside'
+        building.save()
+        found = self.search(landlord, 'riverside', limit=50)
+        self.assertIn(('UNIT', tenant.unit_id), found)
+        self.assertIn(('TENANT', tenant.pk), found)
+
+        complaint = self.objects['complaint']
+        complaint.delete()
+        self.assertNotIn(('COMPLAINT', complaint.pk), self.search(landlord, 'dripping', limit=50))
+
+    def test_rebuild(self):
+        SearchDocument.objects.filter(kind='TENANT').delete()
+        SearchDocument.objects.create(kind='PROPERTY', object_id=0, title='Gone', owner=self.users['landlord'])
+        counts = index.rebuild(owner=self.users['landlord'])
+        self.assertEqual(counts['property'], Property.objects.filter(owner=self.users['landlord']).count())
+        self.assertIn(('TENANT', self.objects['tenant'].pk), self.search(self.users['landlord'], 'terry'))
+        self.assertEqual(self.search(self.users['landlord'], 'gone'), [])
+
+    def test_like_fallback(self):
+        with mock.patch.object(index, 'fts_available', return_value=False):
+            self.assertIn(('TENANT', self.objects['tenant'].pk), self.search(self.users['landlord'], 'terr'))
+
+    def test_invalid_parameters(self):
+        client = APIClient()
+        client.force_authenticate(self.users['landlord'])
+        for params in ({}, {'q': '  '}, {'q': 'a', 'kind': 'invoice'}, {'q': 'a', 'limit': 0}, {'q': 'a', 'limit': 'x'}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get('/api/search/', params).status_code, 400)
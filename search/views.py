@@ -0,0 +1,39 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import index
+from .serializers import SearchResultSerializer
+
+
+class SearchView(APIView):
+    """
+    Full-text search over the tenants, properties, units and complaints the
+    user can see, for the search box and the autocomplete pickers
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Search with ?q=, optionally limited by ?kind=tenant,unit and ?limit="""
+        query = (request.query_params.get('q') or '').strip()
+        if not index.TERM.search(query):
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        kinds = [kind.strip().upper() for kind in request.query_params.get('kind', '').split(',') if kind.strip()]
+        unknown = set(kinds) - set(index.KINDS)
+        if unknown:
+            return Response(
+                {'error': f"kind must be one of {', '.join(kind.lower() for kind in index.KINDS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get('limit', index.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= index.MAX_LIMIT:
+            return Response(
+                {'error': f'limit must be between 1 and {index.MAX_LIMIT}'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = index.search(request.user, query, kinds=kinds, limit=limit)
+        return Response({'query': query, 'results': SearchResultSerializer(results, many=True).data})
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_initial'),
+        ('tenants', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['move_in_date', 'id'], name='tenants_ten_move_in_3e5a09_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+def vacate_duplicates(apps, schema_editor):
+    """
+    Leave one ACTIVE tenancy per unit: the latest move-in stays, the others
+    are marked VACATED as of the day it moved in.
+    """
+    Tenant = apps.get_model('tenants', 'Tenant')
+
+    units = (
+        Tenant.objects.filter(status='ACTIVE').values('unit')
+        .annotate(count=models.Count('id')).filter(count__gt=1).values_list('unit', flat=True)
+    )
+    vacated = []
+    for unit_id in list(units):
+        keeper, *others = Tenant.objects.filter(unit_id=unit_id, status='ACTIVE').order_by('-move_in_date', '-id')
+        for tenant in others:
+            tenant.status = 'VACATED'
+            tenant.move_out_date = tenant.move_out_date or keeper.move_in_date
+            vacated.append(tenant)
+    Tenant.objects.bulk_update(vacated, ['status', 'move_out_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(vacate_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tenant',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'ACTIVE')), fields=('unit',), name='unique_active_tenancy'),
+        ),
+    ]
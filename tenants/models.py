@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from properties.models import Unit
 
@@ -33,20 +33,57 @@ class Tenant(models.Model):
     
     class Meta:
         ordering = ['-move_in_date']
+        constraints = [
+            # Unit.active_tenant points at this one tenancy
+            models.UniqueConstraint(
+                fields=['unit'], condition=models.Q(status='ACTIVE'), name='unique_active_tenancy',
+            ),
+        ]
+        indexes = [
+            # Keyset pagination key
+            models.Index(fields=['move_in_date', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.unit}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the unit as loaded, in case save() moves the tenancy
+        instance._loaded_unit = instance.__dict__.get('unit_id')
+        return instance
+    
     def save(self, *args, **kwargs):
+        from finance import rollups
         # Update unit status when tenant is created or status changes
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        if self.status == 'ACTIVE':
-            self.unit.status = 'OCCUPIED'
-        elif self.status == 'VACATED' and not is_new:
-            self.unit.status = 'VACANT'
-        self.unit.save()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            loaded_unit = getattr(self, '_loaded_unit', None)
+            if loaded_unit and loaded_unit != self.unit_id:
+                # The tenant's invoices and payments now count towards the new unit's property
+                buildings = Unit.objects.filter(pk__in=[loaded_unit, self.unit_id]).values_list('building', flat=True)
+                rollups.touch_tenant(self.pk, buildings)
+            self._loaded_unit = self.unit_id
+            if not is_new:
+                # A tenancy moved to another unit leaves the old one vacant
+                for old_unit in Unit.objects.filter(active_tenant=self).exclude(pk=self.unit_id):
+                    old_unit.active_tenant = None
+                    if old_unit.status == 'OCCUPIED':
+                        old_unit.status = 'VACANT'
+                    old_unit.save(update_fields=['status', 'active_tenant', 'updated_at'])
+            
+            if self.status == 'ACTIVE':
+                self.unit.status = 'OCCUPIED'
+                self.unit.active_tenant = self
+            else:
+                if self.status == 'VACATED' and not is_new:
+                    self.unit.status = 'VACANT'
+                if self.unit.active_tenant_id == self.pk:
+                    self.unit.active_tenant = None
+            # Unit.save() moves the property's occupancy counters in the same transaction
+            self.unit.save(update_fields=['status', 'active_tenant', 'updated_at'])
 
 
 class TenantDocument(models.Model):
@@ -33,6 +33,17 @@ class TenantSerializer(serializers.ModelSerializer):
         model = Tenant
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
+        # validate() checks the active-tenancy constraint on every DRF version
+        validators = []
+    
+    def validate(self, attrs):
+        # A unit holds one ACTIVE tenancy at a time, this one or another
+        unit = attrs.get('unit', getattr(self.instance, 'unit', None))
+        status = attrs.get('status', getattr(self.instance, 'status', 'ACTIVE'))
+        taken = unit is not None and unit.active_tenant_id not in (None, getattr(self.instance, 'pk', None))
+        if taken and status == 'ACTIVE':
+            raise serializers.ValidationError({'unit': 'This unit already has an active tenant.'})
+        return attrs
 
 
 class TenantListSerializer(serializers.ModelSerializer):
@@ -63,6 +74,12 @@ class TenantCreateSerializer(serializers.ModelSerializer):
                   'emergency_contact_name', 'emergency_contact_phone', 'notes',
                   'username', 'email', 'first_name', 'last_name', 'phone', 'password')
     
+    def validate_unit(self, unit):
+        # New tenancies start ACTIVE, and a unit holds one at a time
+        if unit.active_tenant_id:
+            raise serializers.ValidationError('This unit already has an active tenant.')
+        return unit
+    
     def create(self, validated_data):
         # Extract user data
         user_data = {
@@ -1,3 +1,119 @@
+from datetime import date
+
+from django.db import IntegrityError
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import testing
+from properties.models import Property, Unit
+from .models import Tenant
+
+
+TENANT_ENDPOINTS = [
+    ('/api/tenants/', 2),
+    ('/api/tenants/{tenant.pk}/', 2),
+    ('/api/tenants/active/', 2),
+    ('/api/tenants/vacated/', 1),
+    ('/api/tenants/{tenant.pk}/documents/', 2),
+    ('/api/tenants/{tenant.pk}/statement/', 4),
+    ('/api/tenants/{tenant.pk}/statement/?output=csv', 3),
+    ('/api/documents/', 2),
+    ('/api/documents/{document.pk}/', 1),
+]
+
+
+class TenantQueryBudgetTests(testing.QueryBudgetTestCase):
+    """
+    Query budgets for the tenant and tenant document endpoints
+    """
+    endpoints = {
+        'landlord': TENANT_ENDPOINTS,
+        'tenant': TENANT_ENDPOINTS,
+        'caretaker': [
+            ('/api/tenants/', 1),
+            ('/api/tenants/active/', 1),
+            ('/api/documents/', 1),
+        ],
+        'staff': TENANT_ENDPOINTS,
+    }
+
+
+class ActiveTenancyTests(TestCase):
+    """
+    Unit.active_tenant follows the tenancy lifecycle
+    """
+
+    def setUp(self):
+        self.users = testing.create_users()
+        building = Property.objects.create(
+            name='Pointer Court', address='1 Test Road', city='Nairobi', owner=self.users['landlord']
+        )
+        self.unit = Unit.objects.create(building=building, unit_number='1', rent_amount=10000)
+        self.other_unit = Unit.objects.create(building=building, unit_number='2', rent_amount=10000)
+        self.tenant = Tenant.objects.create(user=self.users['tenant'], unit=self.unit, move_in_date=date(2026, 1, 1))
+
+    def assertActiveTenant(self, unit, tenant):
+        unit.refresh_from_db()
+        self.assertEqual(unit.active_tenant, tenant)
+
+    def test_move_in_and_vacate(self):
+        self.assertActiveTenant(self.unit, self.tenant)
+        self.tenant.status = 'VACATED'
+        self.tenant.save()
+        self.assertActiveTenant(self.unit, None)
+        self.assertEqual(self.unit.status, 'VACANT')
+
+    def test_move_to_another_unit(self):
+        self.tenant.unit = self.other_unit
+        self.tenant.save()
+        self.assertActiveTenant(self.unit, None)
+        self.assertActiveTenant(self.other_unit, self.tenant)
+        self.assertEqual((self.unit.status, self.other_unit.status), ('VACANT', 'OCCUPIED'))
+        building = Property.objects.get(pk=self.unit.building_id)
+        self.assertEqual((building.occupied_units, building.vacant_units), (1, 1))
+
+    def test_update_into_an_occupied_unit(self):
+        other = Tenant.objects.create(
+            user=testing.User.objects.create_user('pointer-other', role='TENANT'), unit=self.other_unit,
+            move_in_date=date(2026, 1, 1),
+        )
+        client = APIClient()
+        client.force_authenticate(self.users['landlord'])
+        url = f'/api/tenants/{self.tenant.pk}/'
+        response = client.patch(url, {'unit': self.other_unit.pk}, format='json')
+        self.assertEqual((response.status_code, list(response.data)), (400, ['unit']))
+        self.assertEqual(client.patch(url, {'unit': self.unit.pk, 'notes': 'Renewed'}, format='json').status_code, 200)
+
+        other.status = 'VACATED'
+        other.save()
+        self.tenant.status = 'VACATED'
+        self.tenant.save()
+        # Reactivating is refused once the unit is let again
+        Tenant.objects.create(user=self.users['caretaker'], unit=self.unit, move_in_date=date(2026, 3, 1))
+        self.assertEqual(client.patch(url, {'status': 'ACTIVE'}, format='json').status_code, 400)
+        self.assertEqual(client.patch(url, {'status': 'ACTIVE', 'unit': self.other_unit.pk}, format='json').status_code, 200)
+        self.assertActiveTenant(self.other_unit, self.tenant)
+
+    def test_one_active_tenancy_per_unit(self):
+        with self.assertRaises(IntegrityError):
+            Tenant.objects.create(user=self.users['caretaker'], unit=self.unit, move_in_date=date(2026, 2, 1))
+
+
+class StatementPaginationTests(TestCase):
+    """
+    Statements page by number even when a cursor is asked for
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = testing.create_users()
+        cls.tenant = testing.seed_portfolio(cls.users)['tenant']
 
-# Create your tests here.
+    def test_cursor_mode_falls_back_to_pages(self):
+        client = APIClient()
+        client.force_authenticate(self.users['landlord'])
+        url = f'/api/tenants/{self.tenant.pk}/statement/'
+        response = client.get(url, {'pagination': 'cursor', 'page_size': 4})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['count'], len(response.data['results'])), (6, 4))
+        self.assertEqual(response.data['results'], client.get(url, {'page_size': 4}).data['results'])
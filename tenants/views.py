@@ -3,6 +3,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+import csv
+from core.mixins import PaginatedActionMixin, QueryPlanMixin
 from .models import Tenant, TenantDocument
 from .serializers import (
     TenantSerializer,
@@ -12,11 +16,12 @@ from .serializers import (
 )
 
 
-class TenantViewSet(viewsets.ModelViewSet):
+class TenantViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing tenants
     """
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-move_in_date', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -42,15 +47,13 @@ class TenantViewSet(viewsets.ModelViewSet):
     def active(self, request):
         """Get all active tenants"""
         tenants = self.get_queryset().filter(status='ACTIVE')
-        serializer = TenantListSerializer(tenants, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(tenants, TenantListSerializer)
     
     @action(detail=False, methods=['get'])
     def vacated(self, request):
         """Get all vacated tenants"""
         tenants = self.get_queryset().filter(status='VACATED')
-        serializer = TenantListSerializer(tenants, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(tenants, TenantListSerializer)
     
     @action(detail=True, methods=['post'])
     def vacate(self, request, pk=None):
@@ -61,16 +64,73 @@ class TenantViewSet(viewsets.ModelViewSet):
         tenant.save()
         return Response({'message': 'Tenant marked as vacated'})
     
+    @action(detail=True, methods=['get'])
+    def statement(self, request, pk=None):
+        """Get the tenant's account statement with a running balance"""
+        from finance.reports import TenantStatement
+        tenant = self.get_object()
+        
+        bounds = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            try:
+                bounds[param] = parse_date(value) if value else None
+            except ValueError:
+                bounds[param] = None
+            if value and bounds[param] is None:
+                return Response(
+                    {'error': f'{param} must be a date in YYYY-MM-DD format'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        start, end = bounds['from'], bounds['to']
+        if start and end and start > end:
+            return Response(
+                {'error': 'from must not be after to'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        statement = TenantStatement(tenant.id, start, end)
+        
+        if request.query_params.get('output') == 'csv':
+            return self._statement_csv(tenant, statement)
+        
+        summary = statement.summary()
+        page = self.paginate_queryset(statement)
+        response = self.get_paginated_response(page)
+        response.data.update({
+            'tenant': tenant.id,
+            'from': start,
+            'to': end,
+            'opening_balance': summary['opening_balance'],
+            'closing_balance': summary['closing_balance'],
+        })
+        return response
+    
+    def _statement_csv(self, tenant, statement):
+        class Echo:
+            def write(self, value):
+                return value
+        
+        writer = csv.writer(Echo())
+        
+        def rows():
+            yield writer.writerow(statement.COLUMNS)
+            for row in statement.iterate():
+                yield writer.writerow([row[column] for column in statement.COLUMNS])
+        
+        response = StreamingHttpResponse(rows(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="statement-tenant-{tenant.id}.csv"'
+        return response
+    
     @action(detail=True, methods=['get'])
     def documents(self, request, pk=None):
         """Get all documents for a tenant"""
         tenant = self.get_object()
         documents = tenant.documents.all()
-        serializer = TenantDocumentSerializer(documents, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(documents, TenantDocumentSerializer)
 
 
-class TenantDocumentViewSet(viewsets.ModelViewSet):
+class TenantDocumentViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing tenant documents
     """
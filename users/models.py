@@ -17,6 +17,8 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     photo = models.ImageField(upload_to='users/photos/', blank=True, null=True)
+    # Thumbnail/WebP variants of the photo (see core/images.py)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     national_id = models.CharField(max_length=50, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
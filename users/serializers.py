@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from core.serializers import ImageVariantsField
 
 User = get_user_model()
 
@@ -29,11 +30,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for user profile and details"""
     full_name = serializers.SerializerMethodField()
+    photo_variants = ImageVariantsField()
     
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'full_name',
-                  'role', 'phone', 'address', 'photo', 'national_id', 
+                  'role', 'phone', 'address', 'photo', 'photo_variants', 'national_id', 
                   'created_at', 'updated_at')
         read_only_fields = ('id', 'created_at', 'updated_at')
     
@@ -44,10 +46,11 @@ class UserSerializer(serializers.ModelSerializer):
 class UserListSerializer(serializers.ModelSerializer):
     """Minimal serializer for user lists"""
     full_name = serializers.SerializerMethodField()
+    photo_variants = ImageVariantsField()
     
     class Meta:
         model = User
-        fields = ('id', 'username', 'full_name', 'email', 'role', 'phone')
+        fields = ('id', 'username', 'full_name', 'email', 'role', 'phone', 'photo_variants')
     
     def get_full_name(self, obj):
         return obj.get_full_name() or obj.username
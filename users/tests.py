@@ -1,3 +1,21 @@
-from django.test import TestCase
+from core import testing
 
-# Create your tests here.
+
+USER_ENDPOINTS = [
+    ('/api/users/', 2),
+    ('/api/users/tenants/', 2),
+    ('/api/users/landlords/', 2),
+    ('/api/users/profile/', 0),
+]
+
+
+class UserQueryBudgetTests(testing.QueryBudgetTestCase):
+    """
+    Query budgets for the user endpoints
+    """
+    endpoints = {
+        'landlord': USER_ENDPOINTS + [('/api/users/{tenant.user.pk}/', 1)],
+        'tenant': USER_ENDPOINTS + [('/api/users/{tenant.user.pk}/', 1)],
+        'caretaker': USER_ENDPOINTS,
+        'staff': USER_ENDPOINTS + [('/api/users/{tenant.user.pk}/', 1)],
+    }
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import get_user_model
+from core.mixins import PaginatedActionMixin
 from .serializers import (
     UserRegistrationSerializer, 
     UserSerializer, 
@@ -29,7 +30,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing users (admin/landlord only)
     """
@@ -72,12 +73,10 @@ class UserViewSet(viewsets.ModelViewSet):
     def tenants(self, request):
         """Get all tenants"""
         tenants = User.objects.filter(role='TENANT')
-        serializer = UserListSerializer(tenants, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(tenants, UserListSerializer)
     
     @action(detail=False, methods=['get'])
     def landlords(self, request):
         """Get all landlords"""
         landlords = User.objects.filter(role='LANDLORD')
-        serializer = UserListSerializer(landlords, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(landlords, UserListSerializer)